@@ -0,0 +1,134 @@
+"""Async implementations of the hot read endpoints, used when DB_ASYNC is on.
+
+They share statements and response shaping with ``routes.py`` through
+``queries``; only execution differs. An in-flight request holds a pooled
+connection while awaiting, not an OS thread.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+
+import anyio
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import get_async_db
+from ..core.json_response import json_response
+from ..core.query_stats import query_budget
+from ..schemas.challenge import ChallengeSummary
+from ..schemas.log import LogEntry, LogSummaryResponse
+from ..schemas.task import DailyTaskResponse
+from ..schemas.task_list import TaskListItem
+from ..services import catalog, completions, daily_assignments, task_stats, watermarks
+from . import queries
+from .http_cache import etag_matches, json_with_etag, not_modified, set_validators
+from .pagination import clamp_limit, keyset_page, set_next_cursor
+from .routes import get_current_user_id
+
+
+router = APIRouter()
+
+
+@router.get("/tasks/daily", response_model=DailyTaskResponse)
+@query_budget(5)
+async def get_daily_task(
+    force_refresh: bool = False,
+    local_date: Optional[date] = Query(None, alias="date"),
+    db: AsyncSession = Depends(get_async_db),
+    x_user_id: Optional[str] = Header(None, alias="X-User-Id"),
+):
+    day = queries.local_date(local_date)
+    snap = await catalog.get_snapshot_async(db)
+    stats = await task_stats.get_cache_async(db)
+    user_id = x_user_id.strip() if x_user_id else ""
+    if not user_id:
+        payload = catalog.pick_random(snap)
+    elif force_refresh:
+        payload = await daily_assignments.refresh_async(db, snap, user_id, day)
+    else:
+        payload = await daily_assignments.daily_task_async(db, snap, user_id, day)
+    return json_response(queries.daily_task_payload(payload, stats))
+
+
+@router.get("/logs", response_model=Dict[str, List[LogEntry]])
+@query_budget(4)
+async def get_logs(
+    response: Response,
+    month: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
+):
+    limit = clamp_limit(limit)
+    marks = (await db.execute(watermarks.lookup_statement(user_id, queries.logs_watermarks(month)))).all()
+    snap = await catalog.get_snapshot_async(db)
+    etag, last_modified = watermarks.validators(user_id, marks, snap.etag, month, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    result = await db.execute(queries.logs_statement(user_id, month, cursor, limit))
+    return json_response(queries.group_logs(result.all(), limit, response), response)
+
+
+@router.get("/logs/summary", response_model=LogSummaryResponse)
+@query_budget(1)
+async def get_log_summary(
+    from_: date = Query(..., alias="from"),
+    to: date = Query(...),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    result = await db.execute(queries.log_summary_statement(user_id, from_, to))
+    return json_response(queries.log_summary(result.all()))
+
+
+@router.get("/stock", response_model=List[TaskListItem])
+@query_budget(4)
+async def get_stocked_tasks(
+    response: Response,
+    sort: str = "created",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
+):
+    limit = clamp_limit(limit)
+    marks = (await db.execute(watermarks.lookup_statement(user_id, queries.STOCK_WATERMARKS))).all()
+    snap = await catalog.get_snapshot_async(db)
+    etag, last_modified = watermarks.validators(user_id, marks, snap.etag, sort, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    result = await db.execute(queries.stocked_tasks_statement(user_id, sort, cursor, limit))
+    return json_response(queries.stocked_task_items(keyset_page(result.all(), sort, 2, limit, response)), response)
+
+
+@router.get("/challenges/search", response_model=List[ChallengeSummary])
+@query_budget(3)
+async def search_challenges(
+    q: Optional[str] = None,
+    category_id: Optional[int] = None,
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
+):
+    limit = clamp_limit(limit)
+    snap = await catalog.get_snapshot_async(db)
+    completed_ids = await completions.completed_ids_async(db, user_id)
+
+    def page() -> tuple:
+        body, next_cursor = queries.search_body(snap, q, category_id, completed_ids, sort, cursor, limit)
+        return body, catalog.make_etag(body), next_cursor
+
+    # Rebuilding the search index after a catalog change, matching and
+    # serializing up to the whole catalog are CPU-bound: off the event loop.
+    body, etag, next_cursor = await anyio.to_thread.run_sync(page)
+    response = json_with_etag(body, etag, if_none_match)
+    set_next_cursor(response, next_cursor)
+    return response
@@ -0,0 +1,69 @@
+"""Conditional GET helpers (ETag / If-None-Match)."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Mapping, Optional
+
+from fastapi import Response
+
+from ..core import compression
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def json_with_etag(
+    body: bytes,
+    etag: str,
+    if_none_match: Optional[str],
+    encoded: Optional[Mapping[str, bytes]] = None,
+    accept_encoding: Optional[str] = None,
+) -> Response:
+    """Serve prebuilt JSON bytes, or an empty 304 when the client copy is current.
+
+    ``encoded`` holds precompressed variants of ``body`` by Content-Encoding;
+    the one ``accept_encoding`` prefers is sent as is, under the weak form of
+    ``etag`` like the bodies compressed by ``CompressionMiddleware``."""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    encoding = None
+    if encoded:
+        encoding = compression.negotiate(accept_encoding, [e for e in compression.ENCODINGS if e in encoded])
+    if encoding is None:
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"} if encoded else {"ETag": etag}
+        return Response(content=body, media_type="application/json", headers=headers)
+    return Response(
+        content=encoded[encoding],
+        media_type="application/json",
+        headers={"ETag": "W/" + etag, "Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+    )
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    """ETag and, when known, Last-Modified (a naive UTC datetime)."""
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
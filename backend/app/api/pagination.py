@@ -0,0 +1,171 @@
+"""Opaque keyset cursors for list endpoints.
+
+A cursor is the sort key of the last row on the previous page, serialized as
+url-safe base64 JSON so clients treat it as an opaque token. The next page is
+selected with a range predicate on the sort key instead of OFFSET, so every
+page costs the same regardless of how deep the client has scrolled.
+
+List endpoints with several orders describe each as a ``SortOrder``: the sort
+expressions, the last of which must be unique, each with its direction.
+``keyset`` applies one to a statement and appends the key columns to its
+rows, and ``keyset_page`` strips them again and emits the next cursor. These
+cursors carry the sort name, so a cursor is only valid for the order that
+produced it. ``GET /logs`` has a single order and builds its own cursors, but
+uses the same ``seek`` predicate and ``sort_keys``.
+"""
+
+import base64
+from datetime import datetime
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, and_, literal, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ColumnElement, Select
+from sqlalchemy.sql.functions import FunctionElement
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*key) -> str:
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+def decode_datetime_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a ``(timestamp, id)`` cursor."""
+    values = decode_cursor(cursor)
+    try:
+        ts, row_id = values
+        return datetime.fromisoformat(ts), row_id
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+# (expression, descending); the last expression must be unique.
+SortOrder = Sequence[Tuple[ColumnElement, bool]]
+
+
+def choose_sort(sorts: Dict[str, SortOrder], sort: str):
+    if sort not in sorts:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid sort. Use one of: {', '.join(sorts)}."
+        )
+    return sorts[sort]
+
+
+def decode_sort_cursor(cursor: str, sort: str, size: int) -> list:
+    """Decode a cursor from ``encode_cursor(sort, *key)`` with ``size`` key values."""
+    values = decode_cursor(cursor)
+    if len(values) != size + 1 or values[0] != sort:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values[1:]
+
+
+class _comparable(FunctionElement):
+    """A DateTime sort key as ``keyset`` compares it. SQLite keeps DATETIME as
+    text in the writer's format (``CURRENT_TIMESTAMP`` has no fractional
+    seconds, SQLAlchemy writes microseconds), so there it goes through
+    ``julianday()``; other dialects compare the column itself."""
+
+    name = "comparable"
+    inherit_cache = True
+
+
+@compiles(_comparable)
+def _compile_comparable(element, compiler, **kw):
+    return compiler.process(element.clauses.clauses[0], **kw)
+
+
+@compiles(_comparable, "sqlite")
+def _compile_comparable_sqlite(element, compiler, **kw):
+    return f"julianday({compiler.process(element.clauses.clauses[0], **kw)})"
+
+
+def _key(expr):
+    return _comparable(expr) if isinstance(expr.type, DateTime) else expr
+
+
+def _bound(expr, value):
+    return _comparable(literal(value, expr.type)) if isinstance(expr.type, DateTime) else value
+
+
+def seek(order: SortOrder, values: Sequence) -> Tuple[ColumnElement, ColumnElement]:
+    """Predicates selecting the rows that come after the key ``values`` in
+    ``order``."""
+    # Lexicographic "comes after": equal on a prefix, past the cursor on the next key.
+    after = []
+    for i, (expr, descending) in enumerate(order):
+        key, bound = _key(expr), _bound(expr, values[i])
+        past = key < bound if descending else key > bound
+        prefix = (_key(e) == _bound(e, v) for (e, _), v in zip(order[:i], values))
+        after.append(and_(*prefix, past))
+    # The OR alone gives the planner no index bound; the redundant range on
+    # the leading key lets the scan start at the cursor instead of the top.
+    (first, descending), first_value = order[0], values[0]
+    key, bound = _key(first), _bound(first, first_value)
+    return (key <= bound if descending else key >= bound), or_(*after)
+
+
+def sort_keys(order: SortOrder) -> list:
+    """``ORDER BY`` clauses for ``order``, comparing as ``seek`` does."""
+    return [_key(expr).desc() if descending else _key(expr).asc() for expr, descending in order]
+
+
+def keyset(
+    query: Select, sort: str, order: SortOrder, cursor: Optional[str], limit: Optional[int]
+) -> Select:
+    """Order ``query`` by ``order``, resume after ``cursor`` and fetch one row
+    past ``limit``. The key values are appended to each row for
+    ``keyset_page``."""
+    if cursor:
+        values = decode_sort_cursor(cursor, sort, len(order))
+        try:
+            values = [
+                datetime.fromisoformat(v) if isinstance(expr.type, DateTime) else v
+                for (expr, _), v in zip(order, values)
+            ]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        query = query.where(*seek(order, values))
+    query = query.add_columns(*(expr for expr, _ in order)).order_by(*sort_keys(order))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def keyset_page(rows, sort: str, size: int, limit: Optional[int], response: Response) -> List[tuple]:
+    """Rows of a ``keyset`` statement without their ``size`` key columns; sets
+    the next cursor when there are more than ``limit``."""
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_cursor(sort, *rows[-1][-size:]))
+    return [tuple(row[:-size]) for row in rows]
+
+
+def clamp_limit(limit: Optional[int]) -> Optional[int]:
+    if limit is None:
+        return None
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive.")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,413 @@
+"""Statements and row shaping shared by the sync and async route handlers.
+
+Each hot endpoint is split into a statement builder and a function that turns
+the result rows into the response body, so ``routes.py`` and
+``async_routes.py`` differ only in how the statement is executed.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime
+import threading
+from typing import Dict, List, Optional, Tuple
+import uuid
+
+from fastapi import HTTPException, Response
+from sqlalchemy import case, delete, func, insert, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..core.json_response import dump_json
+from ..models import Achievement, Category, DailyActivity, Stock, Task
+from ..services import catalog, rollups, search, task_stats, watermarks
+from .pagination import (
+    choose_sort,
+    decode_datetime_cursor,
+    decode_sort_cursor,
+    encode_cursor,
+    keyset,
+    seek,
+    set_next_cursor,
+    sort_keys,
+)
+
+
+# The watermarks GET /stock depends on (see ``services/watermarks.py``).
+STOCK_WATERMARKS = [watermarks.STOCK, watermarks.MY_TASKS]
+
+
+def month_bounds(month: str) -> Tuple[datetime, datetime]:
+    try:
+        year, mon = map(int, month.split("-"))
+        start_date = datetime(year, mon, 1)
+        end_date = datetime(year, mon + 1, 1) if mon < 12 else datetime(year + 1, 1, 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM.")
+    return start_date, end_date
+
+
+def logs_watermarks(month: Optional[str]) -> List[str]:
+    """The watermarks ``GET /logs`` depends on (see ``services/watermarks.py``)."""
+    logs = watermarks.log_month(month_bounds(month)[0]) if month else watermarks.LOGS
+    return [logs, watermarks.MY_TASKS]
+
+
+# Newest first. Cursors are plain ``(achieved_at, id)`` pairs, not sort-named.
+LOG_ORDER = ((Achievement.achieved_at, True), (Achievement.id, True))
+
+
+def logs_statement(
+    user_id: str, month: Optional[str], cursor: Optional[str], limit: Optional[int]
+):
+    query = (
+        select(
+            Achievement.id,
+            Achievement.user_id,
+            Achievement.memo,
+            Achievement.feeling,
+            Achievement.achieved_at,
+            Task.id,
+            Task.title,
+            Task.description,
+            Task.difficulty,
+            Task.source,
+            Category.id,
+            Category.name,
+        )
+        .join(Task, Task.id == Achievement.task_id)
+        .outerjoin(Category, Category.id == Task.category_id)
+        .where(Achievement.user_id == user_id)
+    )
+    if month:
+        start_date, end_date = month_bounds(month)
+        query = query.where(Achievement.achieved_at >= start_date, Achievement.achieved_at < end_date)
+    if cursor:
+        query = query.where(*seek(LOG_ORDER, decode_datetime_cursor(cursor)))
+    query = query.order_by(*sort_keys(LOG_ORDER))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def group_logs(rows, limit: Optional[int], response: Response) -> dict:
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_cursor(rows[-1][4], rows[-1][0]))
+
+    grouped = defaultdict(list)
+    for (
+        log_id, log_user_id, memo, feeling, achieved_at,
+        task_id, title, description, difficulty, source,
+        category_id, category_name,
+    ) in rows:
+        grouped[achieved_at.strftime("%Y-%m-%d")].append(
+            {
+                "id": log_id,
+                "user_id": log_user_id,
+                "memo": memo,
+                "feeling": feeling,
+                "achieved_at": achieved_at,
+                "challenge": {
+                    "id": task_id,
+                    "title": title,
+                    "description": description,
+                    "difficulty": difficulty,
+                    "category": {"id": category_id, "name": category_name} if category_id is not None else {"id": -1, "name": "My Task"},
+                    "source": source,
+                },
+            }
+        )
+    return grouped
+
+
+# Longest range GET /logs/summary serves, in days.
+MAX_SUMMARY_DAYS = 366
+
+
+def log_summary_statement(user_id: str, start: date, end: date):
+    if end < start:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+    if (end - start).days >= MAX_SUMMARY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must not exceed {MAX_SUMMARY_DAYS} days.")
+    return (
+        select(
+            DailyActivity.day,
+            DailyActivity.category_id,
+            Category.name,
+            DailyActivity.feeling,
+            DailyActivity.count,
+        )
+        .outerjoin(Category, Category.id == DailyActivity.category_id)
+        .where(
+            DailyActivity.user_id == user_id,
+            DailyActivity.day >= start,
+            DailyActivity.day <= end,
+        )
+        .order_by(DailyActivity.day, DailyActivity.category_id, DailyActivity.feeling)
+    )
+
+
+def log_summary(rows) -> dict:
+    """Per-day totals with counts by category and by feeling; days without
+    logs are omitted."""
+    days = []
+    total = 0
+    for day, category_id, category_name, feeling, count in rows:
+        if not days or days[-1]["day"] != day:
+            days.append({"day": day, "total": 0, "categories": {}, "feelings": {}})
+        entry = days[-1]
+        entry["total"] += count
+        total += count
+        category = entry["categories"].get(category_id)
+        if category is None:
+            if category_id == rollups.NO_CATEGORY or category_name is None:
+                category = {"id": -1, "name": "My Task", "count": 0}
+            else:
+                category = {"id": category_id, "name": category_name, "count": 0}
+            entry["categories"][category_id] = category
+        category["count"] += count
+        entry["feelings"][feeling] = entry["feelings"].get(feeling, 0) + count
+    for entry in days:
+        entry["categories"] = list(entry["categories"].values())
+        entry["feelings"] = [
+            {"feeling": feeling if feeling != rollups.NO_FEELING else None, "count": count}
+            for feeling, count in entry["feelings"].items()
+        ]
+    return {"total": total, "days": days}
+
+
+def stock_insert_statement(dialect: str, user_id: str, task_ids):
+    """Stock ``task_ids`` for the user in one statement, returning ``(id,
+    task_id)`` of the rows it created.
+
+    ``INSERT ... SELECT`` over the tasks the user may stock (catalog tasks and
+    their own "my" tasks), so missing and forbidden ids are dropped by the
+    same statement; ``ON CONFLICT DO NOTHING`` on ``uq_stocks_user_task``
+    skips tasks that are already stocked, also under concurrent requests.
+    """
+    ids = {task_id: str(uuid.uuid4()) for task_id in task_ids}
+    if len(ids) == 1:
+        new_id = literal(next(iter(ids.values())))
+    else:
+        new_id = case(ids, value=Task.id)
+    stockable = select(new_id, literal(user_id), Task.id, func.now()).where(
+        Task.id.in_(ids), or_(Task.source != "my", Task.owner_user_id == user_id)
+    )
+    return (
+        insert_ignore(dialect, Stock, "user_id", "task_id")
+        .from_select(["id", "user_id", "task_id", "created_at"], stockable)
+        .returning(Stock.id, Stock.task_id)
+    )
+
+
+def stock_delete_statement(user_id: str, task_ids):
+    """Unstock ``task_ids`` in one statement, returning the task ids removed."""
+    return (
+        delete(Stock)
+        .where(Stock.user_id == user_id, Stock.task_id.in_(task_ids))
+        .returning(Stock.task_id)
+    )
+
+
+def stock_task_statement(task_id: int):
+    return select(Task.source, Task.owner_user_id).where(Task.id == task_id)
+
+
+# Uncategorized ("my") tasks and tasks without a difficulty sort first.
+STOCK_SORTS = {
+    "created": ((Stock.created_at, True), (Stock.task_id, True)),
+    "difficulty": ((func.coalesce(Task.difficulty, 0), False), (Stock.task_id, False)),
+    "category": ((func.coalesce(Task.category_id, 0), False), (Stock.task_id, False)),
+}
+MY_TASK_SORTS = {
+    "created": ((Task.created_at, True), (Task.id, True)),
+}
+SEARCH_SORTS = ("relevance", "difficulty", "category")
+
+
+# uuid5 namespace for achievement ids derived from client ids in POST /logs/batch.
+_CLIENT_LOG_NAMESPACE = uuid.UUID("6f1d7c2e-52a4-4d8e-9b0a-3c1e5f7a9d21")
+
+
+def client_log_id(user_id: str, client_id: str) -> str:
+    """Achievement id for a client-supplied log id. The same (user, client id)
+    always maps to the same primary key, so a retried batch cannot insert a
+    log twice."""
+    return str(uuid.uuid5(_CLIENT_LOG_NAMESPACE, f"{user_id}\x00{client_id}"))
+
+
+def insert_ignore(dialect: str, model, *index_elements):
+    """``INSERT ... ON CONFLICT (index_elements) DO NOTHING`` where supported."""
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=list(index_elements))
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=list(index_elements))
+    return insert(model)
+
+
+def batch_tasks_statement(task_ids):
+    return select(Task.id, Task.source, Task.owner_user_id).where(Task.id.in_(task_ids))
+
+
+def plan_log_batch(user_id: str, items, tasks: Dict[int, tuple]) -> Tuple[List[dict], List[dict]]:
+    """Per-item results (``log_id`` set for valid items, status still open)
+    and the achievement rows to insert, one per distinct client id."""
+    results, rows = [], {}
+    for item in items:
+        task = tasks.get(item.task_id)
+        if task is None:
+            results.append({"client_id": item.client_id, "status": "not_found"})
+            continue
+        source, owner_user_id = task
+        if source == "my" and owner_user_id != user_id:
+            results.append({"client_id": item.client_id, "status": "forbidden"})
+            continue
+        log_id = client_log_id(user_id, item.client_id)
+        results.append({"client_id": item.client_id, "status": None, "log_id": log_id})
+        rows.setdefault(
+            log_id,
+            {
+                "id": log_id,
+                "user_id": user_id,
+                "task_id": item.task_id,
+                "memo": item.memo,
+                "feeling": item.feeling,
+                "achieved_at": item.achieved_at if item.achieved_at is not None else func.now(),
+            },
+        )
+    return results, list(rows.values())
+
+
+def stocked_tasks_statement(
+    user_id: str, sort: str = "created", cursor: Optional[str] = None, limit: Optional[int] = None
+):
+    query = (
+        select(Task.id, Task.title, Category.name, Task.description, Task.difficulty, Task.source)
+        .select_from(Stock)
+        .join(Task, Task.id == Stock.task_id)
+        .outerjoin(Category, Category.id == Task.category_id)
+        .where(Stock.user_id == user_id)
+    )
+    return keyset(query, sort, choose_sort(STOCK_SORTS, sort), cursor, limit)
+
+
+def stocked_task_items(rows) -> list:
+    return [
+        {
+            "id": task_id,
+            "title": title,
+            "tags": [category_name] if category_name else ["My Task"],
+            "description": description,
+            "difficulty": difficulty,
+            "source": source,
+        }
+        for task_id, title, category_name, description, difficulty, source in rows
+    ]
+
+
+def my_tasks_statement(
+    user_id: str, sort: str = "created", cursor: Optional[str] = None, limit: Optional[int] = None
+):
+    query = select(Task.id, Task.title, Task.description, Task.created_at).where(
+        Task.source == "my", Task.owner_user_id == user_id
+    )
+    return keyset(query, sort, choose_sort(MY_TASK_SORTS, sort), cursor, limit)
+
+
+def my_task_items(rows) -> list:
+    return [
+        {"id": task_id, "title": title, "description": description, "created_at": created_at}
+        for task_id, title, description, created_at in rows
+    ]
+
+
+# Browsing (no q) lists the same hits for everyone: (snapshot, category_id,
+# sort) -> keyed hits, kept for the current snapshot only. Threadpool
+# handlers share it, so it is only touched under the lock.
+_browse_cache: Dict[tuple, list] = {}
+_browse_cache_lock = threading.Lock()
+_BROWSE_CACHE_MAX = 64
+
+
+def _keyed_hits(
+    snap: catalog.CatalogSnapshot, q: Optional[str], category_id: Optional[int], sort: str
+) -> List[Tuple[tuple, int]]:
+    """``(sort key, snapshot position)`` for every hit, in ascending key order."""
+    browsing = not (q and q.strip())
+    cache_key = (snap.version, snap.loaded_at, category_id, sort)
+    if browsing:
+        with _browse_cache_lock:
+            cached = _browse_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    tasks = snap.tasks
+    hits = search.find(snap, q, category_id)
+    if sort == "relevance":
+        keyed = [((-score, tasks[i].id), i) for i, score in hits]
+    elif sort == "difficulty":
+        keyed = sorted(((tasks[i].difficulty or 0, tasks[i].id), i) for i, _ in hits)
+    else:
+        keyed = sorted(((tasks[i].category_id or 0, tasks[i].id), i) for i, _ in hits)
+    if browsing:
+        with _browse_cache_lock:
+            if any(key[:2] != cache_key[:2] for key in _browse_cache):
+                _browse_cache.clear()
+            if len(_browse_cache) < _BROWSE_CACHE_MAX:
+                _browse_cache[cache_key] = keyed
+    return keyed
+
+
+def search_body(
+    snap: catalog.CatalogSnapshot,
+    q: Optional[str],
+    category_id: Optional[int],
+    completed_ids,
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[bytes, Optional[str]]:
+    """Serialized page of search results and the cursor for the next page.
+
+    Pages are keyed on ascending ``(-relevance, id)``, ``(difficulty, id)`` or
+    ``(category_id, id)``, with missing values as 0, the same keyset scheme as
+    the SQL endpoints but evaluated over the in-process catalog.
+    """
+    if sort not in SEARCH_SORTS:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid sort. Use one of: {', '.join(SEARCH_SORTS)}."
+        )
+    keyed = _keyed_hits(snap, q, category_id, sort)
+    start = 0
+    if cursor:
+        after = tuple(decode_sort_cursor(cursor, sort, 2))
+        try:
+            start = bisect_right(keyed, after, key=lambda k: k[0])
+        except TypeError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    next_cursor = None
+    if limit is not None and len(keyed) - start > limit:
+        page = keyed[start:start + limit]
+        next_cursor = encode_cursor(sort, *page[-1][0])
+    else:
+        page = keyed[start:]
+    results = []
+    for _, i in page:
+        item = snap.search_items[i]
+        results.append({**item, "is_completed": item["id"] in completed_ids})
+    return dump_json(results), next_cursor
+
+
+def local_date(value: Optional[date]) -> date:
+    """The client's local date for the daily task, defaulting to the server's.
+    Time zones put it at most a day away from the server's date."""
+    today = date.today()
+    if value is None:
+        return today
+    if abs((value - today).days) > 1:
+        raise HTTPException(status_code=400, detail="date must be within one day of today.")
+    return value
+
+
+def daily_task_payload(payload: Optional[dict], stats: task_stats.TaskStatsCache) -> dict:
+    if payload is None:
+        raise HTTPException(status_code=404, detail="No tasks found in the database.")
+    return {**payload, "stats": stats.for_task(int(payload["id"]))}
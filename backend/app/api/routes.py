@@ -1,26 +1,51 @@
-from collections import defaultdict
-from datetime import datetime
-import random
-from typing import List, Optional
+from dataclasses import asdict
+from datetime import date
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response, Header
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Header, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
 
-from ..core.database import get_db
-from ..models import Category, Challenge, Task, Achievement, Stock
+from ..core import pool_metrics, request_metrics
+from ..core.config import DB_ASYNC
+from ..core.database import engine, get_db, replica_set
+from ..core.json_response import json_response
+from ..core.query_stats import query_budget
+from . import queries
+from .http_cache import etag_matches, json_with_etag, not_modified, set_validators
+from .pagination import clamp_limit, keyset_page, set_next_cursor
+from ..models import Category, Challenge, Task, Achievement
 from ..schemas.category import CategoryResponse
-from ..schemas.log import LogCreate, LogResponse
-from ..schemas.stock import StockCreate, StockResponse
+from ..schemas.log import (
+    LogBatchCreate,
+    LogBatchResponse,
+    LogCreate,
+    LogEntry,
+    LogResponse,
+    LogSummaryResponse,
+)
+from ..schemas.stock import StockBatch, StockBatchCreateResponse, StockBatchDeleteResponse, StockCreate, StockResponse
 from ..schemas.challenge import ChallengeSummary
 from ..schemas.task_list import TaskListItem
-from ..schemas.task import TaskReplaceRequest
+from ..schemas.task import DailyTaskResponse, TaskReplaceRequest
 from ..schemas.my_task import MyTaskCreate, MyTaskUpdate, MyTaskResponse
+from ..schemas.transfer import ImportResponse
+from ..services import catalog, completions, daily_assignments, rollups, seeding, task_stats, transfer, watermarks
 
 
 router = APIRouter()
 
 
+def hot_route(path: str, **kwargs):
+    """GET route that ``async_routes`` serves instead when DB_ASYNC is on."""
+    def register(endpoint):
+        if DB_ASYNC:
+            return endpoint
+        return router.get(path, **kwargs)(endpoint)
+    return register
+
+
 def get_current_user_id(x_user_id: str = Header(..., alias="X-User-Id")) -> str:
     if not x_user_id or not x_user_id.strip():
         raise HTTPException(status_code=400, detail="X-User-Id header is required")
@@ -32,11 +57,37 @@ def healthz():
     return {"status": "ok"}
 
 
+@router.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Connection pool gauges, event counters and the acquire-wait histogram,
+    plus the health of each read replica."""
+    return {**pool_metrics.snapshot(engine), "replicas": replica_set.status()}
+
+
+@router.get("/metrics/completion-cache")
+def completion_cache_metrics(limit: int = 20):
+    """Completion bitmap cache counters and memory, with the ``limit`` largest
+    cached users (completed task count and bytes each)."""
+    return completions.cache.stats(max(0, limit))
+
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    """Per-route request counts, latency and response size histograms plus pool
+    and completion cache metrics, in the Prometheus text exposition format."""
+    body = (
+        request_metrics.render()
+        + request_metrics.render_pool(pool_metrics.snapshot(engine))
+        + request_metrics.render_completion_cache(completions.cache.stats(0))
+    )
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @router.post("/admin/init-data")
 def initialize_data(db: Session = Depends(get_db)):
     """Initialize categories/challenges from seed and mirror them into tasks as catalog items."""
     try:
-        from ..core.database import Base, engine
+        from ..core.database import Base
         Base.metadata.create_all(bind=engine)
 
         try:
@@ -44,56 +95,18 @@ def initialize_data(db: Session = Depends(get_db)):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to import seed tasks: {e}")
 
-        category_map = {c.name: c for c in db.query(Category).all()}
-        for t in tasks:
-            name = t.get("category")
-            if name and name not in category_map:
-                cat = Category(name=name)
-                db.add(cat)
-                db.flush()
-                category_map[name] = cat
-
-        # Seed challenges
-        for t in tasks:
-            cat = category_map.get(t.get("category"))
-            if not cat:
-                continue
-            exists = (
-                db.query(Challenge)
-                .filter(Challenge.category_id == cat.id, Challenge.title == t.get("title"))
-                .first()
-            )
-            if exists:
-                continue
-            db.add(
-                Challenge(
-                    category_id=cat.id,
-                    title=t.get("title"),
-                    description=t.get("description"),
-                    difficulty=int(t.get("difficulty") or 1),
-                )
-            )
+        report = seeding.seed_catalog(db.connection(), tasks)
+        task_changes = report.pop("task_changes")
         db.commit()
-
-        # Mirror to tasks as catalog entries if not already present
-        if db.query(Task).filter(Task.source == "catalog").count() == 0:
-            for ch in db.query(Challenge).all():
-                db.add(
-                    Task(
-                        title=ch.title,
-                        description=ch.description,
-                        difficulty=ch.difficulty,
-                        category_id=ch.category_id,
-                        source="catalog",
-                    )
-                )
-            db.commit()
+        if report["changed"]:
+            catalog.publish_catalog_change(*task_changes)
 
         return {
             "message": "Initialization done",
             "categories_total": db.query(Category).count(),
             "challenges_total": db.query(Challenge).count(),
             "tasks_total": db.query(Task).count(),
+            "report": report,
         }
     except HTTPException:
         raise
@@ -102,34 +115,42 @@ def initialize_data(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to initialize data: {e}")
 
 
-@router.get("/tasks/daily")
-def get_daily_task(force_refresh: bool = False, db: Session = Depends(get_db)):
-    t = (
-        db.query(Task)
-        .options(joinedload(Task.category))
-        .filter(Task.source == "catalog")
-        .order_by(func.random())
-        .first()
-    )
-    if t is None:
-        raise HTTPException(status_code=404, detail="No tasks found in the database.")
-    return {
-        "id": str(t.id),
-        "title": t.title,
-        "description": t.description,
-        "difficulty": t.difficulty,
-        "tags": [t.category.name] if t.category else [],
-        "stats": {"completion_rate": random.uniform(0.1, 0.8)},
-        "source": "catalog",
-    }
+@hot_route("/tasks/daily", response_model=DailyTaskResponse)
+@query_budget(5)
+def get_daily_task(
+    force_refresh: bool = False,
+    local_date: Optional[date] = Query(None, alias="date"),
+    db: Session = Depends(get_db),
+    x_user_id: Optional[str] = Header(None, alias="X-User-Id"),
+):
+    """The user's task for their local ``date`` (default: the server's),
+    assigned on the first read of the day and stored; ``force_refresh``
+    replaces it with a new random task. Without ``X-User-Id`` a random task
+    is returned and nothing is stored."""
+    day = queries.local_date(local_date)
+    snap = catalog.get_snapshot(db)
+    stats = task_stats.get_cache(db)
+    user_id = x_user_id.strip() if x_user_id else ""
+    if not user_id:
+        payload = catalog.pick_random(snap)
+    elif force_refresh:
+        payload = daily_assignments.refresh(db, snap, user_id, day)
+    else:
+        payload = daily_assignments.daily_task(db, snap, user_id, day)
+    return json_response(queries.daily_task_payload(payload, stats))
 
 
-@router.post("/tasks/daily/replace")
+@router.post("/tasks/daily/replace", response_model=DailyTaskResponse)
+@query_budget(3)
 def replace_daily_task(
     req: TaskReplaceRequest,
+    local_date: Optional[date] = Query(None, alias="date"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
+    """Make a catalog task or one of the user's own tasks their daily task
+    for ``date``; later reads that day return it."""
+    day = queries.local_date(local_date)
     target_task = None
     if getattr(req, "my_task_id", None) is not None:
         target_task = (
@@ -155,27 +176,35 @@ def replace_daily_task(
     else:
         raise HTTPException(status_code=400, detail="new_task_id or my_task_id required")
 
-    return {
-        "id": str(target_task.id),
-        "title": target_task.title,
-        "description": target_task.description,
-        "difficulty": target_task.difficulty,
-        "tags": [target_task.category.name] if target_task.category else (["My Task"] if target_task.source == "my" else []),
-        "stats": {"completion_rate": random.uniform(0.1, 0.8)},
-        "source": target_task.source,
-    }
+    payload = daily_assignments.task_payload(
+        target_task.id,
+        target_task.source,
+        target_task.title,
+        target_task.description,
+        target_task.difficulty,
+        target_task.category.name if target_task.category else None,
+    )
+    stats = task_stats.get_cache(db)
+    db.execute(daily_assignments.replace_statement(db.get_bind().dialect.name, user_id, day, target_task.id))
+    db.commit()
+    return json_response(queries.daily_task_payload(payload, stats))
 
 
 @router.post("/logs", response_model=LogResponse, status_code=201)
+@query_budget(6)
 def create_log(
     log: LogCreate,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    t = db.query(Task).filter(Task.id == log.task_id).first()
-    if not t:
+    """Record a log; its daily rollup and, on the user's first log of the
+    task (or first log at all), the completion counters are updated in the
+    same transaction."""
+    target = db.execute(task_stats.log_target_statement(user_id, log.task_id)).first()
+    if not target:
         raise HTTPException(status_code=404, detail="Task not found")
-    if t.source == "my" and t.owner_user_id != user_id:
+    source, owner_user_id, logged_task_before, logged_before = target
+    if source == "my" and owner_user_id != user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
     db_log = Achievement(
         user_id=user_id,
@@ -185,172 +214,330 @@ def create_log(
         achieved_at=log.achieved_at if log.achieved_at is not None else None,
     )
     db.add(db_log)
+    db.flush()
+    # The id is generated client-side; read it before commit expires the object.
+    log_id = db_log.id
+    dialect = db.get_bind().dialect.name
+    db.execute(rollups.increment_statement(dialect, [log_id]))
+    db.execute(watermarks.bump_logs_statement(dialect, user_id, [log_id]))
+    completed, active_users = {}, None
+    if source == "catalog" and not logged_task_before:
+        completed = dict(db.execute(task_stats.first_completion_statement(dialect, log.task_id)).all())
+    if not logged_before:
+        active_users = db.execute(task_stats.first_log_statement(dialect)).scalar_one()
     db.commit()
-    db.refresh(db_log)
-    return {"log_id": db_log.id, "message": "Successfully created."}
+    completions.record_completion(user_id, log.task_id)
+    task_stats.cache.update(completed, active_users)
+    return {"log_id": log_id, "message": "Successfully created."}
 
 
-@router.get("/logs")
+@router.post("/logs/batch", response_model=LogBatchResponse)
+@query_budget(6)
+def create_logs_batch(
+    batch: LogBatchCreate,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Offline sync: record up to ``MAX_BATCH_LOGS`` queued logs at once.
+
+    All referenced tasks are checked with one query, and the valid logs are
+    written with one multi-row insert and counted in the daily rollups and
+    the completion counters with one upsert each, in one transaction. Each
+    item carries a client-generated ``client_id``; the log id is derived from
+    it, so resending a batch after a lost response reports ``exists`` instead
+    of inserting again. Per-item status: ``created``, ``exists``,
+    ``not_found`` or ``forbidden``.
+    """
+    task_ids = {item.task_id for item in batch.logs}
+    tasks = {}
+    if task_ids:
+        tasks = {
+            task_id: (source, owner_user_id)
+            for task_id, source, owner_user_id in db.execute(queries.batch_tasks_statement(task_ids))
+        }
+    results, rows = queries.plan_log_batch(user_id, batch.logs, tasks)
+    inserted = set()
+    if rows:
+        dialect = db.get_bind().dialect.name
+        stmt = queries.insert_ignore(dialect, Achievement, "id").values(rows).returning(Achievement.id)
+        inserted = set(db.scalars(stmt))
+        completed, active_users = {}, None
+        if inserted:
+            db.execute(rollups.increment_statement(dialect, inserted))
+            db.execute(watermarks.bump_logs_statement(dialect, user_id, inserted))
+            completed = dict(db.execute(task_stats.batch_completions_statement(dialect, user_id, inserted)).all())
+            active_users = db.execute(task_stats.batch_first_log_statement(dialect, user_id, inserted)).scalar()
+        db.commit()
+        for row in rows:
+            if row["id"] in inserted:
+                completions.record_completion(user_id, row["task_id"])
+        task_stats.cache.update(completed, active_users)
+    for result in results:
+        if result["status"] is None:
+            # A client id repeated within the batch is created once.
+            created = result["log_id"] in inserted
+            inserted.discard(result["log_id"])
+            result["status"] = "created" if created else "exists"
+    return {"results": results}
+
+
+@hot_route("/logs", response_model=Dict[str, List[LogEntry]])
+@query_budget(4)
 def get_logs(
+    response: Response,
     month: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
 ):
-    query = db.query(Achievement).filter(Achievement.user_id == user_id)
-    if month:
-        try:
-            year, mon = map(int, month.split("-"))
-            start_date = datetime(year, mon, 1)
-            end_date = datetime(year, mon + 1, 1) if mon < 12 else datetime(year + 1, 1, 1)
-            query = query.filter(
-                Achievement.achieved_at >= start_date, Achievement.achieved_at < end_date
-            )
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM.")
-
-    logs = query.order_by(Achievement.achieved_at.desc()).all()
-
-    def to_dict(ach: Achievement):
-        t = (
-            db.query(Task)
-            .options(joinedload(Task.category))
-            .filter(Task.id == ach.task_id)
-            .first()
-        )
-        return {
-            "id": ach.id,
-            "user_id": ach.user_id,
-            "memo": ach.memo,
-            "feeling": ach.feeling,
-            "achieved_at": ach.achieved_at.isoformat(),
-            "challenge": {
-                "id": t.id,
-                "title": t.title,
-                "description": t.description,
-                "difficulty": t.difficulty,
-                "category": {"id": t.category.id, "name": t.category.name} if t.category else {"id": -1, "name": "My Task"},
-                "source": t.source,
-            },
-        }
+    """Logs grouped by local date, newest first.
+
+    Without ``limit`` every matching log is returned. With ``limit`` the page
+    holds at most that many logs and, when more remain, the ``X-Next-Cursor``
+    response header carries the cursor for the next page.
+
+    The ETag comes from the user's log watermarks, so a matching
+    ``If-None-Match`` gets a 304 without reading the logs.
+    """
+    limit = clamp_limit(limit)
+    marks = db.execute(watermarks.lookup_statement(user_id, queries.logs_watermarks(month))).all()
+    etag, last_modified = watermarks.validators(user_id, marks, catalog.get_snapshot(db).etag, month, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    rows = db.execute(queries.logs_statement(user_id, month, cursor, limit)).all()
+    return json_response(queries.group_logs(rows, limit, response), response)
+
+
+@hot_route("/logs/summary", response_model=LogSummaryResponse)
+@query_budget(1)
+def get_log_summary(
+    from_: date = Query(..., alias="from"),
+    to: date = Query(...),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Log counts per day from ``from`` to ``to`` (inclusive, at most
+    ``MAX_SUMMARY_DAYS``), by category and by feeling, read from the daily
+    rollups: one row per day, category and feeling rather than one per log."""
+    rows = db.execute(queries.log_summary_statement(user_id, from_, to)).all()
+    return json_response(queries.log_summary(rows))
+
 
-    grouped = defaultdict(list)
-    for l in logs:
-        date_str = l.achieved_at.strftime("%Y-%m-%d")
-        grouped[date_str].append(to_dict(l))
-    return grouped
-
-
-@router.get("/stock", response_model=List[TaskListItem])
-def get_stocked_tasks(db: Session = Depends(get_db), user_id: str = Depends(get_current_user_id)):
-    rows = (
-        db.query(Stock)
-        .options(joinedload(Stock.task).joinedload(Task.category))
-        .filter(Stock.user_id == user_id)
-        .order_by(Stock.created_at.desc())
-        .all()
+@router.get("/export")
+@query_budget(3)
+def export_history(
+    fmt: str = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """The user's "my" tasks, logs and stocks as NDJSON or CSV, streamed
+    from server-side cursors (see ``services/transfer.py``)."""
+    if fmt not in transfer.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(transfer.FORMATS)}")
+    return StreamingResponse(
+        transfer.export(db, user_id, fmt),
+        media_type=transfer.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="export.{fmt}"'},
     )
-    results = []
-    for s in rows:
-        t = s.task
-        results.append(
-            {
-                "id": t.id,
-                "title": t.title,
-                "tags": [t.category.name] if t.category else ["My Task"],
-                "description": t.description,
-                "difficulty": t.difficulty,
-                "source": t.source,
-            }
+
+
+@router.post("/import", response_model=ImportResponse)
+async def import_history(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Import a ``GET /export`` body into the user's history. The upload is
+    parsed as it arrives and written in chunks, each committed on its own;
+    records already imported are counted as ``exists``, so a failed upload
+    can be sent again. A malformed record stops the import with a 400."""
+    if fmt not in transfer.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(transfer.FORMATS)}")
+    stream = request.stream()
+
+    def body():
+        # Pulls the upload off the event loop one chunk at a time.
+        while True:
+            try:
+                yield anyio.from_thread.run(stream.__anext__)
+            except StopAsyncIteration:
+                return
+
+    try:
+        report = await anyio.to_thread.run_sync(
+            transfer.import_records, db, user_id, transfer.parse(body(), fmt)
         )
-    return results
+    except transfer.ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return asdict(report)
+
+
+@hot_route("/stock", response_model=List[TaskListItem])
+@query_budget(4)
+def get_stocked_tasks(
+    response: Response,
+    sort: str = "created",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Stocked tasks, newest first or by ``sort`` (``difficulty``, ``category``).
+    Paged and revalidated like ``GET /logs``."""
+    limit = clamp_limit(limit)
+    marks = db.execute(watermarks.lookup_statement(user_id, queries.STOCK_WATERMARKS)).all()
+    etag, last_modified = watermarks.validators(user_id, marks, catalog.get_snapshot(db).etag, sort, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    rows = db.execute(queries.stocked_tasks_statement(user_id, sort, cursor, limit)).all()
+    return json_response(queries.stocked_task_items(keyset_page(rows, sort, 2, limit, response)), response)
 
 
 @router.post("/stock", status_code=201)
+@query_budget(2)
 def create_stock(
     stock: StockCreate,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    task_id_int = stock.task_id
-    t = db.query(Task).filter(Task.id == task_id_int).first()
+    dialect = db.get_bind().dialect.name
+    created = db.execute(queries.stock_insert_statement(dialect, user_id, [stock.task_id])).first()
+    if created:
+        db.execute(watermarks.bump_statement(dialect, user_id, [watermarks.STOCK]))
+    db.commit()
+    if created:
+        return {"status": "created", "id": created[0]}
+    # Nothing inserted: find out why, off the hot path.
+    t = db.execute(queries.stock_task_statement(stock.task_id)).first()
     if not t:
         raise HTTPException(status_code=404, detail="Task not found")
     if t.source == "my" and t.owner_user_id != user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
-    existing = db.query(Stock).filter(Stock.user_id == user_id, Stock.task_id == task_id_int).first()
-    if existing:
-        return {"status": "exists"}
-    item = Stock(user_id=user_id, task_id=task_id_int)
-    db.add(item)
-    db.commit()
-    db.refresh(item)
-    return {"status": "created", "id": item.id}
+    return {"status": "exists"}
+
+
+@router.post("/stock/batch", response_model=StockBatchCreateResponse)
+@query_budget(2)
+def create_stocks_batch(
+    batch: StockBatch,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Stock up to ``MAX_BATCH_STOCKS`` tasks with one statement. Ids that are
+    already stocked, missing or another user's "my" task are ``skipped``."""
+    task_ids = list(dict.fromkeys(batch.task_ids))
+    created = set()
+    if task_ids:
+        dialect = db.get_bind().dialect.name
+        created = {task_id for _, task_id in db.execute(queries.stock_insert_statement(dialect, user_id, task_ids))}
+        if created:
+            db.execute(watermarks.bump_statement(dialect, user_id, [watermarks.STOCK]))
+        db.commit()
+    return {
+        "created": [i for i in task_ids if i in created],
+        "skipped": [i for i in task_ids if i not in created],
+    }
+
+
+@router.post("/stock/batch/delete", response_model=StockBatchDeleteResponse)
+@query_budget(2)
+def delete_stocks_batch(
+    batch: StockBatch,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Unstock up to ``MAX_BATCH_STOCKS`` tasks with one statement."""
+    task_ids = list(dict.fromkeys(batch.task_ids))
+    deleted = set()
+    if task_ids:
+        deleted = set(db.scalars(queries.stock_delete_statement(user_id, task_ids)))
+        if deleted:
+            db.execute(watermarks.bump_statement(db.get_bind().dialect.name, user_id, [watermarks.STOCK]))
+        db.commit()
+    return {
+        "deleted": [i for i in task_ids if i in deleted],
+        "skipped": [i for i in task_ids if i not in deleted],
+    }
 
 
 @router.delete("/stock/by-task/{task_id}", status_code=204)
+@query_budget(2)
 def delete_stock_by_task_id(
     task_id: int, db: Session = Depends(get_db), user_id: str = Depends(get_current_user_id)
 ):
-    stock_item = db.query(Stock).filter(Stock.user_id == user_id, Stock.task_id == task_id).first()
-    if stock_item:
-        db.delete(stock_item)
-        db.commit()
+    if db.execute(queries.stock_delete_statement(user_id, [task_id])).first():
+        db.execute(watermarks.bump_statement(db.get_bind().dialect.name, user_id, [watermarks.STOCK]))
+    db.commit()
     return Response(status_code=204)
 
 
-@router.get("/challenges/search", response_model=List[ChallengeSummary])
+@hot_route("/challenges/search", response_model=List[ChallengeSummary])
+@query_budget(3)
 def search_challenges(
     q: Optional[str] = None,
     category_id: Optional[int] = None,
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
 ):
-    query = db.query(Task).options(joinedload(Task.category)).filter(Task.source == "catalog")
-    if q:
-        query = query.filter(Task.title.ilike(f"%{q}%"))
-    if category_id:
-        query = query.filter(Task.category_id == category_id)
-    tasks = query.all()
-    user_ach = db.query(Achievement.task_id).filter(Achievement.user_id == user_id).all()
-    completed_ids = {row.task_id for row in user_ach}
-    results = []
-    for t in tasks:
-        results.append(
-            {
-                "id": t.id,
-                "title": t.title,
-                "tags": [t.category.name] if t.category else [],
-                "description": t.description,
-                "difficulty": t.difficulty,
-                "is_completed": t.id in completed_ids,
-            }
-        )
-    return results
+    """Catalog search, by relevance or by ``sort`` (``difficulty``,
+    ``category``). Paged like ``GET /logs`` when ``limit`` is given."""
+    limit = clamp_limit(limit)
+    snap = catalog.get_snapshot(db)
+    completed_ids = completions.completed_ids(db, user_id)
+    body, next_cursor = queries.search_body(snap, q, category_id, completed_ids, sort, cursor, limit)
+    response = json_with_etag(body, catalog.make_etag(body), if_none_match)
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
-    return db.query(Category).order_by(Category.name).all()
+@query_budget(2)
+def get_categories(
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    snap = catalog.get_snapshot(db)
+    return json_with_etag(
+        snap.categories_body, snap.categories_etag, if_none_match, snap.categories_encoded, accept_encoding
+    )
 
 
 @router.get("/my_tasks", response_model=List[MyTaskResponse])
+@query_budget(2)
 def list_my_tasks(
+    response: Response,
+    sort: str = "created",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
 ):
-    tasks = (
-        db.query(Task)
-        .filter(Task.source == "my", Task.owner_user_id == user_id)
-        .order_by(Task.created_at.desc())
-        .all()
-    )
-    return [
-        MyTaskResponse(id=t.id, title=t.title, description=t.description, created_at=t.created_at)
-        for t in tasks
-    ]
+    """The user's own tasks, newest first. Paged and revalidated like
+    ``GET /logs``."""
+    limit = clamp_limit(limit)
+    marks = db.execute(watermarks.lookup_statement(user_id, [watermarks.MY_TASKS])).all()
+    etag, last_modified = watermarks.validators(user_id, marks, sort, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    rows = db.execute(queries.my_tasks_statement(user_id, sort, cursor, limit)).all()
+    return json_response(queries.my_task_items(keyset_page(rows, sort, 2, limit, response)), response)
 
 
 @router.post("/my_tasks", response_model=MyTaskResponse, status_code=201)
+@query_budget(3)
 def create_my_task(
     payload: MyTaskCreate,
     db: Session = Depends(get_db),
@@ -363,6 +550,7 @@ def create_my_task(
         owner_user_id=user_id,
     )
     db.add(task)
+    db.execute(watermarks.bump_statement(db.get_bind().dialect.name, user_id, [watermarks.MY_TASKS]))
     db.commit()
     db.refresh(task)
     return MyTaskResponse(
@@ -371,6 +559,7 @@ def create_my_task(
 
 
 @router.put("/my_tasks/{task_id}", response_model=MyTaskResponse)
+@query_budget(4)
 def update_my_task(
     task_id: int,
     payload: MyTaskUpdate,
@@ -388,6 +577,7 @@ def update_my_task(
         task.title = payload.title
     if payload.description is not None:
         task.description = payload.description
+    db.execute(watermarks.bump_statement(db.get_bind().dialect.name, user_id, [watermarks.MY_TASKS]))
     db.commit()
     db.refresh(task)
     return MyTaskResponse(
@@ -396,6 +586,7 @@ def update_my_task(
 
 
 @router.delete("/my_tasks/{task_id}", status_code=204)
+@query_budget(3)
 def delete_my_task(
     task_id: int,
     db: Session = Depends(get_db),
@@ -408,5 +599,6 @@ def delete_my_task(
     )
     if task:
         db.delete(task)
+        db.execute(watermarks.bump_statement(db.get_bind().dialect.name, user_id, [watermarks.MY_TASKS]))
         db.commit()
     return Response(status_code=204)
@@ -0,0 +1,194 @@
+"""Response compression: gzip, and brotli when the ``brotli`` package is installed.
+
+``CompressionMiddleware`` picks an encoding from the request's
+``Accept-Encoding`` (brotli first on a tie) and compresses JSON, NDJSON and
+text bodies of at least ``COMPRESSION_MIN_BYTES``; smaller ones are not worth
+the CPU or the header bytes. A body sent in one piece is compressed in one
+call, in a worker thread once it is large enough to hold up the event loop.
+A streamed body (``GET /export``) is compressed chunk by chunk, each chunk
+flushed so the client can decode as it downloads.
+
+Responses that already carry a ``Content-Encoding`` pass through untouched.
+That is how precompressed bodies are served: ``precompress`` encodes a body
+once at maximum quality (the catalog snapshot does this for ``/categories``
+once per catalog version) and the route sends the negotiated variant itself
+(``http_cache.json_with_etag``).
+
+A compressed body is a different representation from the identity one, so
+its strong ETag is sent weak (``W/"..."``), as nginx does. ``If-None-Match``
+uses weak comparison, so revalidating with it still gets a 304.
+"""
+
+import gzip
+from typing import Dict, Iterable, Optional
+import zlib
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_BYTES
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+
+# In order of preference.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Bodies at least this large are compressed off the event loop (zlib and
+# brotli release the GIL while they work).
+_THREAD_MIN_BYTES = 256 * 1024
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """The encoding of ``available`` with the highest q-value in
+    ``accept_encoding``, earlier ones winning ties; None for identity."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """``body`` in ``encoding``; ``best`` trades CPU for size, for bodies
+    that are compressed once and served many times."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Every supported encoding of ``body``, or nothing when it is below
+    ``COMPRESSION_MIN_BYTES``. Maximum quality is not always smallest on
+    short bodies (brotli 11), so the smaller of it and the default is kept."""
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return {}
+    return {
+        encoding: min(compress(body, encoding, best=True), compress(body, encoding), key=len)
+        for encoding in ENCODINGS
+    }
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits 31: gzip container.
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _compressible(status: int, headers: Headers) -> bool:
+    if status < 200 or status in (204, 304) or "content-encoding" in headers:
+        return False
+    return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+def _mark_encoded(headers: MutableHeaders, encoding: str) -> None:
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+def _match_weak_etag(headers: MutableHeaders, if_none_match: Optional[str]) -> None:
+    # A 304 is not compressed itself; when the client revalidates a
+    # compressed copy, send back the weak ETag that copy came with.
+    etag = headers.get("etag")
+    if etag and if_none_match and not etag.startswith("W/") and "W/" + etag in if_none_match:
+        headers["ETag"] = "W/" + etag
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows whether
+                # the response is worth compressing.
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                data = compressor.chunk(body) if body else b""
+                if not more_body:
+                    data += compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            if start["status"] == 304:
+                _match_weak_etag(headers, request_headers.get("if-none-match"))
+            if not _compressible(start["status"], headers) or (not more_body and len(body) < self.minimum_size):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            _mark_encoded(headers, encoding)
+            if more_body:
+                del headers["content-length"]
+                compressor = _StreamCompressor(encoding)
+                await send(start)
+                await send({"type": "http.response.body", "body": compressor.chunk(body), "more_body": True})
+                return
+            if len(body) >= _THREAD_MIN_BYTES:
+                body = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
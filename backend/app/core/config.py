@@ -1,4 +1,5 @@
 import os
+from typing import List
 
 
 # Read database URL from env with a sensible default for docker-compose
@@ -7,3 +8,69 @@ DATABASE_URL: str = os.getenv(
     "postgresql://myuser:mypassword@db:5432/mydatabase",
 )
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# Connection pool (QueuePool). Sync routes run in the anyio threadpool (40
+# threads by default), so size + overflow bounds how many can hold a
+# connection at once; the rest wait up to DB_POOL_TIMEOUT seconds.
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections older than this many seconds (-1 disables); managed
+# Postgres and proxies drop idle connections.
+DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING: bool = _env_bool("DB_POOL_PRE_PING", True)
+
+# Read replicas (core/replicas.py): comma-separated URLs of read-only copies
+# of DATABASE_URL. GET requests read from them, round robin, except for a
+# user who wrote within the last DB_READ_YOUR_WRITES_SECONDS; a replica that
+# cannot be reached is skipped for DB_REPLICA_RETRY_SECONDS. Empty: every
+# request uses DATABASE_URL.
+DATABASE_READ_URLS: List[str] = [
+    url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()
+]
+DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+DB_REPLICA_RETRY_SECONDS: float = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# Serve the hot read endpoints (/tasks/daily, /logs, /stock, /challenges/search)
+# with async handlers on an async engine (asyncpg; aiosqlite for local SQLite).
+DB_ASYNC: bool = _env_bool("DB_ASYNC", False)
+
+# What to do when a request runs more SQL statements than its route's
+# @query_budget: "warn" (log), "raise" (fail; use in tests) or "off".
+QUERY_BUDGET_MODE: str = os.getenv("QUERY_BUDGET_MODE", "warn").strip().lower()
+
+# Upper bound on how long an in-process catalog snapshot is trusted before it is
+# reloaded, so seeds written by another process (e.g. scripts/load_data.py) or
+# another worker are eventually picked up. Local ORM writes invalidate at once.
+CATALOG_CACHE_TTL_SECONDS: float = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+
+# Per-user completed task id bitmaps for /challenges/search: at most this many
+# users are cached (least recently used evicted first). Entries are reloaded
+# after the TTL so logs written through another worker are picked up.
+COMPLETION_CACHE_MAX_USERS: int = int(os.getenv("COMPLETION_CACHE_MAX_USERS", "10000"))
+COMPLETION_CACHE_TTL_SECONDS: float = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "60"))
+
+# Per-task completion counters behind the daily task "stats" are cached
+# in-process and reloaded after this many seconds, so counts written through
+# other workers (or fixed by scripts/reconcile_task_stats.py) show up.
+TASK_STATS_CACHE_TTL_SECONDS: float = float(os.getenv("TASK_STATS_CACHE_TTL_SECONDS", "60"))
+
+# Candidates kept per user by the recommender batch job
+# (scripts/build_recommendations.py); the daily pick samples among them.
+RECOMMENDATION_TOP_K: int = int(os.getenv("RECOMMENDATION_TOP_K", "20"))
+
+# Response compression (core/compression.py): bodies smaller than this many
+# bytes are sent as they are. Levels are for per-request compression;
+# precompressed catalog bodies always use the maximum.
+COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# "eager" (default) prepares the database in the startup event. "lazy" starts
+# serving immediately and prepares it on the first request that needs the DB,
+# so health checks answer right after a cold start (Render free plan spin-up).
+STARTUP_MODE: str = os.getenv("STARTUP_MODE", "eager").strip().lower()
@@ -1,18 +1,172 @@
-from sqlalchemy import create_engine
+"""Engines and sessions: the primary (``DATABASE_URL``) and optional read
+replicas (``DATABASE_READ_URLS``).
+
+Sessions are ``RoutingSession``s. ``get_db`` and ``get_async_db`` mark the
+session of a GET or HEAD request as a reader, unless its user is pinned to
+the primary after a write (see ``core/replicas.py``). A reader's statements
+run on a replica connection taken at its first statement. Its writes, and
+every statement after the first write, run on the primary. With no healthy
+replica it stays on the primary. Other sessions, including those of scripts
+and startup, only use the primary.
+"""
+
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncIterator, Optional
+
+import anyio
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from starlette.requests import Request
+
+from .config import (
+    DATABASE_READ_URLS,
+    DATABASE_URL,
+    DB_ASYNC,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+from . import pool_metrics, query_stats, replicas
+
+
+def _engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a per-thread singleton pool; sizing does not apply.
+        return {}
+    return {
+        "poolclass": pool_metrics.InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    """Map a sync URL (postgresql://, sqlite://) to its async-driver equivalent."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r}")
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _async_engine(url: str):
+    options = _engine_options(url)
+    # asyncio engines wrap the pool themselves; keep the sizing, drop the class.
+    options.pop("poolclass", None)
+    return create_async_engine(async_url(url), **options)
+
 
-from .config import DATABASE_URL
+class RoutingSession(Session):
+    """A Session that reads from a replica when ``info["read_replica"]`` is set."""
 
+    def __init__(self, *args, replica_set: Optional[replicas.ReplicaSet] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.replica_set = replica_set
+        self._replica: Optional[Connection] = None
+        self._replica_tried = False
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            # The primary from here on, so later reads see this write.
+            self.info["wrote"] = True
+        elif self.replica_set and self.info.get("read_replica") and not self.info.get("wrote"):
+            if not self._replica_tried:
+                self._replica_tried = True
+                self._replica = self.replica_set.connect()
+            if self._replica is not None:
+                return self._replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def close(self) -> None:
+        super().close()
+        if self._replica is not None:
+            self._replica.close()
+        self._replica, self._replica_tried = None, False
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_writer(session: RoutingSession) -> None:
+    user_id = session.info.get("user_id")
+    if session.replica_set and user_id and (session.info.get("wrote") or not session.info.get("read_replica")):
+        replicas.pin(user_id)
+
+
+def _route(session, request: Request) -> None:
+    user_id = request.headers.get("x-user-id", "").strip()
+    session.info["user_id"] = user_id
+    session.info["read_replica"] = request.method in ("GET", "HEAD") and not (user_id and replicas.pinned(user_id))
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+pool_metrics.instrument(engine)
+query_stats.instrument(engine)
+read_engines = [create_engine(url, **_engine_options(url)) for url in DATABASE_READ_URLS]
+for _read_engine in read_engines:
+    query_stats.instrument(_read_engine)
+replica_set = replicas.ReplicaSet(read_engines)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replica_set=replica_set
+)
 Base = declarative_base()
 
+async_engine = None
+async_replica_set = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    async_engine = _async_engine(DATABASE_URL)
+    query_stats.instrument(async_engine.sync_engine)
+    async_read_engines = [_async_engine(url) for url in DATABASE_READ_URLS]
+    for _read_engine in async_read_engines:
+        query_stats.instrument(_read_engine.sync_engine)
+    async_replica_set = replicas.ReplicaSet([e.sync_engine for e in async_read_engines])
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        replica_set=async_replica_set,
+    )
+
+
+# Sessions handed out by get_db at once; None when the pool is unbounded.
+_session_slots = (
+    asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW) if _engine_options(DATABASE_URL) else None
+)
 
-def get_db() -> Session:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
+async def get_db(request: Request) -> AsyncIterator[Session]:
+    # Sync handlers run in the threadpool, and their session is closed only
+    # after the response is serialized, which for a response_model needs a
+    # threadpool thread too. If more requests than the pool holds reach a
+    # thread, the extra ones block there waiting for a connection, every
+    # thread ends up blocked, and the connections are never returned. Waiting
+    # for a slot here, on the event loop, keeps that queue off the threadpool.
+    async with _session_slots or nullcontext():
+        db = SessionLocal()
+        _route(db, request)
+        try:
+            yield db
+        finally:
+            # Closing rolls back and returns the connection, a round trip that
+            # must not block the event loop; shielded so a cancelled request
+            # still returns it.
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(db.close)
+
+
+async def get_async_db(request: Request) -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        _route(db, request)
+        yield db
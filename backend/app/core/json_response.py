@@ -0,0 +1,57 @@
+"""JSON responses serialized straight to bytes.
+
+When an endpoint returns plain data, FastAPI validates it against the
+route's ``response_model`` (building a Pydantic model per item) and then
+serializes it; without a model it runs ``jsonable_encoder`` and stdlib
+``json``. For list endpoints that is most of the CPU spent per request. The
+hot routes instead shape their SQL result tuples into dicts and return a
+``FastJSONResponse``, which FastAPI passes through untouched. Their
+``response_model`` still documents the shape in OpenAPI; keeping the dicts in
+that shape is the route's job.
+
+orjson is used when installed (it handles ``datetime`` natively); otherwise
+the stdlib produces the same JSON more slowly.
+"""
+
+from datetime import date, datetime
+import json
+from typing import Any, Optional
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON, non-ASCII characters unescaped."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """A ``FastJSONResponse`` carrying the headers set on the injected
+    ``response`` parameter, which FastAPI drops when an endpoint returns its
+    own response object."""
+    result = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
@@ -0,0 +1,114 @@
+"""Connection pool instrumentation.
+
+Checkout/checkin/connect/invalidate counts come from SQLAlchemy pool events.
+Acquire latency and pool timeouts are recorded by ``InstrumentedQueuePool``,
+which times ``Pool.connect()`` (the wait for a free connection plus pre-ping),
+since pool events only fire once a connection has been handed out.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+# Upper bounds in milliseconds; the last bucket is +Inf.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    def __init__(self, buckets=WAIT_BUCKETS_MS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total, out = 0, []
+        for c in self.counts:
+            total += c
+            out.append(total)
+        return out
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.wait_ms = Histogram()
+        self.counters: Dict[str, int] = {
+            "checkouts": 0,
+            "checkins": 0,
+            "connects": 0,
+            "invalidations": 0,
+            "timeouts": 0,
+        }
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def observe_wait(self, ms: float, timed_out: bool) -> None:
+        with self._lock:
+            self.wait_ms.observe(ms)
+            if timed_out:
+                self.counters["timeouts"] += 1
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_stats.observe_wait((time.perf_counter() - start) * 1000, timed_out)
+
+
+def instrument(engine: Engine) -> None:
+    event.listen(engine, "checkout", lambda *a: pool_stats.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *a: pool_stats.incr("checkins"))
+    event.listen(engine, "connect", lambda *a: pool_stats.incr("connects"))
+    event.listen(engine, "invalidate", lambda *a: pool_stats.incr("invalidations"))
+
+
+def snapshot(engine: Engine) -> dict:
+    pool = engine.pool
+    gauges = {}
+    if isinstance(pool, QueuePool):
+        gauges = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        }
+    with pool_stats._lock:
+        hist = pool_stats.wait_ms
+        return {
+            "pool": type(pool).__name__,
+            **gauges,
+            **pool_stats.counters,
+            "wait_ms": {
+                "buckets": [*hist.buckets, "+Inf"],
+                "cumulative_counts": hist.cumulative(),
+                "sum": round(hist.sum, 3),
+                "count": hist.count,
+            },
+        }
@@ -0,0 +1,124 @@
+"""Per-request SQL statement counts, DB time and query budgets.
+
+``instrument(engine)`` hooks ``before_cursor_execute``/``after_cursor_execute``
+and adds every statement to the ``RequestQueryStats`` of the request that
+issued it. The stats object lives in a context variable set by
+``QueryStatsMiddleware``; anyio copies the context into threadpool workers and
+SQLAlchemy's asyncio layer into its greenlets, so sync and async handlers are
+both covered. Statements issued outside a request (startup, scripts) are not
+tracked.
+
+The middleware reports the totals in a ``Server-Timing`` header
+(``db;dur=<ms>;desc="<n> statements"``), which browser dev tools and curl -v
+show next to the response. The header is written when the response starts, so
+statements run by dependency teardown after that are checked against the
+budget but are not in the header.
+
+An endpoint declares its budget with ``@query_budget(n)``. When a request runs
+more than ``n`` statements, ``QUERY_BUDGET_MODE`` decides what happens: ``warn``
+(default) logs it, ``raise`` raises ``QueryBudgetExceeded`` so the test client
+fails the test, ``off`` skips the check.
+"""
+
+from contextvars import ContextVar
+import logging
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import QUERY_BUDGET_MODE
+
+
+logger = logging.getLogger("uvicorn.error")
+
+SERVER_TIMING_HEADER = b"server-timing"
+_BUDGET_ATTR = "query_budget"
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestQueryStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} statements"'
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - conn.info["query_start"]
+
+
+def instrument(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def query_budget(max_statements: int) -> Callable:
+    """Declare the most SQL statements one request to this endpoint may run."""
+    def mark(endpoint):
+        setattr(endpoint, _BUDGET_ATTR, max_statements)
+        return endpoint
+    return mark
+
+
+def check_budget(scope, stats: RequestQueryStats) -> None:
+    route = scope.get("route")
+    budget = getattr(getattr(route, "endpoint", None), _BUDGET_ATTR, None)
+    if budget is None or stats.statements <= budget:
+        return
+    message = (
+        f"{scope['method']} {route.path} ran {stats.statements} SQL statements"
+        f" (budget {budget})"
+    )
+    if QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning("Query budget exceeded: %s", message)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers: List = list(message.get("headers", []))
+                headers.append((SERVER_TIMING_HEADER, stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+        if QUERY_BUDGET_MODE != "off":
+            check_budget(scope, stats)
@@ -0,0 +1,116 @@
+"""Read replicas: health tracking and read-your-writes pins.
+
+``core/database.py`` creates one engine per ``DATABASE_READ_URLS`` entry and
+hands them to a ``ReplicaSet``. Sessions of GET requests take their
+connection from ``ReplicaSet.connect``. It picks the replicas round robin,
+skipping any marked down, and returns None when none is reachable, so the
+session stays on the primary. A replica is marked down for
+``DB_REPLICA_RETRY_SECONDS`` when connecting to it fails, or when a
+statement on it fails with a disconnect. The first request after that
+window tries it again.
+
+A replica applies the primary's changes with a delay, so a user who has just
+written could read their old state from it. Every commit by a user's
+session pins that user to the primary for ``DB_READ_YOUR_WRITES_SECONDS``.
+Pins live in the process, like the other caches; with several workers, a
+read served by another worker is not pinned.
+"""
+
+from itertools import count
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from .config import DB_READ_YOUR_WRITES_SECONDS, DB_REPLICA_RETRY_SECONDS
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# Expired pins are dropped once this many accumulate.
+_MAX_PINS = 10_000
+
+
+class Replica:
+    __slots__ = ("engine", "down_until", "failures")
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.down_until = 0.0
+        self.failures = 0
+
+
+class ReplicaSet:
+    def __init__(self, engines: List[Engine]) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        self._next = count()
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def _on_error(self, replica: Replica):
+        def handle_error(context) -> None:
+            if context.is_disconnect:
+                self.mark_down(replica, context.original_exception)
+        return handle_error
+
+    def mark_down(self, replica: Replica, exc: BaseException) -> None:
+        replica.down_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+        replica.failures += 1
+        logger.warning(
+            "Read replica %s unavailable, reading from the primary for %ss: %s",
+            replica.engine.url.render_as_string(hide_password=True),
+            DB_REPLICA_RETRY_SECONDS,
+            exc,
+        )
+
+    def connect(self) -> Optional[Connection]:
+        """A connection to the next healthy replica, or None to use the primary."""
+        now = time.monotonic()
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.down_until > now:
+                continue
+            try:
+                return replica.engine.connect()
+            # Async drivers raise their own errors when connecting (asyncpg's
+            # InvalidCatalogNameError, OSError), not a DBAPIError.
+            except Exception as exc:
+                self.mark_down(replica, exc)
+        return None
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.down_until <= now,
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        ]
+
+
+_pins: Dict[str, float] = {}
+_pins_lock = threading.Lock()
+
+
+def pin(user_id: str) -> None:
+    """Send ``user_id``'s reads to the primary for the next
+    ``DB_READ_YOUR_WRITES_SECONDS``."""
+    now = time.monotonic()
+    with _pins_lock:
+        _pins[user_id] = now + DB_READ_YOUR_WRITES_SECONDS
+        if len(_pins) > _MAX_PINS:
+            for expired in [u for u, until in _pins.items() if until <= now]:
+                del _pins[expired]
+
+
+def pinned(user_id: str) -> bool:
+    return _pins.get(user_id, 0.0) > time.monotonic()
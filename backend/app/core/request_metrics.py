@@ -0,0 +1,156 @@
+"""Per-route request metrics, exposed in the Prometheus text format.
+
+``RequestMetricsMiddleware`` records a request count, a latency histogram and
+a response-size histogram for every (method, route template, status). The
+label is the matched route's path template (``/stock/by-task/{task_id}``), not
+the raw URL, so the number of series is bounded by the route table; requests
+that match no route share the ``<unmatched>`` label.
+
+Observations happen on the event loop thread once the response has been
+sent, so the series are plain lists updated without locking, and ``/metrics``
+(an async handler, on the same thread) renders a consistent copy. Counters are
+per worker process; with several uvicorn workers each one reports its own
+series, which Prometheus sums with ``sum by (route)``.
+"""
+
+import time
+from typing import Dict, List, Tuple
+
+from .pool_metrics import Histogram
+
+
+# Upper bounds; the last bucket is +Inf.
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _Series:
+    __slots__ = ("latency", "size")
+
+    def __init__(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.size = Histogram(SIZE_BUCKETS_BYTES)
+
+
+# (method, route template, status) -> series
+_series: Dict[Tuple[str, str, str], _Series] = {}
+
+
+def observe(method: str, route: str, status: int, seconds: float, size: int) -> None:
+    key = (method, route, str(status))
+    series = _series.get(key)
+    if series is None:
+        series = _series[key] = _Series()
+    series.latency.observe(seconds)
+    series.size.observe(size)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task/stream overhead)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            observe(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start,
+                size,
+            )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+
+
+def _format_bound(bound) -> str:
+    return "+Inf" if bound == "+Inf" else repr(float(bound))
+
+
+def histogram_lines(name: str, labels: list, hist: Histogram) -> List[str]:
+    lines = []
+    for bound, count in zip([*hist.buckets, "+Inf"], hist.cumulative()):
+        lines.append(f"{name}_bucket{{{_labels([*labels, ('le', _format_bound(bound))])}}} {count}")
+    lines.append(f"{name}_sum{{{_labels(labels)}}} {hist.sum!r}")
+    lines.append(f"{name}_count{{{_labels(labels)}}} {hist.count}")
+    return lines
+
+
+def render() -> str:
+    requests = [
+        "# HELP http_requests_total Requests served, by route template and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    latency = [
+        "# HELP http_request_duration_seconds Time from receiving the request to sending the last body byte.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    size = [
+        "# HELP http_response_size_bytes Response body size.",
+        "# TYPE http_response_size_bytes histogram",
+    ]
+    for (method, route, status), series in sorted(_series.items()):
+        labels = [("method", method), ("route", route), ("status", status)]
+        requests.append(f"http_requests_total{{{_labels(labels)}}} {series.latency.count}")
+        latency.extend(histogram_lines("http_request_duration_seconds", labels, series.latency))
+        size.extend(histogram_lines("http_response_size_bytes", labels, series.size))
+    return "\n".join(requests + latency + size) + "\n"
+
+
+def render_pool(snapshot: dict) -> str:
+    """Prometheus lines for a ``pool_metrics.snapshot()`` dict."""
+    lines = []
+    for gauge in ("size", "checked_out", "checked_in", "overflow"):
+        if gauge in snapshot:
+            lines.append(f"# TYPE db_pool_{gauge} gauge")
+            lines.append(f"db_pool_{gauge} {snapshot[gauge]}")
+    for counter in ("checkouts", "checkins", "connects", "invalidations", "timeouts"):
+        lines.append(f"# TYPE db_pool_{counter}_total counter")
+        lines.append(f"db_pool_{counter}_total {snapshot[counter]}")
+    wait = snapshot["wait_ms"]
+    lines.append("# TYPE db_pool_wait_seconds histogram")
+    for bound, count in zip(wait["buckets"], wait["cumulative_counts"]):
+        le = "+Inf" if bound == "+Inf" else repr(bound / 1000)
+        lines.append(f'db_pool_wait_seconds_bucket{{le="{le}"}} {count}')
+    lines.append(f"db_pool_wait_seconds_sum {wait['sum'] / 1000!r}")
+    lines.append(f"db_pool_wait_seconds_count {wait['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_completion_cache(stats: dict) -> str:
+    """Prometheus lines for a ``completions.cache.stats()`` dict."""
+    lines = []
+    for gauge, key in (("users", "users"), ("max_users", "max_users"), ("bytes", "total_bytes")):
+        lines.append(f"# TYPE completion_cache_{gauge} gauge")
+        lines.append(f"completion_cache_{gauge} {stats[key]}")
+    for counter in ("hits", "misses", "evictions"):
+        lines.append(f"# TYPE completion_cache_{counter}_total counter")
+        lines.append(f"completion_cache_{counter}_total {stats[counter]}")
+    return "\n".join(lines) + "\n"
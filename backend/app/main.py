@@ -1,34 +1,39 @@
 from fastapi import FastAPI
 
 from .api.routes import router as api_router
-from .core.database import Base, engine
+from .core.compression import CompressionMiddleware
+from .core.config import DB_ASYNC, STARTUP_MODE
+from .core.database import engine
+from .core.query_stats import QueryStatsMiddleware
+from .core.request_metrics import RequestMetricsMiddleware
 from . import models  # noqa: F401  # ensure models are imported
-from .models import Challenge, Task
-from sqlalchemy.orm import Session
+from .startup import DeferredBootstrapMiddleware, bootstrap
 
 
 app = FastAPI()
 
 
-@app.on_event("startup")
-def on_startup() -> None:
-    # Create tables if they don't exist (useful for first deploys)
-    Base.metadata.create_all(bind=engine)
-    # Ensure catalog tasks are mirrored from challenges if tasks are empty
-    with Session(bind=engine) as db:
-        if db.query(Task).count() == 0:
-            for ch in db.query(Challenge).all():
-                db.add(
-                    Task(
-                        title=ch.title,
-                        description=ch.description,
-                        difficulty=ch.difficulty,
-                        category_id=ch.category_id,
-                        source="catalog",
-                    )
-                )
-            db.commit()
+if STARTUP_MODE == "lazy":
+    # Serve /healthz immediately; prepare the DB on the first real request.
+    app.add_middleware(DeferredBootstrapMiddleware, engine=engine)
+else:
+    @app.on_event("startup")
+    def on_startup() -> None:
+        # Create tables (when the schema changed), mirror catalog tasks and
+        # warm in-process caches before serving.
+        bootstrap(engine)
+
+
+# Innermost, so the request metrics record the bytes actually sent.
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+# Outermost, so the recorded latency covers every other middleware.
+app.add_middleware(RequestMetricsMiddleware)
 
 
 # Include API routes
 app.include_router(api_router)
+if DB_ASYNC:
+    from .api.async_routes import router as async_api_router
+
+    app.include_router(async_api_router)
@@ -0,0 +1,83 @@
+"""Versioned schema migrations.
+
+``create_all`` only creates missing tables; it never adds an index or
+constraint to a table that already exists. Changes to existing tables are
+therefore written as migrations: modules in this package named
+``v<NNNN>_<slug>.py`` that define ``upgrade(conn)``. They are applied in
+version order, each in its own transaction together with the bump of
+``schema_version`` in ``app_meta``, so a failed migration leaves the database
+at the previous version.
+
+Models declare the end state as well, so a fresh database gets it from
+``create_all`` and its migrations must be idempotent (``IF NOT EXISTS``).
+``startup.ensure_schema`` runs ``create_all`` and then ``migrate``; both are
+skipped while the stored schema fingerprint, which includes ``head()``,
+matches. ``python -m scripts.migrate`` runs them on their own.
+"""
+
+import importlib
+import pkgutil
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import AppMeta
+
+
+SCHEMA_VERSION_KEY = "schema_version"
+# Arbitrary constant: pg_advisory_xact_lock key that serializes concurrent workers.
+_PG_LOCK_KEY = 72_019_012
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def discover() -> List[Migration]:
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        prefix, _, slug = info.name.partition("_")
+        if not (prefix.startswith("v") and prefix[1:].isdigit()):
+            continue
+        module = importlib.import_module(f"{__name__}.{info.name}")
+        migrations.append(Migration(int(prefix[1:]), slug, module.upgrade))
+    migrations.sort()
+    return migrations
+
+
+def head() -> int:
+    return max((m.version for m in discover()), default=0)
+
+
+def current_version(conn: Connection) -> int:
+    value = conn.execute(select(AppMeta.value).where(AppMeta.key == SCHEMA_VERSION_KEY)).scalar()
+    return int(value) if value else 0
+
+
+def _set_version(conn: Connection, version: int) -> None:
+    table = AppMeta.__table__
+    updated = conn.execute(
+        table.update().where(table.c.key == SCHEMA_VERSION_KEY).values(value=str(version))
+    ).rowcount
+    if not updated:
+        conn.execute(table.insert().values(key=SCHEMA_VERSION_KEY, value=str(version)))
+
+
+def migrate(engine: Engine) -> List[str]:
+    """Apply pending migrations to a database whose tables exist (run
+    ``create_all`` first); returns the names applied, in order."""
+    applied = []
+    for migration in discover():
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+            # Re-read under the lock: another worker may have got here first.
+            if current_version(conn) >= migration.version:
+                continue
+            migration.upgrade(conn)
+            _set_version(conn, migration.version)
+        applied.append(f"v{migration.version:04d}_{migration.name}")
+    return applied
@@ -0,0 +1,54 @@
+"""Composite indexes for the per-user hot paths and unique stocks per (user, task).
+
+* achievements (user_id, achieved_at, id): GET /logs filters on the user and
+  pages by (achieved_at, id) descending; Postgres also INCLUDEs task_id for
+  the completed-task lookup of /challenges/search.
+* stocks (user_id, created_at): GET /stock, newest first.
+* stocks (user_id, task_id) UNIQUE: the stock/unstock lookups. Duplicates that
+  slipped through the check-then-insert in POST /stock are removed first,
+  keeping the oldest row.
+* tasks (source, category_id) and (source, owner_user_id, created_at): catalog
+  loads and category filters; /my_tasks listings.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def upgrade(conn: Connection) -> None:
+    postgres = conn.dialect.name == "postgresql"
+    include = " INCLUDE (task_id)" if postgres else ""
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_achievements_user_achieved"
+            f" ON achievements (user_id, achieved_at, id){include}"
+        )
+    )
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_stocks_user_created ON stocks (user_id, created_at)")
+    )
+    conn.execute(
+        text(
+            "DELETE FROM stocks WHERE id IN ("
+            " SELECT id FROM ("
+            "  SELECT id, ROW_NUMBER() OVER ("
+            "   PARTITION BY user_id, task_id ORDER BY created_at, id) AS rn"
+            "  FROM stocks) ranked"
+            " WHERE rn > 1)"
+        )
+    )
+    conn.execute(
+        text("CREATE UNIQUE INDEX IF NOT EXISTS uq_stocks_user_task ON stocks (user_id, task_id)")
+    )
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tasks_source_category ON tasks (source, category_id)")
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_source_owner_created"
+            " ON tasks (source, owner_user_id, created_at)"
+        )
+    )
+    # Fresh statistics so the planner picks the new indexes right away.
+    for table in ("achievements", "stocks", "tasks"):
+        conn.execute(text(f"ANALYZE {table}"))
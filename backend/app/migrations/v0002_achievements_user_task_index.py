@@ -0,0 +1,13 @@
+"""achievements (user_id, task_id): the first-log-of-task checks that maintain
+the task completion counters (``services/task_stats.py``) on every log write.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_achievements_user_task ON achievements (user_id, task_id)")
+    )
+    conn.execute(text("ANALYZE achievements"))
@@ -3,6 +3,13 @@ from .challenge import Challenge
 from .task import Task
 from .achievement import Achievement
 from .stock import Stock
+from .app_meta import AppMeta
+from .daily_activity import DailyActivity
+from .task_stats import TaskStats
+from .stats_counter import StatsCounter
+from .daily_assignment import DailyAssignment
+from .recommendation import Recommendation
+from .watermark import Watermark
 
 __all__ = [
     "Category",
@@ -10,4 +17,11 @@ __all__ = [
     "Task",
     "Achievement",
     "Stock",
+    "AppMeta",
+    "DailyActivity",
+    "TaskStats",
+    "StatsCounter",
+    "DailyAssignment",
+    "Recommendation",
+    "Watermark",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 import uuid
 
@@ -7,6 +7,19 @@ from ..core.database import Base
 
 class Achievement(Base):
     __tablename__ = "achievements"
+    __table_args__ = (
+        # Per-user logs newest first, in keyset order (achieved_at, id). On
+        # Postgres task_id is included so the completed-task lookup is index-only.
+        Index(
+            "ix_achievements_user_achieved",
+            "user_id",
+            "achieved_at",
+            "id",
+            postgresql_include=["task_id"],
+        ),
+        # "Has this user logged this task before?" when maintaining task_stats.
+        Index("ix_achievements_user_task", "user_id", "task_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String
+
+from ..core.database import Base
+
+
+class AppMeta(Base):
+    """Key/value markers the app keeps about its own database (e.g. schema fingerprint)."""
+
+    __tablename__ = "app_meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
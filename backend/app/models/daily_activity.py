@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Date, Integer, String
+
+from ..core.database import Base
+
+
+class DailyActivity(Base):
+    """Per-user, per-day log counts by category and feeling.
+
+    Maintained in the log writers' transactions and rebuilt by
+    ``scripts/backfill_rollups.py`` (see ``services/rollups.py``).
+    """
+
+    __tablename__ = "daily_activity"
+
+    user_id = Column(String, primary_key=True)
+    # Local date of achieved_at, as GET /logs groups it.
+    day = Column(Date, primary_key=True)
+    # Task category; -1 for the user's own tasks, as in GET /logs.
+    category_id = Column(Integer, primary_key=True)
+    # "" when the log has no feeling.
+    feeling = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, func
+
+from ..core.database import Base
+
+
+class DailyAssignment(Base):
+    """The task shown to a user as their daily task on a given local date
+    (see ``services/daily_assignments.py``)."""
+
+    __tablename__ = "daily_assignments"
+
+    user_id = Column(String, primary_key=True)
+    local_date = Column(Date, primary_key=True)
+    # Deleting a "my" task drops the assignments that point at it; the next
+    # read that day assigns a new task.
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    assigned_at = Column(DateTime, default=func.now(), nullable=False)
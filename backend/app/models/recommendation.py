@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, String
+
+from ..core.database import Base
+
+
+class Recommendation(Base):
+    """A user's top-k catalog task candidates for the daily pick, written by
+    the recommender batch job (``services/recommender.py``)."""
+
+    __tablename__ = "recommendations"
+
+    user_id = Column(String, primary_key=True)
+    # 0 is the best-scored candidate.
+    rank = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
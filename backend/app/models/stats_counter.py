@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+
+from ..core.database import Base
+
+
+class StatsCounter(Base):
+    """Named app-wide counters (e.g. ``active_users``), maintained like ``TaskStats``."""
+
+    __tablename__ = "stats_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 import uuid
 
@@ -7,6 +7,11 @@ from ..core.database import Base
 
 class Stock(Base):
     __tablename__ = "stocks"
+    __table_args__ = (
+        # A task is stocked at most once per user; also serves (user_id, task_id) lookups.
+        Index("uq_stocks_user_task", "user_id", "task_id", unique=True),
+        Index("ix_stocks_user_created", "user_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
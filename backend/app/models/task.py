@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -6,6 +6,11 @@ from ..core.database import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Catalog loads and category filters; "my" task listings per owner, newest first.
+        Index("ix_tasks_source_category", "source", "category_id"),
+        Index("ix_tasks_source_owner_created", "source", "owner_user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String, nullable=False)
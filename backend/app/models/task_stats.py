@@ -0,0 +1,13 @@
+from sqlalchemy import Column, ForeignKey, Integer
+
+from ..core.database import Base
+
+
+class TaskStats(Base):
+    """Per catalog task completion counters (see ``services/task_stats.py``)."""
+
+    __tablename__ = "task_stats"
+
+    task_id = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    # Distinct users with at least one log of the task.
+    completed_users = Column(Integer, nullable=False)
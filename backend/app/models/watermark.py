@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from ..core.database import Base
+
+
+class Watermark(Base):
+    """Per-user modification counter of a resource (``logs``, ``logs:YYYY-MM``,
+    ``stock``, ``my_tasks``), bumped by its writers; see
+    ``services/watermarks.py``."""
+
+    __tablename__ = "watermarks"
+
+    user_id = Column(String, primary_key=True)
+    resource = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+    # UTC time of the last bump, sent as Last-Modified.
+    modified_at = Column(DateTime, nullable=False)
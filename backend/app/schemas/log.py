@@ -1,6 +1,11 @@
-from typing import Optional
-from pydantic import BaseModel
-from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+
+from .category import CategoryResponse
+
+
+MAX_BATCH_LOGS = 500
 
 
 class LogCreate(BaseModel):
@@ -14,3 +19,65 @@ class LogCreate(BaseModel):
 class LogResponse(BaseModel):
     log_id: str
     message: str
+
+
+class LogChallenge(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    difficulty: Optional[int] = None
+    # {"id": -1, "name": "My Task"} for the user's own tasks.
+    category: CategoryResponse
+    source: str
+
+
+class LogEntry(BaseModel):
+    id: str
+    user_id: str
+    memo: Optional[str] = None
+    feeling: Optional[str] = None
+    achieved_at: datetime
+    challenge: LogChallenge
+
+
+class LogBatchItem(LogCreate):
+    # Client-generated id of the queued log (e.g. a UUID). Resending it is a no-op.
+    client_id: str = Field(..., min_length=1, max_length=100)
+
+
+class LogBatchCreate(BaseModel):
+    logs: List[LogBatchItem] = Field(..., max_length=MAX_BATCH_LOGS)
+
+
+class LogBatchResult(BaseModel):
+    client_id: str
+    status: str  # 'created', 'exists', 'not_found' or 'forbidden'
+    log_id: Optional[str] = None
+
+
+class LogBatchResponse(BaseModel):
+    results: List[LogBatchResult]
+
+
+class LogSummaryCategory(BaseModel):
+    # -1 / "My Task" for the user's own tasks, as in LogChallenge.
+    id: int
+    name: str
+    count: int
+
+
+class LogSummaryFeeling(BaseModel):
+    feeling: Optional[str] = None
+    count: int
+
+
+class LogSummaryDay(BaseModel):
+    day: date
+    total: int
+    categories: List[LogSummaryCategory]
+    feelings: List[LogSummaryFeeling]
+
+
+class LogSummaryResponse(BaseModel):
+    total: int
+    days: List[LogSummaryDay]
@@ -1,9 +1,30 @@
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+MAX_BATCH_STOCKS = 500
 
 
 class StockCreate(BaseModel):
     task_id: int
 
+
+class StockBatch(BaseModel):
+    task_ids: List[int] = Field(..., max_length=MAX_BATCH_STOCKS)
+
+
+class StockBatchCreateResponse(BaseModel):
+    created: List[int]
+    # Already stocked, missing, or another user's "my" task.
+    skipped: List[int]
+
+
+class StockBatchDeleteResponse(BaseModel):
+    deleted: List[int]
+    # Not stocked.
+    skipped: List[int]
+
 class StockResponse(BaseModel):
     id: str
     user_id: str
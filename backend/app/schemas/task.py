@@ -1,7 +1,23 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class TaskReplaceRequest(BaseModel):
     new_task_id: Optional[str] = None
     my_task_id: Optional[int] = None
     source: str
+
+
+class DailyTaskStats(BaseModel):
+    # Share of active users (users with any log) who have logged this task.
+    completion_rate: float
+    completed_users: int = 0
+
+
+class DailyTaskResponse(BaseModel):
+    id: str
+    title: str
+    description: Optional[str] = None
+    difficulty: Optional[int] = None
+    tags: List[str]
+    stats: DailyTaskStats
+    source: str  # 'catalog' or 'my'
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class ImportCounts(BaseModel):
+    created: int
+    # Already present: re-imported records, or a stock of a stocked task.
+    exists: int
+    # Referring to an unknown catalog task or a "my" task not in the upload.
+    skipped: int
+
+
+class ImportResponse(BaseModel):
+    my_tasks: ImportCounts
+    logs: ImportCounts
+    stocks: ImportCounts
@@ -0,0 +1,281 @@
+"""In-process snapshot of the catalog and a constant-time daily task sampler.
+
+The catalog (categories, challenges and ``source == "catalog"`` tasks) only
+changes when it is seeded, so readers share one immutable snapshot instead of
+querying Postgres on every request. ORM commits that touch catalog rows bump
+``catalog_version``; the next reader then reloads the snapshot with a single
+query. Listeners registered with ``on_catalog_change`` receive the task rows a
+commit touched, so derived indexes can be patched instead of rebuilt.
+Responses derived purely from the catalog are prebuilt once per snapshot as
+serialized bytes with a strong ETag. Code that writes the catalog outside
+the ORM unit of work (raw SQL, Core bulk inserts) must call
+``publish_catalog_change`` with the task rows it wrote after committing, or
+``bump_catalog_version`` when it does not know them.
+"""
+
+from array import array
+import asyncio
+from dataclasses import dataclass, replace
+from datetime import date
+import hashlib
+from itertools import chain
+import random
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.compression import precompress
+from ..core.config import CATALOG_CACHE_TTL_SECONDS
+from ..core.json_response import dump_json
+from ..models import Category, Challenge, Task
+
+
+_lock = threading.Lock()
+_version_lock = threading.Lock()
+_version = 0
+_snapshot: Optional["CatalogSnapshot"] = None
+_async_lock: Optional[asyncio.Lock] = None
+# listener(version, upserted (id, title, description) rows, deleted ids)
+_listeners: List[Callable[[int, list, set], None]] = []
+
+
+class CatalogTask(NamedTuple):
+    id: int
+    title: str
+    description: Optional[str]
+    difficulty: Optional[int]
+    category_id: Optional[int]
+    category_name: Optional[str]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    loaded_at: float
+    # Catalog task ids in ascending order; position i matches tasks[i].
+    ids: array
+    tasks: Tuple[CatalogTask, ...]
+    # Prebuilt `/tasks/daily` bodies (without per-request stats).
+    daily_payloads: Tuple[dict, ...]
+    # Prebuilt `/challenges/search` items (without per-user is_completed).
+    search_items: Tuple[dict, ...]
+    position_by_id: Dict[int, int]
+    categories_body: bytes
+    categories_etag: str
+    # categories_body per Content-Encoding, compressed once per version.
+    categories_encoded: Dict[str, bytes]
+    # Content hash of the tasks and categories, part of the ETags of
+    # per-user lists that embed catalog task data (``services/watermarks.py``).
+    etag: str
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def catalog_version() -> int:
+    return _version
+
+
+def bump_catalog_version() -> int:
+    global _version
+    with _version_lock:
+        _version += 1
+        return _version
+
+
+def on_catalog_change(listener: Callable[[int, list, set], None]):
+    """Register ``listener`` to run after every commit that changed the catalog."""
+    _listeners.append(listener)
+    return listener
+
+
+def publish_catalog_change(upserts: list, deleted: set) -> int:
+    """Bump ``catalog_version`` and hand the committed task changes,
+    ``(id, title, description)`` rows and deleted ids, to the listeners."""
+    version = bump_catalog_version()
+    for listener in _listeners:
+        listener(version, upserts, deleted)
+    return version
+
+
+def _is_catalog_row(obj) -> bool:
+    if isinstance(obj, (Category, Challenge)):
+        return True
+    return isinstance(obj, Task) and obj.source == "catalog"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_writes(session: Session, flush_context) -> None:
+    changes = None
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not _is_catalog_row(obj):
+            continue
+        if changes is None:
+            changes = session.info.setdefault("catalog_changes", ({}, set()))
+        if isinstance(obj, Task):
+            upserts, deleted = changes
+            if obj in session.deleted:
+                upserts.pop(obj.id, None)
+                deleted.add(obj.id)
+            else:
+                upserts[obj.id] = (obj.id, obj.title, obj.description)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session) -> None:
+    changes = session.info.pop("catalog_changes", None)
+    if changes is None:
+        return
+    upserts, deleted = changes
+    publish_catalog_change(list(upserts.values()), deleted)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("catalog_changes", None)
+
+
+def make_etag(body: bytes) -> str:
+    # Content hash rather than the process-local version, so every worker
+    # hands out the same strong ETag for the same bytes.
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _load(db: Session, version: int) -> CatalogSnapshot:
+    tasks = tuple(
+        CatalogTask(*row)
+        for row in db.execute(
+            select(
+                Task.id,
+                Task.title,
+                Task.description,
+                Task.difficulty,
+                Task.category_id,
+                Category.name,
+            )
+            .outerjoin(Category, Category.id == Task.category_id)
+            .where(Task.source == "catalog")
+            .order_by(Task.id)
+        )
+    )
+    categories = [
+        {"id": category_id, "name": name}
+        for category_id, name in db.execute(
+            select(Category.id, Category.name).order_by(Category.name)
+        )
+    ]
+    ids = array("q", (t.id for t in tasks))
+    daily_payloads = tuple(
+        {
+            "id": str(t.id),
+            "title": t.title,
+            "description": t.description,
+            "difficulty": t.difficulty,
+            "tags": [t.category_name] if t.category_name else [],
+            "source": "catalog",
+        }
+        for t in tasks
+    )
+    search_items = tuple(
+        {
+            "id": t.id,
+            "title": t.title,
+            "tags": [t.category_name] if t.category_name else [],
+            "description": t.description,
+            "difficulty": t.difficulty,
+        }
+        for t in tasks
+    )
+    categories_body = dump_json(categories)
+    return CatalogSnapshot(
+        version=version,
+        loaded_at=time.monotonic(),
+        ids=ids,
+        tasks=tasks,
+        daily_payloads=daily_payloads,
+        search_items=search_items,
+        position_by_id={task_id: i for i, task_id in enumerate(ids)},
+        categories_body=categories_body,
+        categories_etag=make_etag(categories_body),
+        categories_encoded=precompress(categories_body),
+        etag=make_etag(dump_json([list(t) for t in tasks]) + categories_body),
+    )
+
+
+def _is_fresh(snap: Optional[CatalogSnapshot]) -> bool:
+    if snap is None or snap.version != _version:
+        return False
+    if CATALOG_CACHE_TTL_SECONDS <= 0:
+        return True
+    return time.monotonic() - snap.loaded_at < CATALOG_CACHE_TTL_SECONDS
+
+
+def _install(fresh: CatalogSnapshot) -> CatalogSnapshot:
+    global _snapshot
+    snap = _snapshot
+    if (
+        snap is not None
+        and snap.version == fresh.version
+        and (snap.tasks != fresh.tasks or snap.categories_body != fresh.categories_body)
+    ):
+        # TTL reload saw a change made by another process.
+        fresh = replace(fresh, version=bump_catalog_version())
+    _snapshot = fresh
+    return fresh
+
+
+def get_snapshot(db: Session) -> CatalogSnapshot:
+    """Return the current catalog snapshot, reloading it through ``db`` if stale.
+
+    In the steady state this does not touch the database (the session never
+    checks out a connection).
+    """
+    snap = _snapshot
+    if _is_fresh(snap):
+        return snap
+    with _lock:
+        snap = _snapshot
+        if _is_fresh(snap):
+            return snap
+        # Read the version before loading so a concurrent bump is not lost.
+        return _install(_load(db, _version))
+
+
+async def get_snapshot_async(db: AsyncSession) -> CatalogSnapshot:
+    """``get_snapshot`` for an AsyncSession.
+
+    Reloads are serialized with an asyncio lock: holding the thread lock
+    across an await would deadlock other coroutines on the same loop thread.
+    """
+    global _async_lock
+    snap = _snapshot
+    if _is_fresh(snap):
+        return snap
+    if _async_lock is None:
+        _async_lock = asyncio.Lock()
+    async with _async_lock:
+        snap = _snapshot
+        if _is_fresh(snap):
+            return snap
+        fresh = await db.run_sync(_load, _version)
+        with _lock:
+            return _install(fresh)
+
+
+def pick_random(snap: CatalogSnapshot) -> Optional[dict]:
+    if not snap.ids:
+        return None
+    return snap.daily_payloads[random.randrange(len(snap.ids))]
+
+
+def pick_for_user(snap: CatalogSnapshot, user_id: str, day: date) -> Optional[dict]:
+    """Deterministic pick: the same user gets the same task all day."""
+    if not snap.ids:
+        return None
+    digest = hashlib.blake2b(f"{user_id}:{day.isoformat()}".encode(), digest_size=8).digest()
+    return snap.daily_payloads[int.from_bytes(digest, "big") % len(snap.ids)]
+
@@ -0,0 +1,238 @@
+"""Per-user completed task ids, cached as compressed bitmaps.
+
+``/challenges/search`` needs ``is_completed`` for every hit. Instead of loading
+the user's achievements on every keystroke, each user's completed task ids are
+loaded once into a ``CompletionBitmap`` and kept in a bounded LRU cache.
+``create_log`` adds to the cached bitmap after its commit, so the cache stays
+current without reloading.
+
+Completions only grow (logs are never deleted), so merging is always safe: a
+load that raced with ``record_completion`` is unioned with whatever the cache
+holds when it finishes, and completions recorded while the load was in flight
+are replayed into it. Other worker processes do not see this process's
+writes, so entries also expire after ``COMPLETION_CACHE_TTL_SECONDS``.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import COMPLETION_CACHE_MAX_USERS, COMPLETION_CACHE_TTL_SECONDS
+from ..models import Achievement
+
+
+_CHUNK_SHIFT = 16
+_LOW_MASK = (1 << _CHUNK_SHIFT) - 1
+# A chunk turns from a sorted uint16 array into a bitmap at this many members,
+# where both take 8 KiB.
+_ARRAY_MAX = 4096
+_BITMAP_BYTES = (1 << _CHUNK_SHIFT) // 8
+
+
+class CompletionBitmap:
+    """Roaring-style compressed bitmap of task ids.
+
+    Ids are split into 2**16-wide chunks keyed by their high bits. A chunk
+    holds a sorted ``array("H")`` of the low bits (2 bytes per id) until it
+    reaches 4096 members, then a fixed 8 KiB bitmap. A membership test is one
+    dict lookup plus a byte test or a bisect over at most 4096 entries.
+    """
+
+    __slots__ = ("_chunks", "_len")
+
+    def __init__(self, task_ids: Iterable[int] = ()) -> None:
+        self._chunks: Dict[int, object] = {}
+        self._len = 0
+        # Sorted input takes the append fast path in add().
+        for task_id in sorted(set(task_ids)):
+            self.add(task_id)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._chunks):
+            chunk, base = self._chunks[key], key << _CHUNK_SHIFT
+            if isinstance(chunk, bytearray):
+                lows = (low for low in range(_BITMAP_BYTES * 8) if chunk[low >> 3] & (1 << (low & 7)))
+            else:
+                lows = chunk
+            for low in lows:
+                yield base | low
+
+    def __contains__(self, task_id) -> bool:
+        chunk = self._chunks.get(task_id >> _CHUNK_SHIFT)
+        if chunk is None:
+            return False
+        low = task_id & _LOW_MASK
+        if isinstance(chunk, bytearray):
+            return bool(chunk[low >> 3] & (1 << (low & 7)))
+        i = bisect_left(chunk, low)
+        return i < len(chunk) and chunk[i] == low
+
+    def add(self, task_id: int) -> bool:
+        """Add ``task_id``; returns False if it was already present."""
+        key, low = task_id >> _CHUNK_SHIFT, task_id & _LOW_MASK
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            self._chunks[key] = array("H", (low,))
+        elif isinstance(chunk, bytearray):
+            bit = 1 << (low & 7)
+            if chunk[low >> 3] & bit:
+                return False
+            chunk[low >> 3] |= bit
+        else:
+            if chunk and chunk[-1] < low:
+                chunk.append(low)
+            else:
+                i = bisect_left(chunk, low)
+                if i < len(chunk) and chunk[i] == low:
+                    return False
+                insort(chunk, low)
+            if len(chunk) >= _ARRAY_MAX:
+                self._chunks[key] = self._to_bitmap(chunk)
+        self._len += 1
+        return True
+
+    @staticmethod
+    def _to_bitmap(lows: array) -> bytearray:
+        bitmap = bytearray(_BITMAP_BYTES)
+        for low in lows:
+            bitmap[low >> 3] |= 1 << (low & 7)
+        return bitmap
+
+    def nbytes(self) -> int:
+        """Approximate memory footprint, containers included."""
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self._chunks)
+            + sum(sys.getsizeof(chunk) for chunk in self._chunks.values())
+        )
+
+
+class _Entry:
+    __slots__ = ("bitmap", "loaded_at")
+
+    def __init__(self, bitmap: CompletionBitmap, loaded_at: float) -> None:
+        self.bitmap = bitmap
+        self.loaded_at = loaded_at
+
+
+class CompletionCache:
+    def __init__(self, max_users: int, ttl_seconds: float) -> None:
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # user_id -> completions recorded while a load for that user is in flight
+        self._loading: Dict[str, List[int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, user_id: str) -> Optional[CompletionBitmap]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and (
+                self.ttl_seconds <= 0 or time.monotonic() - entry.loaded_at < self.ttl_seconds
+            ):
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.bitmap
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            self._loading.setdefault(user_id, [])
+            return None
+
+    def install(self, user_id: str, task_ids: Iterable[int]) -> CompletionBitmap:
+        bitmap = CompletionBitmap(task_ids)
+        with self._lock:
+            for task_id in self._loading.pop(user_id, ()):
+                bitmap.add(task_id)
+            current = self._entries.get(user_id)
+            if current is not None:
+                # Another load finished first; completions only grow, so union.
+                for task_id in bitmap:
+                    current.bitmap.add(task_id)
+                self._entries.move_to_end(user_id)
+                return current.bitmap
+            self._entries[user_id] = _Entry(bitmap, time.monotonic())
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return bitmap
+
+    def abandon(self, user_id: str) -> None:
+        """Drop the pending completions of a load ``lookup`` started that
+        failed, so ``record`` stops collecting them."""
+        with self._lock:
+            self._loading.pop(user_id, None)
+
+    def record(self, user_id: str, task_id: int) -> None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.bitmap.add(task_id)
+            pending = self._loading.get(user_id)
+            if pending is not None:
+                pending.append(task_id)
+
+    def stats(self, limit: int) -> dict:
+        with self._lock:
+            users = [
+                {"user_id": user_id, "completed": len(e.bitmap), "bytes": e.bitmap.nbytes()}
+                for user_id, e in self._entries.items()
+            ]
+            counters = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        users.sort(key=lambda u: u["bytes"], reverse=True)
+        return {
+            "users": len(users),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds,
+            **counters,
+            "total_bytes": sum(u["bytes"] for u in users),
+            "largest": users[:limit],
+        }
+
+
+cache = CompletionCache(COMPLETION_CACHE_MAX_USERS, COMPLETION_CACHE_TTL_SECONDS)
+
+
+def completed_task_ids_statement(user_id: str):
+    return select(Achievement.task_id).where(Achievement.user_id == user_id).distinct()
+
+
+def completed_ids(db: Session, user_id: str) -> CompletionBitmap:
+    bitmap = cache.lookup(user_id)
+    if bitmap is None:
+        try:
+            bitmap = cache.install(user_id, db.scalars(completed_task_ids_statement(user_id)))
+        except BaseException:
+            cache.abandon(user_id)
+            raise
+    return bitmap
+
+
+async def completed_ids_async(db: AsyncSession, user_id: str) -> CompletionBitmap:
+    bitmap = cache.lookup(user_id)
+    if bitmap is None:
+        try:
+            bitmap = cache.install(user_id, await db.scalars(completed_task_ids_statement(user_id)))
+        except BaseException:
+            cache.abandon(user_id)
+            raise
+    return bitmap
+
+
+def record_completion(user_id: str, task_id: int) -> None:
+    """Call after a new achievement for ``user_id`` has been committed."""
+    cache.record(user_id, task_id)
@@ -0,0 +1,260 @@
+"""Per-user daily task assignments (``daily_assignments``).
+
+A user's daily task is chosen once per local date and stored under
+``(user_id, local_date)``, so every read that day returns the same task with
+one primary-key lookup. The first read of the day stores a pick with one
+``INSERT ... ON CONFLICT`` that returns whichever row won, so concurrent
+first reads agree. The pick is one of the user's top-k candidates from the
+recommender batch job (``recommendations``), chosen by ``sample_rank``
+inside that same statement; users without candidates get
+``catalog.pick_for_user``. ``force_refresh`` and
+``/tasks/daily/replace`` overwrite the row with one upsert. ``pregenerate``
+(``python -m scripts.pregenerate_daily``) writes the next day's rows for
+recently active users in bulk, so their first read is a lookup as well; it
+never overwrites a row.
+
+Assignments are not cached in-process: a replace made through one worker has
+to show up through every other worker right away.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+import hashlib
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import RECOMMENDATION_TOP_K
+from ..models import Category, DailyActivity, DailyAssignment, Recommendation, Task
+from . import catalog
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        return postgresql.insert(DailyAssignment)
+    if dialect == "sqlite":
+        return sqlite.insert(DailyAssignment)
+    raise ValueError(f"No upsert for dialect {dialect!r}")
+
+
+def lookup_statement(user_id: str, day: date):
+    return (
+        select(
+            Task.id,
+            Task.source,
+            Task.title,
+            Task.description,
+            Task.difficulty,
+            Category.name,
+        )
+        .select_from(DailyAssignment)
+        .join(Task, Task.id == DailyAssignment.task_id)
+        .outerjoin(Category, Category.id == Task.category_id)
+        .where(DailyAssignment.user_id == user_id, DailyAssignment.local_date == day)
+    )
+
+
+def sample_rank(user_id: str, day: date, top_k: int = RECOMMENDATION_TOP_K) -> int:
+    """The candidate rank a user gets on ``day``: fixed for the day and
+    skewed toward the best candidates (rank < r with probability
+    sqrt(r / top_k))."""
+    digest = hashlib.blake2b(f"rec:{user_id}:{day.isoformat()}".encode(), digest_size=8).digest()
+    u = int.from_bytes(digest, "big") / 2**64
+    return int(top_k * u * u)
+
+
+def choose(candidates: Dict[int, int], user_id: str, day: date, fallback_task_id: int) -> int:
+    """``assign_statement``'s choice in Python, for ``candidates`` {rank: task_id}."""
+    task_id = candidates.get(sample_rank(user_id, day), candidates.get(0))
+    return task_id if task_id is not None else fallback_task_id
+
+
+def _candidate(user_id: str, rank: int):
+    return (
+        select(Recommendation.task_id)
+        .where(Recommendation.user_id == user_id, Recommendation.rank == rank)
+        .scalar_subquery()
+    )
+
+
+def assign_statement(dialect: str, user_id: str, day: date, fallback_task_id: int):
+    """Store the user's sampled candidate (the best one if fewer were kept,
+    ``fallback_task_id`` if none) unless they already have a task for
+    ``day``; returns the assigned task id either way."""
+    task_id = func.coalesce(
+        _candidate(user_id, sample_rank(user_id, day)), _candidate(user_id, 0), fallback_task_id
+    )
+    stmt = _upsert(dialect).values(user_id=user_id, local_date=day, task_id=task_id)
+    # A no-op update rather than DO NOTHING, so RETURNING yields the existing row.
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyAssignment.user_id, DailyAssignment.local_date],
+        set_={"task_id": DailyAssignment.task_id},
+    ).returning(DailyAssignment.task_id)
+
+
+def replace_statement(dialect: str, user_id: str, day: date, task_id: int):
+    stmt = _upsert(dialect).values(user_id=user_id, local_date=day, task_id=task_id)
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyAssignment.user_id, DailyAssignment.local_date],
+        set_={"task_id": stmt.excluded.task_id, "assigned_at": func.now()},
+    )
+
+
+def task_payload(task_id, source, title, description, difficulty, category_name) -> dict:
+    """``/tasks/daily`` body without stats, shaped like the catalog
+    snapshot's prebuilt payloads."""
+    if category_name:
+        tags = [category_name]
+    else:
+        tags = ["My Task"] if source == "my" else []
+    return {
+        "id": str(task_id),
+        "title": title,
+        "description": description,
+        "difficulty": difficulty,
+        "tags": tags,
+        "source": source,
+    }
+
+
+def daily_task(db: Session, snap: catalog.CatalogSnapshot, user_id: str, day: date) -> Optional[dict]:
+    """The user's task for ``day``, assigning one on the first read."""
+    row = db.execute(lookup_statement(user_id, day)).first()
+    if row is not None:
+        return task_payload(*row)
+    payload = catalog.pick_for_user(snap, user_id, day)
+    if payload is None:
+        return None
+    stmt = assign_statement(db.get_bind().dialect.name, user_id, day, int(payload["id"]))
+    position = snap.position_by_id.get(db.execute(stmt).scalar_one())
+    if position is None:
+        # A "my" task replaced in concurrently, or a task no longer in the
+        # catalog (SQLite does not enforce the cascades): keep the row if it
+        # still resolves, else overwrite it with the fallback.
+        row = db.execute(lookup_statement(user_id, day)).first()
+        if row is not None:
+            db.commit()
+            return task_payload(*row)
+        db.execute(replace_statement(db.get_bind().dialect.name, user_id, day, int(payload["id"])))
+        db.commit()
+        return payload
+    db.commit()
+    return snap.daily_payloads[position]
+
+
+async def daily_task_async(
+    db: AsyncSession, snap: catalog.CatalogSnapshot, user_id: str, day: date
+) -> Optional[dict]:
+    row = (await db.execute(lookup_statement(user_id, day))).first()
+    if row is not None:
+        return task_payload(*row)
+    payload = catalog.pick_for_user(snap, user_id, day)
+    if payload is None:
+        return None
+    stmt = assign_statement(db.get_bind().dialect.name, user_id, day, int(payload["id"]))
+    position = snap.position_by_id.get((await db.execute(stmt)).scalar_one())
+    if position is None:
+        row = (await db.execute(lookup_statement(user_id, day))).first()
+        if row is not None:
+            await db.commit()
+            return task_payload(*row)
+        await db.execute(replace_statement(db.get_bind().dialect.name, user_id, day, int(payload["id"])))
+        await db.commit()
+        return payload
+    await db.commit()
+    return snap.daily_payloads[position]
+
+
+def refresh(db: Session, snap: catalog.CatalogSnapshot, user_id: str, day: date) -> Optional[dict]:
+    """Draw a new random catalog task and make it the user's task for ``day``."""
+    payload = catalog.pick_random(snap)
+    if payload is None:
+        return None
+    db.execute(replace_statement(db.get_bind().dialect.name, user_id, day, int(payload["id"])))
+    db.commit()
+    return payload
+
+
+async def refresh_async(
+    db: AsyncSession, snap: catalog.CatalogSnapshot, user_id: str, day: date
+) -> Optional[dict]:
+    payload = catalog.pick_random(snap)
+    if payload is None:
+        return None
+    await db.execute(replace_statement(db.get_bind().dialect.name, user_id, day, int(payload["id"])))
+    await db.commit()
+    return payload
+
+
+@dataclass
+class PregenerateReport:
+    users: int = 0
+    assigned: int = 0
+    chunks: int = 0
+
+
+def pregenerate(
+    engine: Engine,
+    snap: catalog.CatalogSnapshot,
+    day: date,
+    active_since: date,
+    chunk_users: int = 1000,
+) -> PregenerateReport:
+    """Assign ``day``'s task to every user with a log on or after
+    ``active_since`` (from the daily rollups), ``chunk_users`` users per
+    multi-row insert, choosing as ``assign_statement`` would. Users who
+    already have a task for ``day`` keep it."""
+    report = PregenerateReport()
+    if not len(snap):
+        return report
+    dialect = engine.dialect.name
+    after = None
+    while True:
+        query = (
+            select(DailyActivity.user_id)
+            .where(DailyActivity.day >= active_since)
+            .distinct()
+            .order_by(DailyActivity.user_id)
+            .limit(chunk_users)
+        )
+        if after is not None:
+            query = query.where(DailyActivity.user_id > after)
+        with engine.begin() as conn:
+            user_ids = conn.execute(query).scalars().all()
+            if not user_ids:
+                return report
+            candidates: Dict[str, Dict[int, int]] = {}
+            for user_id, rank, task_id in conn.execute(
+                select(Recommendation.user_id, Recommendation.rank, Recommendation.task_id).where(
+                    Recommendation.user_id.in_(user_ids)
+                )
+            ):
+                candidates.setdefault(user_id, {})[rank] = task_id
+            rows = [
+                {
+                    "user_id": user_id,
+                    "local_date": day,
+                    "task_id": choose(
+                        candidates.get(user_id, {}), user_id, day,
+                        int(catalog.pick_for_user(snap, user_id, day)["id"]),
+                    ),
+                }
+                for user_id in user_ids
+            ]
+            stmt = _upsert(dialect).values(rows).on_conflict_do_nothing(
+                index_elements=[DailyAssignment.user_id, DailyAssignment.local_date]
+            )
+            report.assigned += conn.execute(stmt).rowcount
+        report.users += len(user_ids)
+        report.chunks += 1
+        after = user_ids[-1]
+
+
+def prune(engine: Engine, before: date) -> int:
+    """Delete assignments for dates before ``before``; returns rows deleted."""
+    with engine.begin() as conn:
+        return conn.execute(delete(DailyAssignment).where(DailyAssignment.local_date < before)).rowcount
@@ -0,0 +1,200 @@
+"""Batch recommender: per-user top-k catalog task candidates for the daily pick.
+
+Run by ``python -m scripts.build_recommendations``; the request path only
+reads its output (``services/daily_assignments.py``) and never imports NumPy.
+
+From the logs and stocks of every user it builds two affinity matrices,
+user x category and user x difficulty: counts aggregated in SQL (a stocked
+task weighs ``STOCK_WEIGHT`` of a log), smoothed with ``ALPHA`` and
+normalised per user into preference distributions. A catalog task then
+scores, for a user,
+
+    log P(category) + log P(difficulty) + POPULARITY_WEIGHT * popularity + jitter
+
+where popularity is ``log1p(task_stats.completed_users)`` scaled to [0, 1]
+and jitter is uniform noise of width ``JITTER`` that spreads picks across the
+many tasks sharing a category and difficulty. Tasks the user has already
+logged are excluded. Users are scored a chunk at a time as one dense
+(users x tasks) float32 matrix, the top ``top_k`` are taken with
+``argpartition``, and they replace the users' previous ``recommendations``
+rows in that chunk's transaction.
+
+A chunk holds at most ``CELL_BUDGET`` cells, so its row count shrinks as the
+catalog grows (``chunk_users`` only caps it). Scores are accumulated in place
+in the chunk matrix and one float32 buffer of the same size, and
+``argpartition`` adds an int64 index array: about 16 bytes a cell, so 160 MB
+per chunk whatever the catalog size, on top of the per-user affinity
+matrices and the logged (user, task) pairs.
+"""
+
+from array import array
+from dataclasses import dataclass
+import time
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Engine
+
+from ..core.config import RECOMMENDATION_TOP_K
+from ..models import Achievement, Recommendation, Stock, Task, TaskStats
+
+
+STOCK_WEIGHT = 0.5
+ALPHA = 1.0
+POPULARITY_WEIGHT = 0.5
+JITTER = 0.5
+# Most (user, task) scores held at once; see the module docstring.
+CELL_BUDGET = 10_000_000
+# Rows fetched per round trip when streaming (user, task) pairs.
+_STREAM_ROWS = 50_000
+
+
+@dataclass
+class BuildReport:
+    users: int = 0
+    tasks: int = 0
+    rows: int = 0
+    chunks: int = 0
+    load_seconds: float = 0.0
+    score_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+
+def _log_preferences(counts: np.ndarray) -> np.ndarray:
+    smoothed = counts + ALPHA
+    return np.log(smoothed / smoothed.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def build(
+    engine: Engine,
+    top_k: int = RECOMMENDATION_TOP_K,
+    chunk_users: Optional[int] = None,
+    seed: Optional[int] = None,
+    progress: Optional[Callable[[BuildReport], None]] = None,
+) -> BuildReport:
+    """Recompute the candidates of every user with a catalog log or stock."""
+    report = BuildReport()
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    is_catalog = Task.source == "catalog"
+    with engine.connect() as conn:
+        tasks = conn.execute(
+            select(Task.id, Task.category_id, Task.difficulty, TaskStats.completed_users)
+            .outerjoin(TaskStats, TaskStats.task_id == Task.id)
+            .where(is_catalog)
+            .order_by(Task.id)
+        ).all()
+        if not tasks:
+            return report
+        task_ids = np.array([t[0] for t in tasks], dtype=np.int64)
+        categories, task_category = np.unique(
+            np.array([-1 if t[1] is None else t[1] for t in tasks]), return_inverse=True
+        )
+        difficulties, task_difficulty = np.unique(
+            np.array([-1 if t[2] is None else t[2] for t in tasks]), return_inverse=True
+        )
+        popularity = np.log1p(np.array([t[3] or 0 for t in tasks], dtype=np.float32))
+        if popularity.max() > 0:
+            popularity /= popularity.max()
+
+        # (user, category, difficulty, weight) from logs and stocks.
+        aggregates = []
+        for model, weight in ((Achievement, 1.0), (Stock, STOCK_WEIGHT)):
+            aggregates.extend(
+                (user_id, category_id, difficulty, count * weight)
+                for user_id, category_id, difficulty, count in conn.execute(
+                    select(model.user_id, Task.category_id, Task.difficulty, func.count())
+                    .join(Task, Task.id == model.task_id)
+                    .where(is_catalog)
+                    .group_by(model.user_id, Task.category_id, Task.difficulty)
+                )
+            )
+        users = sorted({row[0] for row in aggregates})
+        user_index = {user_id: i for i, user_id in enumerate(users)}
+        rows_u = np.array([user_index[row[0]] for row in aggregates], dtype=np.int64)
+        weights = np.array([row[3] for row in aggregates], dtype=np.float32)
+        category_counts = np.zeros((len(users), len(categories)), dtype=np.float32)
+        np.add.at(
+            category_counts,
+            (rows_u, np.searchsorted(categories, [-1 if row[1] is None else row[1] for row in aggregates])),
+            weights,
+        )
+        difficulty_counts = np.zeros((len(users), len(difficulties)), dtype=np.float32)
+        np.add.at(
+            difficulty_counts,
+            (rows_u, np.searchsorted(difficulties, [-1 if row[2] is None else row[2] for row in aggregates])),
+            weights,
+        )
+        del aggregates
+
+        # Tasks each user has logged, as (user index, task position) sorted by user.
+        done_users, done_tasks = array("q"), array("q")
+        result = conn.execution_options(stream_results=True, yield_per=_STREAM_ROWS).execute(
+            select(Achievement.user_id, Achievement.task_id)
+            .join(Task, Task.id == Achievement.task_id)
+            .where(is_catalog)
+            .distinct()
+        )
+        for partition in result.partitions():
+            done_users.extend(user_index[user_id] for user_id, _ in partition)
+            done_tasks.extend(task_id for _, task_id in partition)
+    done_u = np.frombuffer(done_users, dtype=np.int64)
+    done_t = np.searchsorted(task_ids, np.frombuffer(done_tasks, dtype=np.int64))
+    order = np.argsort(done_u, kind="stable")
+    done_u, done_t = done_u[order], done_t[order]
+
+    log_category = _log_preferences(category_counts)
+    log_difficulty = _log_preferences(difficulty_counts)
+    weighted_popularity = (POPULARITY_WEIGHT * popularity).astype(np.float32)
+    k = min(top_k, len(task_ids))
+    report.users, report.tasks = len(users), len(task_ids)
+    report.load_seconds = round(time.perf_counter() - start, 2)
+
+    rows_per_chunk = max(1, CELL_BUDGET // len(task_ids))
+    if chunk_users is not None:
+        rows_per_chunk = min(rows_per_chunk, chunk_users)
+    rows_per_chunk = min(rows_per_chunk, max(1, len(users)))
+    scores_buffer = np.empty((rows_per_chunk, len(task_ids)), dtype=np.float32)
+    noise_buffer = np.empty_like(scores_buffer)
+    for lo in range(0, len(users), rows_per_chunk):
+        hi = min(lo + rows_per_chunk, len(users))
+        start = time.perf_counter()
+        scores, noise = scores_buffer[: hi - lo], noise_buffer[: hi - lo]
+        np.take(log_category[lo:hi], task_category, axis=1, out=scores)
+        np.add(scores, np.take(log_difficulty[lo:hi], task_difficulty, axis=1, out=noise), out=scores)
+        np.add(scores, weighted_popularity, out=scores)
+        rng.random(out=noise, dtype=np.float32)
+        np.multiply(noise, JITTER, out=noise)
+        np.add(scores, noise, out=scores)
+        first, last = np.searchsorted(done_u, [lo, hi])
+        scores[done_u[first:last] - lo, done_t[first:last]] = -np.inf
+        # Negated in place so argpartition's ascending order puts the best first.
+        np.negative(scores, out=scores)
+        top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        ranked = np.argsort(top_scores, axis=1)
+        top = np.take_along_axis(top, ranked, axis=1)
+        top_scores = -np.take_along_axis(top_scores, ranked, axis=1)
+        chunk = users[lo:hi]
+        rows = [
+            {"user_id": chunk[i], "rank": rank, "task_id": int(task_ids[position]), "score": float(score)}
+            for i in range(hi - lo)
+            for rank, (position, score) in enumerate(zip(top[i], top_scores[i]))
+            if score > -np.inf
+        ]
+        report.score_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(delete(Recommendation).where(Recommendation.user_id.in_(chunk)))
+            if rows:
+                conn.execute(insert(Recommendation), rows)
+        report.write_seconds += time.perf_counter() - start
+        report.rows += len(rows)
+        report.chunks += 1
+        if progress is not None:
+            progress(report)
+    report.score_seconds = round(report.score_seconds, 2)
+    report.write_seconds = round(report.write_seconds, 2)
+    return report
@@ -0,0 +1,110 @@
+"""Per-user daily log counts (``daily_activity``) for calendar and chart views.
+
+``GET /logs/summary`` reads one row per (day, category, feeling) instead of
+every achievement in the range. The log writers keep the rollup current in
+their own transaction: after inserting achievements they execute
+``increment_statement`` for the new ids, which aggregates exactly those rows
+and adds them to the counters with an upsert, so a log and its count commit
+or roll back together.
+
+Logs written before the table existed, or by anything that bypasses the
+writers (``benchmarks/datagen.py``), are counted by ``backfill``
+(``python -m scripts.backfill_rollups``). It rebuilds users in chunks, one
+short transaction per chunk, and is idempotent and safe alongside live
+writes.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import Achievement, DailyActivity, Task
+
+
+# Rollup keys for logs of tasks without a category (the user's own tasks) and
+# logs without a feeling; the key columns are part of the primary key.
+NO_CATEGORY = -1
+NO_FEELING = ""
+
+_COLUMNS = ("user_id", "day", "category_id", "feeling", "count")
+_KEY = ("user_id", "day", "category_id", "feeling")
+
+
+def _aggregate(where):
+    day = func.date(Achievement.achieved_at)
+    category_id = func.coalesce(Task.category_id, NO_CATEGORY)
+    feeling = func.coalesce(Achievement.feeling, NO_FEELING)
+    return (
+        select(Achievement.user_id, day, category_id, feeling, func.count())
+        .join(Task, Task.id == Achievement.task_id)
+        .where(where)
+        .group_by(Achievement.user_id, day, category_id, feeling)
+    )
+
+
+def increment_statement(dialect: str, achievement_ids: Iterable[str]):
+    """Add the achievements ``achievement_ids``, inserted earlier in the same
+    transaction, to their counters (``INSERT ... SELECT ... ON CONFLICT DO
+    UPDATE``). Postgres and SQLite only."""
+    if dialect == "postgresql":
+        stmt = postgresql.insert(DailyActivity)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(DailyActivity)
+    else:
+        raise ValueError(f"No upsert for dialect {dialect!r}")
+    stmt = stmt.from_select(_COLUMNS, _aggregate(Achievement.id.in_(list(achievement_ids))))
+    return stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={"count": DailyActivity.__table__.c["count"] + stmt.excluded["count"]},
+    )
+
+
+def rebuild_users(conn: Connection, user_ids: Sequence[str]) -> int:
+    """Recompute the rollups of ``user_ids`` from their achievements in the
+    caller's transaction; returns the number of rollup rows written."""
+    if conn.dialect.name == "postgresql":
+        # Block increments until this transaction commits. A log inserted
+        # concurrently is then counted exactly once: by this rebuild if its
+        # writer committed first, otherwise by the writer's own increment.
+        # (SQLite writers are serialized by the database lock already.)
+        conn.execute(text("LOCK TABLE daily_activity IN SHARE ROW EXCLUSIVE MODE"))
+    conn.execute(delete(DailyActivity).where(DailyActivity.user_id.in_(user_ids)))
+    result = conn.execute(
+        insert(DailyActivity).from_select(_COLUMNS, _aggregate(Achievement.user_id.in_(user_ids)))
+    )
+    return result.rowcount
+
+
+@dataclass
+class BackfillReport:
+    users: int = 0
+    rows: int = 0
+    chunks: int = 0
+
+
+def backfill(
+    engine: Engine,
+    chunk_users: int = 500,
+    progress: Optional[Callable[[BackfillReport], None]] = None,
+) -> BackfillReport:
+    """Rebuild every user's rollups, ``chunk_users`` users per transaction,
+    walking the distinct user ids of ``achievements`` in order."""
+    report = BackfillReport()
+    after = None
+    while True:
+        query = select(Achievement.user_id).distinct().order_by(Achievement.user_id).limit(chunk_users)
+        if after is not None:
+            query = query.where(Achievement.user_id > after)
+        with engine.begin() as conn:
+            user_ids = conn.execute(query).scalars().all()
+            if not user_ids:
+                return report
+            report.rows += rebuild_users(conn, user_ids)
+        report.users += len(user_ids)
+        report.chunks += 1
+        after = user_ids[-1]
+        if progress is not None:
+            progress(report)
@@ -0,0 +1,206 @@
+"""Character-bigram inverted index over catalog task titles and descriptions.
+
+Japanese text has no word boundaries, so the index is keyed on overlapping
+two-character grams of a normalized form of the text:
+
+* NFKC folds full-width ASCII and half-width katakana to their canonical
+  widths,
+* katakana is mapped to hiragana, so "ストレッチ" and "すとれっち" meet,
+* case is folded and whitespace removed.
+
+A hit must contain every bigram of the query (title or description). Hits
+are ranked by how many query bigrams land in the title, then in the
+description, with a bonus when the whole query is a substring of the title.
+
+Postings are sorted ``array("l")`` of task ids, which keeps a 100k-task
+catalog at tens of megabytes. The index is built from the catalog snapshot
+and patched in place from ``catalog.on_catalog_change``; if it ever falls
+behind the snapshot version it is rebuilt.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import unicodedata
+
+from . import catalog
+
+
+_KATAKANA_TO_HIRAGANA = {cp: cp - 0x60 for cp in range(0x30A1, 0x30F7)}
+_TITLE_WEIGHT = 2.0
+_DESCRIPTION_WEIGHT = 1.0
+_TITLE_SUBSTRING_BONUS = 1.0
+
+
+def normalize(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).translate(_KATAKANA_TO_HIRAGANA).casefold()
+    return "".join(text.split())
+
+
+def bigrams(normalized: str) -> Set[str]:
+    return {normalized[i : i + 2] for i in range(len(normalized) - 1)}
+
+
+def _insert(postings: Dict[str, array], gram: str, task_id: int) -> None:
+    ids = postings.get(gram)
+    if ids is None:
+        postings[gram] = array("l", (task_id,))
+        return
+    if not ids or ids[-1] < task_id:
+        ids.append(task_id)
+        return
+    i = bisect_left(ids, task_id)
+    if i == len(ids) or ids[i] != task_id:
+        ids.insert(i, task_id)
+
+
+def _remove(postings: Dict[str, array], gram: str, task_id: int) -> None:
+    ids = postings.get(gram)
+    if ids is None:
+        return
+    i = bisect_left(ids, task_id)
+    if i < len(ids) and ids[i] == task_id:
+        ids.pop(i)
+        if not ids:
+            del postings[gram]
+
+
+class SearchIndex:
+    def __init__(self, version: int = -1) -> None:
+        self.version = version
+        self._title: Dict[str, array] = {}
+        self._description: Dict[str, array] = {}
+        # id -> normalized title/description, needed to unindex and to rank.
+        self._docs: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str, Optional[str]]], version: int) -> "SearchIndex":
+        index = cls(version)
+        for task_id, title, description in sorted(rows, key=lambda r: r[0]):
+            index._add(task_id, title, description)
+        return index
+
+    def _add(self, task_id: int, title: Optional[str], description: Optional[str]) -> None:
+        if task_id in self._docs:
+            self._discard(task_id)
+        norm_title, norm_description = normalize(title), normalize(description)
+        self._docs[task_id] = (norm_title, norm_description)
+        for gram in bigrams(norm_title):
+            _insert(self._title, gram, task_id)
+        for gram in bigrams(norm_description):
+            _insert(self._description, gram, task_id)
+
+    def _discard(self, task_id: int) -> None:
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        for gram in bigrams(doc[0]):
+            _remove(self._title, gram, task_id)
+        for gram in bigrams(doc[1]):
+            _remove(self._description, gram, task_id)
+
+    def apply(self, version: int, upserts: list, deleted: Set[int]) -> None:
+        with self._lock:
+            for task_id in deleted:
+                self._discard(task_id)
+            for task_id, title, description in upserts:
+                self._add(task_id, title, description)
+            self.version = version
+
+    def search(self, q: str) -> List[int]:
+        """Task ids matching ``q``, most relevant first (ties by id)."""
+        return [task_id for task_id, _ in self.ranked(q)]
+
+    def ranked(self, q: str) -> List[Tuple[int, float]]:
+        """``(task_id, relevance)`` for tasks matching ``q``, in ``search`` order."""
+        needle = normalize(q)
+        if not needle:
+            return []
+        with self._lock:
+            if len(needle) == 1:
+                # A single character has no bigram; scan the normalized docs.
+                scored = {
+                    task_id: (_TITLE_WEIGHT if needle in t else 0.0)
+                    + (_DESCRIPTION_WEIGHT if needle in d else 0.0)
+                    for task_id, (t, d) in self._docs.items()
+                    if needle in t or needle in d
+                }
+            else:
+                scored = self._score(needle)
+        return sorted(scored.items(), key=lambda hit: (-hit[1], hit[0]))
+
+    def _score(self, needle: str) -> Dict[int, float]:
+        grams = bigrams(needle)
+        empty = array("l")
+        postings = {
+            g: (self._title.get(g, empty), self._description.get(g, empty)) for g in grams
+        }
+        candidates: Optional[Set[int]] = None
+        # Intersect from the rarest gram so the working set shrinks fastest.
+        for title_ids, description_ids in sorted(postings.values(), key=lambda p: len(p[0]) + len(p[1])):
+            hits = set(title_ids)
+            hits.update(description_ids)
+            candidates = hits if candidates is None else candidates & hits
+            if not candidates:
+                return {}
+        title_hits: Counter = Counter()
+        description_hits: Counter = Counter()
+        for title_ids, description_ids in postings.values():
+            title_hits.update(i for i in title_ids if i in candidates)
+            description_hits.update(i for i in description_ids if i in candidates)
+        n = len(grams)
+        return {
+            task_id: (_TITLE_WEIGHT * title_hits[task_id] + _DESCRIPTION_WEIGHT * description_hits[task_id]) / n
+            + (_TITLE_SUBSTRING_BONUS if needle in self._docs[task_id][0] else 0.0)
+            for task_id in candidates
+        }
+
+
+_index = SearchIndex()
+_build_lock = threading.Lock()
+
+
+def get_index(snap: catalog.CatalogSnapshot) -> SearchIndex:
+    """Return an index at least as new as ``snap``, rebuilding it if it fell behind."""
+    global _index
+    if _index.version >= snap.version:
+        return _index
+    with _build_lock:
+        if _index.version < snap.version:
+            _index = SearchIndex.build(
+                ((t.id, t.title, t.description) for t in snap.tasks), snap.version
+            )
+        return _index
+
+
+@catalog.on_catalog_change
+def _apply_catalog_change(version: int, upserts: list, deleted: Set[int]) -> None:
+    # Only patch an index that was current; a stale one is rebuilt on next use.
+    if _index.version == version - 1:
+        _index.apply(version, upserts, deleted)
+
+
+def find(
+    snap: catalog.CatalogSnapshot, q: Optional[str], category_id: Optional[int]
+) -> List[Tuple[int, float]]:
+    """``(snapshot position, relevance)`` for a catalog search: ranked by
+    relevance when ``q`` is given, otherwise in id order with relevance 0."""
+    if q and q.strip():
+        hits = [
+            (snap.position_by_id[task_id], score)
+            for task_id, score in get_index(snap).ranked(q)
+            if task_id in snap.position_by_id
+        ]
+    else:
+        hits = [(i, 0.0) for i in range(len(snap.tasks))]
+    if category_id:
+        return [hit for hit in hits if snap.tasks[hit[0]].category_id == category_id]
+    return hits
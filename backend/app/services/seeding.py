@@ -0,0 +1,224 @@
+"""Set-based catalog seeding shared by ``scripts/load_data.py`` and ``/admin/init-data``.
+
+The seed is diffed against the database with one SELECT per table, then the
+differences are written in bulk:
+
+* categories: multi-row ``INSERT ... ON CONFLICT DO NOTHING`` on ``name``,
+* challenges and catalog tasks: on psycopg2, ``execute_values`` for the
+  INSERT of new ``(category, title)`` pairs and for an
+  ``UPDATE ... FROM (VALUES ...)`` of rows whose description or difficulty
+  changed; other drivers fall back to a Core executemany.
+
+Catalog tasks mirror the resulting challenge set, matched on
+``(category_id, title)``; the diff is done in Python rather than with a
+correlated ``NOT EXISTS`` so it stays linear without a supporting index.
+
+Everything runs in the caller's transaction. Once it has committed, a caller
+in the app process passes the report's ``task_changes`` (the catalog task rows
+inserted or updated, nothing is deleted) to
+``catalog.publish_catalog_change`` when ``changed`` is set, so the search
+index is patched rather than rebuilt.
+"""
+
+import time
+from typing import Dict, Iterable, List, Sequence
+
+from sqlalchemy import bindparam, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from ..models import Category, Challenge, Task
+
+
+CHUNK_SIZE = 5000
+
+
+def _insert_ignore(conn: Connection, table, rows: List[dict], *index_elements) -> None:
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table).on_conflict_do_nothing(index_elements=list(index_elements))
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table).on_conflict_do_nothing(index_elements=list(index_elements))
+    else:
+        stmt = insert(table)
+    conn.execute(stmt, rows)
+
+
+def _uses_execute_values(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+
+
+def _bulk_insert(conn: Connection, model, rows: List[dict], returning: Sequence[str] = ()) -> list:
+    """Insert ``rows``; returns the ``returning`` columns of the new rows, in
+    no particular order."""
+    if not rows:
+        return []
+    if _uses_execute_values(conn):
+        from psycopg2.extras import execute_values
+
+        columns = list(rows[0])
+        suffix = f" RETURNING {', '.join(returning)}" if returning else ""
+        with conn.connection.cursor() as cur:
+            return execute_values(
+                cur,
+                f"INSERT INTO {model.__tablename__} ({', '.join(columns)}) VALUES %s{suffix}",
+                [tuple(r[c] for c in columns) for r in rows],
+                page_size=CHUNK_SIZE,
+                fetch=bool(returning),
+            ) or []
+    if not returning:
+        conn.execute(insert(model), rows)
+        return []
+    table = model.__table__
+    return [tuple(row) for row in conn.execute(insert(table).returning(*(table.c[name] for name in returning)), rows)]
+
+
+def _bulk_update(conn: Connection, model, rows: List[dict]) -> None:
+    """Set description/difficulty for rows given as dicts with id/description/difficulty."""
+    if not rows:
+        return
+    if _uses_execute_values(conn):
+        from psycopg2.extras import execute_values
+
+        with conn.connection.cursor() as cur:
+            execute_values(
+                cur,
+                f"UPDATE {model.__tablename__} AS t"
+                " SET description = v.description, difficulty = v.difficulty"
+                " FROM (VALUES %s) AS v (id, description, difficulty)"
+                " WHERE t.id = v.id",
+                [(r["id"], r["description"], r["difficulty"]) for r in rows],
+                page_size=CHUNK_SIZE,
+            )
+        return
+    table = model.__table__
+    conn.execute(
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values(description=bindparam("_description"), difficulty=bindparam("_difficulty")),
+        [
+            {"_id": r["id"], "_description": r["description"], "_difficulty": r["difficulty"]}
+            for r in rows
+        ],
+    )
+
+
+def _diff(existing: Dict[tuple, tuple], wanted: Dict[tuple, tuple]):
+    """Split ``wanted`` {(category_id, title): (description, difficulty)} against
+    ``existing`` {(category_id, title): (id, description, difficulty)}."""
+    to_insert, to_update = [], []
+    for (category_id, title), (description, difficulty) in wanted.items():
+        found = existing.get((category_id, title))
+        if found is None:
+            to_insert.append(
+                {
+                    "category_id": category_id,
+                    "title": title,
+                    "description": description,
+                    "difficulty": difficulty,
+                }
+            )
+        elif found[1:] != (description, difficulty):
+            to_update.append({"id": found[0], "description": description, "difficulty": difficulty})
+    return to_insert, to_update
+
+
+def seed_catalog(conn: Connection, seed: Iterable[dict]) -> dict:
+    """Upsert ``seed`` (dicts with category/title/description/difficulty) and
+    mirror challenges into catalog tasks. Returns counts and per-phase timings."""
+    timings: Dict[str, float] = {}
+    report: Dict[str, object] = {"timings_ms": timings}
+    clock = time.perf_counter()
+
+    def lap(phase: str) -> None:
+        nonlocal clock
+        now = time.perf_counter()
+        timings[phase] = round((now - clock) * 1000, 1)
+        clock = now
+
+    # Last occurrence wins when the seed repeats a (category, title) pair.
+    wanted: Dict[tuple, dict] = {}
+    for t in seed:
+        if t.get("category") and t.get("title"):
+            wanted[(t["category"], t["title"])] = t
+    lap("prepare")
+
+    category_ids = dict(conn.execute(select(Category.name, Category.id)).all())
+    missing = sorted({name for name, _ in wanted} - category_ids.keys())
+    _insert_ignore(conn, Category, [{"name": name} for name in missing], "name")
+    if missing:
+        category_ids = dict(conn.execute(select(Category.name, Category.id)).all())
+    report["categories_inserted"] = len(missing)
+    lap("categories")
+
+    challenges = {
+        (category_id, title): (challenge_id, description, difficulty)
+        for challenge_id, category_id, title, description, difficulty in conn.execute(
+            select(
+                Challenge.id,
+                Challenge.category_id,
+                Challenge.title,
+                Challenge.description,
+                Challenge.difficulty,
+            ).order_by(Challenge.id)
+        )
+    }
+    seeded = {
+        (category_ids[category_name], title): (t.get("description"), int(t.get("difficulty") or 1))
+        for (category_name, title), t in wanted.items()
+    }
+    to_insert, to_update = _diff(challenges, seeded)
+    lap("diff")
+
+    _bulk_insert(conn, Challenge, to_insert)
+    _bulk_update(conn, Challenge, to_update)
+    report["challenges_inserted"] = len(to_insert)
+    report["challenges_updated"] = len(to_update)
+    lap("challenges")
+
+    # Catalog tasks mirror every challenge, seeded in this run or not.
+    mirrored = {key: found[1:] for key, found in challenges.items()}
+    mirrored.update(seeded)
+    catalog_tasks = {
+        (category_id, title): (task_id, description, difficulty)
+        for task_id, category_id, title, description, difficulty in conn.execute(
+            select(Task.id, Task.category_id, Task.title, Task.description, Task.difficulty)
+            .where(Task.source == "catalog")
+        )
+    }
+    tasks_insert, tasks_update = _diff(catalog_tasks, mirrored)
+    task_upserts = _bulk_insert(
+        conn, Task, [dict(row, source="catalog") for row in tasks_insert], ("id", "title", "description")
+    )
+    _bulk_update(conn, Task, tasks_update)
+    titles = {found[0]: title for (_, title), found in catalog_tasks.items()}
+    task_upserts.extend((r["id"], titles[r["id"]], r["description"]) for r in tasks_update)
+    # Not part of the JSON report: the (id, title, description) rows for
+    # catalog.publish_catalog_change, which patches the search index.
+    report["task_changes"] = (task_upserts, set())
+    report["tasks_inserted"] = len(tasks_insert)
+    report["tasks_updated"] = len(tasks_update)
+    lap("tasks")
+
+    report["changed"] = bool(missing or to_insert or to_update or tasks_insert or tasks_update)
+    timings["total"] = round(sum(timings.values()), 1)
+    return report
+
+
+def mirror_challenges_if_empty(conn: Connection) -> int:
+    """Copy every challenge into catalog tasks when the tasks table is empty.
+
+    One ``INSERT ... SELECT`` guarded by an uncorrelated ``NOT EXISTS``, so the
+    emptiness check and the copy are a single round trip done in the database.
+    """
+    ch = Challenge.__table__
+    return conn.execute(
+        insert(Task).from_select(
+            ["title", "description", "difficulty", "category_id", "source"],
+            select(ch.c.title, ch.c.description, ch.c.difficulty, ch.c.category_id, literal("catalog"))
+            .where(~select(Task.__table__.c.id).exists())
+            .order_by(ch.c.id),
+        )
+    ).rowcount
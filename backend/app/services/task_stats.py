@@ -0,0 +1,255 @@
+"""Per-task completion statistics for the daily task endpoints.
+
+``task_stats.completed_users`` counts the distinct users who logged each
+catalog task, and the ``active_users`` row of ``stats_counters`` counts the
+users who logged anything; a task's completion rate is their ratio. The log
+writers maintain both in the log's own transaction. ``create_log`` learns
+from its task lookup whether this is the user's first log of the task (and
+their first log at all) and only then runs an upsert, so repeat logs cost
+nothing extra. ``/logs/batch`` runs one upsert per counter for the rows it
+inserted. The upserts return the new totals, which are written into this
+process's cache after commit.
+
+Readers get the counters of every catalog task from an in-process cache,
+loaded with one query and reloaded after ``TASK_STATS_CACHE_TTL_SECONDS`` so
+that counts written through other workers show up; ``achievements`` is never
+scanned on a request. Two concurrent first logs of the same task by the same
+user can both be counted, so ``reconcile`` (``python -m
+scripts.reconcile_task_stats``, run periodically) recomputes the exact values
+and corrects any drift.
+"""
+
+import asyncio
+from dataclasses import dataclass
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, distinct, exists, func, insert, literal, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import TASK_STATS_CACHE_TTL_SECONDS
+from ..models import Achievement, StatsCounter, Task, TaskStats
+
+
+ACTIVE_USERS = "active_users"
+
+
+def _upsert(dialect: str, model):
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise ValueError(f"No upsert for dialect {dialect!r}")
+
+
+def log_target_statement(user_id: str, task_id: int):
+    """The task a new log refers to (source, owner) and whether the user has
+    logged it, or anything, before. Run before inserting the log."""
+    return select(
+        Task.source,
+        Task.owner_user_id,
+        exists().where(Achievement.user_id == user_id, Achievement.task_id == task_id),
+        exists().where(Achievement.user_id == user_id),
+    ).where(Task.id == task_id)
+
+
+def _add_completions(dialect: str, rows):
+    stmt = _upsert(dialect, TaskStats)
+    if isinstance(rows, (dict, list)):
+        stmt = stmt.values(rows)
+    else:
+        stmt = stmt.from_select(["task_id", "completed_users"], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[TaskStats.task_id],
+        set_={"completed_users": TaskStats.completed_users + stmt.excluded.completed_users},
+    ).returning(TaskStats.task_id, TaskStats.completed_users)
+
+
+def _add_active_users(dialect: str, rows):
+    stmt = _upsert(dialect, StatsCounter)
+    stmt = stmt.values(rows) if isinstance(rows, dict) else stmt.from_select(["name", "value"], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[StatsCounter.name],
+        set_={"value": StatsCounter.value + stmt.excluded.value},
+    ).returning(StatsCounter.value)
+
+
+def first_completion_statement(dialect: str, task_id: int):
+    """Count one more user for ``task_id``; returns ``(task_id, completed_users)``."""
+    return _add_completions(dialect, {"task_id": task_id, "completed_users": 1})
+
+
+def first_completions_statement(dialect: str, task_ids: Iterable[int]):
+    """Count one more user for each of ``task_ids`` (non-empty); returns
+    ``(task_id, completed_users)`` rows. For writers that already know which
+    tasks are new to the user."""
+    return _add_completions(dialect, [{"task_id": task_id, "completed_users": 1} for task_id in task_ids])
+
+
+def first_log_statement(dialect: str):
+    """Count one more active user; returns the new total."""
+    return _add_active_users(dialect, {"name": ACTIVE_USERS, "value": 1})
+
+
+def batch_completions_statement(dialect: str, user_id: str, achievement_ids: Iterable[str]):
+    """Count the user for each catalog task among the just-inserted
+    ``achievement_ids`` that they had not logged before."""
+    ids = list(achievement_ids)
+    earlier = Achievement.__table__.alias("earlier")
+    rows = (
+        select(Achievement.task_id, literal(1))
+        .join(Task, Task.id == Achievement.task_id)
+        .where(
+            Achievement.id.in_(ids),
+            Task.source == "catalog",
+            ~exists().where(
+                earlier.c.user_id == user_id,
+                earlier.c.task_id == Achievement.task_id,
+                earlier.c.id.not_in(ids),
+            ),
+        )
+        .distinct()
+    )
+    return _add_completions(dialect, rows)
+
+
+def batch_first_log_statement(dialect: str, user_id: str, achievement_ids: Iterable[str]):
+    """Count the user as active unless they had logs before ``achievement_ids``."""
+    rows = select(literal(ACTIVE_USERS), literal(1)).where(
+        ~exists().where(Achievement.user_id == user_id, Achievement.id.not_in(list(achievement_ids)))
+    )
+    return _add_active_users(dialect, rows)
+
+
+class TaskStatsCache:
+    """Counters of every catalog task, replaced wholesale on reload and
+    patched in place by local writes."""
+
+    def __init__(self, ttl: float = TASK_STATS_CACHE_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._completed: Dict[int, int] = {}
+        self._active_users = 0
+        self._loaded_at: Optional[float] = None
+
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.ttl <= 0 or time.monotonic() - self._loaded_at < self.ttl
+
+    def install(self, rows) -> None:
+        completed, active_users = {}, 0
+        for task_id, completed_users, total in rows:
+            completed[task_id] = completed_users
+            active_users = total or 0
+        with self._lock:
+            self._completed = completed
+            self._active_users = active_users
+            self._loaded_at = time.monotonic()
+
+    def update(self, completed: Dict[int, int], active_users: Optional[int] = None) -> None:
+        """Apply totals returned by a committed write."""
+        with self._lock:
+            self._completed.update(completed)
+            if active_users is not None:
+                self._active_users = active_users
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def for_task(self, task_id: int) -> dict:
+        """``DailyTaskStats`` for ``task_id``; zero for tasks nobody has
+        logged and for "my" tasks, which are private and not counted."""
+        completed_users = self._completed.get(task_id, 0)
+        active_users = self._active_users
+        rate = min(1.0, completed_users / active_users) if active_users else 0.0
+        return {"completion_rate": round(rate, 4), "completed_users": completed_users}
+
+
+cache = TaskStatsCache()
+_load_lock = threading.Lock()
+_async_load_lock: Optional[asyncio.Lock] = None
+
+
+def load_statement():
+    active_users = (
+        select(StatsCounter.value).where(StatsCounter.name == ACTIVE_USERS).scalar_subquery()
+    )
+    return select(TaskStats.task_id, TaskStats.completed_users, active_users)
+
+
+def get_cache(db: Session) -> TaskStatsCache:
+    """The counters cache, reloaded through ``db`` (one query) if stale."""
+    if not cache.is_fresh():
+        with _load_lock:
+            if not cache.is_fresh():
+                cache.install(db.execute(load_statement()).all())
+    return cache
+
+
+async def get_cache_async(db: AsyncSession) -> TaskStatsCache:
+    global _async_load_lock
+    if cache.is_fresh():
+        return cache
+    if _async_load_lock is None:
+        _async_load_lock = asyncio.Lock()
+    async with _async_load_lock:
+        if not cache.is_fresh():
+            result = await db.execute(load_statement())
+            cache.install(result.all())
+    return cache
+
+
+@dataclass
+class ReconcileReport:
+    tasks: int = 0
+    corrected: int = 0
+    active_users_before: Optional[int] = None
+    active_users: int = 0
+    seconds: float = 0.0
+
+
+def reconcile(engine: Engine) -> ReconcileReport:
+    """Recompute every counter from ``achievements`` in one transaction and
+    rewrite the rows that drifted."""
+    start = time.perf_counter()
+    report = ReconcileReport()
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Hold back counter writes until commit so a log written meanwhile
+            # is counted either here or by its writer, not both or neither.
+            conn.execute(text("LOCK TABLE task_stats, stats_counters IN SHARE ROW EXCLUSIVE MODE"))
+        # IN rather than a join: SQLite would loop over the catalog tasks and
+        # scan achievements once per task.
+        exact = dict(
+            conn.execute(
+                select(Achievement.task_id, func.count(distinct(Achievement.user_id)))
+                .where(Achievement.task_id.in_(select(Task.id).where(Task.source == "catalog")))
+                .group_by(Achievement.task_id)
+            ).all()
+        )
+        current = dict(conn.execute(select(TaskStats.task_id, TaskStats.completed_users)).all())
+        drifted = [task_id for task_id in current.keys() | exact.keys() if current.get(task_id) != exact.get(task_id)]
+        if drifted:
+            conn.execute(delete(TaskStats).where(TaskStats.task_id.in_(drifted)))
+            rows = [{"task_id": t, "completed_users": exact[t]} for t in drifted if t in exact]
+            if rows:
+                conn.execute(insert(TaskStats), rows)
+        report.tasks = len(exact)
+        report.corrected = len(drifted)
+
+        report.active_users_before = conn.execute(
+            select(StatsCounter.value).where(StatsCounter.name == ACTIVE_USERS)
+        ).scalar()
+        report.active_users = conn.execute(select(func.count(distinct(Achievement.user_id)))).scalar() or 0
+        if report.active_users_before != report.active_users:
+            conn.execute(delete(StatsCounter).where(StatsCounter.name == ACTIVE_USERS))
+            conn.execute(insert(StatsCounter).values(name=ACTIVE_USERS, value=report.active_users))
+    cache.invalidate()
+    report.seconds = round(time.perf_counter() - start, 2)
+    return report
@@ -0,0 +1,401 @@
+"""Export and import of one user's history: "my" tasks, logs and stocks.
+
+``export`` streams the user's rows as NDJSON (one JSON object per line) or
+CSV (one row per record under the ``COLUMNS`` header). Each record carries a
+``type`` (``my_task``, ``log`` or ``stock``). "My" tasks come first, then
+logs oldest first, then stocks, so an import meets every task before the logs
+that refer to it. The three queries run through server-side cursors
+(``yield_per``), so memory does not grow with the size of the history. On
+Postgres they share one REPEATABLE READ snapshot.
+
+``import_records`` ingests such a stream for another or the same user, in
+chunks of ``IMPORT_CHUNK_ROWS`` records, with one transaction per chunk. The
+writes are bulk inserts that skip rows already present, so an interrupted
+import can simply be sent again:
+
+- A "my" task is matched to an existing one of the user by (title,
+  created_at) and otherwise created under a new id. Logs and stocks that
+  refer to its exported id are mapped to that id.
+- A log keeps its exported id unless another user's log already has it. Then
+  it gets an id derived from (user, exported id), which is stable across
+  imports. Its daily rollup and completion counters are updated in the
+  chunk's transaction; first completions are found from the user's logged
+  task ids, loaded once per import.
+- A stock of a task the user has already stocked counts as ``exists``.
+
+Each chunk that creates rows bumps the user's watermarks for them
+(``services/watermarks.py``) in its transaction.
+
+Logs and stocks of unknown catalog tasks, or of "my" tasks missing from the
+stream, are counted as ``skipped``. In CSV, empty cells read as null.
+"""
+
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+import io
+from itertools import islice
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.json_response import dump_json
+from ..models import Achievement, Stock, Task
+from . import catalog, completions, rollups, task_stats, watermarks
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover - optional speedup
+    from json import loads as _loads
+
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+COLUMNS = ("type", "id", "task_id", "title", "description", "memo", "photo_url", "rating", "feeling", "at")
+# Rows per server-side cursor fetch and per response chunk.
+EXPORT_BATCH_ROWS = 2000
+IMPORT_CHUNK_ROWS = 1000
+
+_IMPORTED_LOG_NAMESPACE = uuid.UUID("0b8e2f4c-7d3a-4c61-a5e9-2f6d8c1b4a70")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def _insert_ignore(dialect: str, model, *index_elements):
+    # On the Core table: executed with a list of rows, it is batched into
+    # multi-row INSERTs (the ORM would run one INSERT per row with RETURNING).
+    if dialect == "postgresql":
+        return postgresql.insert(model.__table__).on_conflict_do_nothing(index_elements=list(index_elements))
+    if dialect == "sqlite":
+        return sqlite.insert(model.__table__).on_conflict_do_nothing(index_elements=list(index_elements))
+    raise ValueError(f"No insert-ignore for dialect {dialect!r}")
+
+
+def _sections(user_id: str):
+    return (
+        (
+            "my_task",
+            ("id", "title", "description", "at"),
+            select(Task.id, Task.title, Task.description, Task.created_at)
+            .where(Task.source == "my", Task.owner_user_id == user_id)
+            .order_by(Task.id),
+        ),
+        (
+            "log",
+            ("id", "task_id", "memo", "photo_url", "rating", "feeling", "at"),
+            select(
+                Achievement.id,
+                Achievement.task_id,
+                Achievement.memo,
+                Achievement.photo_url,
+                Achievement.rating,
+                Achievement.feeling,
+                Achievement.achieved_at,
+            )
+            .where(Achievement.user_id == user_id)
+            .order_by(Achievement.achieved_at, Achievement.id),
+        ),
+        (
+            "stock",
+            ("task_id", "at"),
+            select(Stock.task_id, Stock.created_at).where(Stock.user_id == user_id).order_by(Stock.created_at),
+        ),
+    )
+
+
+def _ndjson(kind: str, keys, rows) -> bytes:
+    return b"".join(dump_json({"type": kind, **dict(zip(keys, row))}) + b"\n" for row in rows)
+
+
+def _csv(kind: str, keys, rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    positions = [COLUMNS.index(key) for key in keys]
+    for row in rows:
+        out = [kind] + [""] * (len(COLUMNS) - 1)
+        for position, value in zip(positions, row):
+            if value is not None:
+                out[position] = value.isoformat() if isinstance(value, datetime) else value
+        writer.writerow(out)
+    return buffer.getvalue().encode("utf-8")
+
+
+def export(db: Session, user_id: str, fmt: str) -> Iterator[bytes]:
+    """The user's history in ``fmt`` (a key of ``FORMATS``), one chunk of
+    up to ``EXPORT_BATCH_ROWS`` records at a time."""
+    encode = _ndjson if fmt == "ndjson" else _csv
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    if fmt == "csv":
+        yield (",".join(COLUMNS) + "\r\n").encode("utf-8")
+    for kind, keys, query in _sections(user_id):
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        for partition in result.partitions():
+            yield encode(kind, keys, partition)
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Split a byte stream into decoded lines, line endings kept."""
+    rest = b""
+    for chunk in chunks:
+        rest += chunk
+        *lines, rest = rest.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8") + "\n"
+    if rest:
+        yield rest.decode("utf-8")
+
+
+def _int(value, line: int, name: str) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ImportFormatError(f"line {line}: {name} must be an integer") from None
+
+
+# Fields that are text or null; ``id`` may also be an integer (my task ids).
+_TEXT = ("title", "description", "memo", "photo_url", "feeling")
+
+
+def _record(fields: dict, line: int) -> dict:
+    """Validate one parsed record; empty strings become null."""
+    kind = fields.get("type")
+    if kind not in ("my_task", "log", "stock"):
+        raise ImportFormatError(f"line {line}: unknown record type {kind!r}")
+    record = {k: (None if v == "" else v) for k, v in fields.items() if k in COLUMNS}
+    for name in _TEXT:
+        if not isinstance(record.get(name), (str, type(None))):
+            raise ImportFormatError(f"line {line}: {name} must be a string")
+    if isinstance(record.get("id"), bool) or not isinstance(record.get("id"), (str, int, type(None))):
+        raise ImportFormatError(f"line {line}: id must be a string or an integer")
+    required = {"my_task": ("id", "title", "at"), "log": ("id", "task_id", "at"), "stock": ("task_id", "at")}[kind]
+    missing = [name for name in required if record.get(name) is None]
+    if missing:
+        raise ImportFormatError(f"line {line}: a {kind} needs {', '.join(missing)}")
+    try:
+        record["at"] = datetime.fromisoformat(record["at"])
+    except (TypeError, ValueError):
+        raise ImportFormatError(f"line {line}: at must be an ISO 8601 datetime") from None
+    record["task_id"] = _int(record.get("task_id"), line, "task_id")
+    record["rating"] = _int(record.get("rating"), line, "rating")
+    if record.get("id") is not None:
+        record["id"] = str(record["id"])
+    return record
+
+
+def parse(chunks: Iterable[bytes], fmt: str) -> Iterator[dict]:
+    """Records from an upload in ``fmt``; raises ``ImportFormatError`` at
+    the first malformed one."""
+    lines = _lines(chunks)
+    if fmt == "ndjson":
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                fields = _loads(line)
+            except ValueError:
+                raise ImportFormatError(f"line {number}: not valid JSON") from None
+            if not isinstance(fields, dict):
+                raise ImportFormatError(f"line {number}: expected a JSON object")
+            yield _record(fields, number)
+        return
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    if "type" not in header:
+        raise ImportFormatError("line 1: CSV header must include a type column")
+    for row in reader:
+        if row:
+            yield _record(dict(zip(header, row)), reader.line_num)
+
+
+@dataclass
+class ImportCounts:
+    created: int = 0
+    exists: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class ImportReport:
+    my_tasks: ImportCounts = field(default_factory=ImportCounts)
+    logs: ImportCounts = field(default_factory=ImportCounts)
+    stocks: ImportCounts = field(default_factory=ImportCounts)
+
+
+def imported_log_id(user_id: str, exported_id: str) -> str:
+    return str(uuid.uuid5(_IMPORTED_LOG_NAMESPACE, f"{user_id}\x00{exported_id}"))
+
+
+class _Importer:
+    def __init__(self, db: Session, user_id: str) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.dialect = db.get_bind().dialect.name
+        self.catalog_ids = catalog.get_snapshot(db).position_by_id
+        # Tasks the user has logged, to find first completions without
+        # asking the database per chunk.
+        self.logged_tasks = set(db.scalars(completions.completed_task_ids_statement(user_id)))
+        self.has_logs = bool(self.logged_tasks)
+        # Exported "my" task id -> the user's task id here.
+        self.my_tasks: Dict[str, int] = {}
+        self.report = ImportReport()
+        # Counter totals and logged task ids of the open chunk, applied to
+        # the in-process caches after it commits.
+        self.completed: Dict[int, int] = {}
+        self.active_users: Optional[int] = None
+        self.chunk_tasks: Set[int] = set()
+
+    def task_id(self, record: dict) -> Optional[int]:
+        mapped = self.my_tasks.get(str(record["task_id"]))
+        if mapped is not None:
+            return mapped
+        return record["task_id"] if record["task_id"] in self.catalog_ids else None
+
+    def add_my_tasks(self, records: List[dict]) -> None:
+        existing = {}
+        for task_id, title, created_at in self.db.execute(
+            select(Task.id, Task.title, Task.created_at).where(
+                Task.source == "my",
+                Task.owner_user_id == self.user_id,
+                Task.title.in_({r["title"] for r in records}),
+            )
+        ):
+            existing.setdefault((title, created_at), task_id)
+        new = []
+        for r in records:
+            task_id = existing.get((r["title"], r["at"]))
+            if task_id is None:
+                new.append(r)
+            else:
+                self.my_tasks[r["id"]] = task_id
+        self.report.my_tasks.exists += len(records) - len(new)
+        if not new:
+            return
+        rows = [
+            {
+                "title": r["title"],
+                "description": r.get("description"),
+                "source": "my",
+                "owner_user_id": self.user_id,
+                "created_at": r["at"],
+            }
+            for r in new
+        ]
+        stmt = insert(Task.__table__).returning(Task.id, sort_by_parameter_order=True)
+        for r, task_id in zip(new, self.db.connection().scalars(stmt, rows)):
+            self.my_tasks[r["id"]] = task_id
+        self.report.my_tasks.created += len(new)
+        self.db.execute(watermarks.bump_statement(self.dialect, self.user_id, [watermarks.MY_TASKS]))
+
+    def add_logs(self, records: List[dict]) -> None:
+        rows, skipped = {}, 0
+        for r in records:
+            task_id = self.task_id(r)
+            if task_id is None:
+                skipped += 1
+                continue
+            rows.setdefault(
+                r["id"],
+                {
+                    "id": r["id"],
+                    "user_id": self.user_id,
+                    "task_id": task_id,
+                    "memo": r.get("memo"),
+                    "photo_url": r.get("photo_url"),
+                    "rating": r["rating"],
+                    "feeling": r.get("feeling"),
+                    "achieved_at": r["at"],
+                },
+            )
+        self.report.logs.skipped += skipped
+        if not rows:
+            return
+        # Ids held by another user's logs are imported under derived ids;
+        # look both up so that re-imports insert nothing.
+        derived = {log_id: imported_log_id(self.user_id, log_id) for log_id in rows}
+        owners = dict(
+            self.db.execute(
+                select(Achievement.id, Achievement.user_id).where(
+                    Achievement.id.in_([*rows, *derived.values()])
+                )
+            ).all()
+        )
+        new = []
+        for log_id, row in rows.items():
+            owner = owners.get(log_id)
+            if owner is None:
+                new.append(row)
+            elif owner != self.user_id and derived[log_id] not in owners:
+                new.append({**row, "id": derived[log_id]})
+        inserted = {}
+        if new:
+            stmt = _insert_ignore(self.dialect, Achievement, "id").returning(Achievement.id, Achievement.task_id)
+            inserted = dict(self.db.connection().execute(stmt, new).all())
+        self.report.logs.created += len(inserted)
+        self.report.logs.exists += len(records) - skipped - len(inserted)
+        if not inserted:
+            return
+        self.db.execute(rollups.increment_statement(self.dialect, inserted))
+        self.db.execute(watermarks.bump_logs_statement(self.dialect, self.user_id, inserted))
+        first = {task_id for task_id in inserted.values() if task_id in self.catalog_ids} - self.logged_tasks
+        if first:
+            self.completed.update(
+                self.db.execute(task_stats.first_completions_statement(self.dialect, sorted(first))).all()
+            )
+        if not self.has_logs:
+            self.active_users = self.db.execute(task_stats.first_log_statement(self.dialect)).scalar_one()
+            self.has_logs = True
+        self.logged_tasks.update(inserted.values())
+        self.chunk_tasks.update(inserted.values())
+
+    def add_stocks(self, records: List[dict]) -> None:
+        rows, skipped = {}, 0
+        for r in records:
+            task_id = self.task_id(r)
+            if task_id is None:
+                skipped += 1
+                continue
+            rows.setdefault(
+                task_id,
+                {"id": str(uuid.uuid4()), "user_id": self.user_id, "task_id": task_id, "created_at": r["at"]},
+            )
+        self.report.stocks.skipped += skipped
+        if not rows:
+            return
+        stmt = _insert_ignore(self.dialect, Stock, "user_id", "task_id").returning(Stock.id)
+        created = len(self.db.connection().scalars(stmt, list(rows.values())).all())
+        if created:
+            self.db.execute(watermarks.bump_statement(self.dialect, self.user_id, [watermarks.STOCK]))
+        self.report.stocks.created += created
+        self.report.stocks.exists += len(records) - skipped - created
+
+    def add_chunk(self, records: List[dict]) -> None:
+        self.completed, self.active_users, self.chunk_tasks = {}, None, set()
+        for kind, add in (("my_task", self.add_my_tasks), ("log", self.add_logs), ("stock", self.add_stocks)):
+            batch = [r for r in records if r["type"] == kind]
+            if batch:
+                add(batch)
+        self.db.commit()
+        for task_id in self.chunk_tasks:
+            completions.record_completion(self.user_id, task_id)
+        task_stats.cache.update(self.completed, self.active_users)
+
+
+def import_records(db: Session, user_id: str, records: Iterable[dict]) -> ImportReport:
+    """Write ``records`` (from ``parse``) for ``user_id``, committing every
+    ``IMPORT_CHUNK_ROWS`` records."""
+    importer = _Importer(db, user_id)
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, IMPORT_CHUNK_ROWS))
+        if not chunk:
+            return importer.report
+        importer.add_chunk(chunk)
@@ -0,0 +1,107 @@
+"""Per-user write watermarks for conditional GETs of ``/logs``, ``/stock`` and ``/my_tasks``.
+
+A ``watermarks`` row counts the writes to one user's resource: ``stock``,
+``my_tasks``, ``logs`` and ``logs:YYYY-MM`` (the month of ``achieved_at``,
+as ``GET /logs?month=`` filters it). Every writer bumps the rows it affects
+in its own transaction with one upsert, ``bump_statement`` or, after
+inserting logs, ``bump_logs_statement``, so a write and its bump commit or
+roll back together.
+
+A list endpoint reads the rows it depends on with ``lookup_statement`` (one
+primary-key range read) before its own query, and derives its ETag from the
+versions plus whatever else shapes the body: the request's paging
+parameters and, for lists that embed task data, the catalog's content hash.
+``my_tasks`` is part of the logs and stock ETags since renaming or deleting
+an own task changes those lists too. When ``If-None-Match`` matches, the
+list query is skipped. Reading the watermark first means a write that
+commits in between can only make the ETag older than the body, which costs
+a 200 later, never a stale 304.
+
+Writes that bypass the writers (``benchmarks/datagen.py``, manual SQL) do
+not move the watermarks; clients then keep their copy until the next write.
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, select, true, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..models import Achievement, Watermark
+from .catalog import make_etag
+
+
+LOGS = "logs"
+STOCK = "stock"
+MY_TASKS = "my_tasks"
+
+_COLUMNS = ("user_id", "resource", "version", "modified_at")
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        return postgresql.insert(Watermark)
+    if dialect == "sqlite":
+        return sqlite.insert(Watermark)
+    raise ValueError(f"No upsert for dialect {dialect!r}")
+
+
+def _on_conflict_bump(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[Watermark.user_id, Watermark.resource],
+        set_={"version": Watermark.version + 1, "modified_at": stmt.excluded.modified_at},
+    )
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def log_month(start: datetime) -> str:
+    """The watermark of the logs in the month starting at ``start``."""
+    return f"{LOGS}:{start:%Y-%m}"
+
+
+def bump_statement(dialect: str, user_id: str, resources: Iterable[str]):
+    """Bump ``resources`` of ``user_id`` (``INSERT ... ON CONFLICT DO
+    UPDATE``). Postgres and SQLite only."""
+    now = _now()
+    stmt = _upsert(dialect).values(
+        [{"user_id": user_id, "resource": resource, "version": 1, "modified_at": now} for resource in resources]
+    )
+    return _on_conflict_bump(stmt)
+
+
+def bump_logs_statement(dialect: str, user_id: str, achievement_ids: Iterable[str]):
+    """Bump ``logs`` and the month of each of ``achievement_ids``, inserted
+    earlier in the same transaction."""
+    if dialect == "postgresql":
+        month = func.to_char(Achievement.achieved_at, "YYYY-MM")
+    else:
+        month = func.strftime("%Y-%m", Achievement.achieved_at)
+    now = _now()
+    rows = union_all(
+        select(literal(user_id), literal(LOGS + ":") + month, literal(1), literal(now))
+        .where(Achievement.id.in_(list(achievement_ids)))
+        .distinct(),
+        # A WHERE keeps SQLite from reading ON CONFLICT as a join constraint.
+        select(literal(user_id), literal(LOGS), literal(1), literal(now)).where(true()),
+    )
+    return _on_conflict_bump(_upsert(dialect).from_select(_COLUMNS, rows))
+
+
+def lookup_statement(user_id: str, resources: Sequence[str]):
+    return select(Watermark.resource, Watermark.version, Watermark.modified_at).where(
+        Watermark.user_id == user_id, Watermark.resource.in_(resources)
+    )
+
+
+def validators(user_id: str, rows, *parts) -> Tuple[str, Optional[datetime]]:
+    """ETag and Last-Modified of a response built from the watermark
+    ``rows`` (from ``lookup_statement``) and ``parts``, the request
+    parameters and anything else the body depends on. A resource never
+    written has no row and counts as version 0."""
+    versions: List[str] = sorted(f"{resource}={version}" for resource, version, _ in rows)
+    key = "\n".join([user_id, *versions, *map(repr, parts)])
+    last_modified = max((modified_at for _, _, modified_at in rows), default=None)
+    return make_etag(key.encode()), last_modified
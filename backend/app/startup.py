@@ -0,0 +1,129 @@
+"""Database bootstrap run before the app serves DB-backed requests.
+
+Phases, each timed and logged on one line:
+
+* schema: ``create_all`` plus pending migrations (``app.migrations``), only
+  when the stored schema fingerprint differs from the models' and the
+  migration head (skips per-table reflection on every boot),
+* mirror: copy challenges into catalog tasks if the tasks table is empty,
+  as one ``INSERT ... SELECT``,
+* warm: load the catalog snapshot and build the search index.
+
+In ``STARTUP_MODE=lazy`` the bootstrap runs on the first request that is not a
+health check, instead of in the startup event.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+from starlette.concurrency import run_in_threadpool
+
+from . import migrations
+from .core.database import Base
+from .models import AppMeta
+from .services import catalog, search, seeding
+
+
+logger = logging.getLogger("uvicorn.error")
+
+SCHEMA_FINGERPRINT_KEY = "schema_fingerprint"
+
+_lock = threading.Lock()
+_done = False
+
+
+def schema_fingerprint(engine: Engine) -> str:
+    """Hash of the DDL the models would emit and of the migration head, so any
+    model change or new migration invalidates it."""
+    digest = hashlib.sha256(f"migrations:{migrations.head()}".encode())
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+
+def _stored_fingerprint(engine: Engine):
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(AppMeta.value).where(AppMeta.key == SCHEMA_FINGERPRINT_KEY)
+            ).scalar()
+    except SQLAlchemyError:
+        # First boot: app_meta does not exist yet.
+        return None
+
+
+def ensure_schema(engine: Engine) -> Optional[List[str]]:
+    """Create missing tables and apply pending migrations unless the schema
+    fingerprint already matches.
+
+    Returns None when skipped, else the migrations applied.
+    """
+    fingerprint = schema_fingerprint(engine)
+    if _stored_fingerprint(engine) == fingerprint:
+        return None
+    Base.metadata.create_all(bind=engine)
+    applied = migrations.migrate(engine)
+    with Session(bind=engine) as db:
+        db.merge(AppMeta(key=SCHEMA_FINGERPRINT_KEY, value=fingerprint))
+        db.commit()
+    return applied
+
+
+def bootstrap(engine: Engine) -> None:
+    global _done
+    with _lock:
+        if _done:
+            return
+        timings = {}
+        clock = start = time.perf_counter()
+
+        def lap(phase: str) -> None:
+            nonlocal clock
+            now = time.perf_counter()
+            timings[phase] = (now - clock) * 1000
+            clock = now
+
+        applied = ensure_schema(engine)
+        lap("schema")
+        with engine.begin() as conn:
+            mirrored = seeding.mirror_challenges_if_empty(conn)
+        if mirrored:
+            catalog.bump_catalog_version()
+        lap("mirror")
+        with Session(bind=engine) as db:
+            search.get_index(catalog.get_snapshot(db))
+        lap("warm")
+
+        logger.info(
+            "startup: %s total=%.1fms (create_all=%s, migrations=%s, mirrored=%d)",
+            " ".join(f"{phase}={ms:.1f}ms" for phase, ms in timings.items()),
+            (time.perf_counter() - start) * 1000,
+            "skipped" if applied is None else "ran",
+            ",".join(applied) if applied else "none",
+            mirrored,
+        )
+        _done = True
+
+
+class DeferredBootstrapMiddleware:
+    """Run ``bootstrap`` before the first request that is not a health check."""
+
+    def __init__(self, app, engine: Engine, skip_paths=("/healthz",)) -> None:
+        self.app = app
+        self.engine = engine
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not _done and scope["type"] == "http" and scope["path"] not in self.skip_paths:
+            await run_in_threadpool(bootstrap, self.engine)
+        await self.app(scope, receive, send)
@@ -0,0 +1 @@
+"""Backend benchmarks. Run from ``backend/`` as ``python -m benchmarks.<name>``."""
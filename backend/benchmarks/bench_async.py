@@ -0,0 +1,165 @@
+"""Compare sync and async (DB_ASYNC=1) handlers under concurrent load.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async [--database-url URL] [--concurrency 50 200 1000]
+
+Seeds the catalog plus logs and stocks for a set of users, then for each mode
+spawns ``uvicorn app.main:app`` and drives /tasks/daily, /logs, /stock and
+/challenges/search with N concurrent httpx clients for ``--seconds`` each.
+Reports throughput, p50/p99 latency and errors. Without ``--database-url`` a
+throwaway SQLite file is used (async then runs on aiosqlite); use a scratch
+Postgres database to compare psycopg2 against asyncpg.
+
+The load generator shares the machine with the server, so at high
+concurrency both numbers are partly bounded by the client.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from app.core.database import Base
+from app.models import Achievement, Stock
+from app.services.seeding import seed_catalog
+from scripts.load_data import tasks as seed_tasks
+
+from .bench_cold_start import _free_port, _wait_for, BACKEND_DIR
+
+
+USERS = 200
+LOGS_PER_USER = 100
+STOCKS_PER_USER = 10
+
+
+def seed(url: str) -> int:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    base = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        seed_catalog(conn, seed_tasks)
+        n_tasks = len(seed_tasks)
+        conn.execute(
+            insert(Achievement),
+            [
+                {
+                    "id": f"a-{u}-{i}",
+                    "user_id": f"user-{u}",
+                    "task_id": rng.randint(1, n_tasks),
+                    "achieved_at": base + timedelta(hours=rng.randint(0, 24 * 300)),
+                }
+                for u in range(USERS)
+                for i in range(LOGS_PER_USER)
+            ],
+        )
+        conn.execute(
+            insert(Stock),
+            [
+                {"id": f"s-{u}-{i}", "user_id": f"user-{u}", "task_id": i + 1}
+                for u in range(USERS)
+                for i in range(STOCKS_PER_USER)
+            ],
+        )
+    engine.dispose()
+    return n_tasks
+
+
+REQUESTS = [
+    ("GET", "/tasks/daily", {}),
+    ("GET", "/logs", {"month": "2026-03"}),
+    ("GET", "/stock", {}),
+    ("GET", "/challenges/search", {"q": "散歩"}),
+]
+
+
+async def _load(base: str, concurrency: int, seconds: float):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        async def worker(n: int) -> None:
+            nonlocal errors
+            headers = {"X-User-Id": f"user-{n % USERS}"}
+            i = n
+            while time.perf_counter() < deadline:
+                method, path, params = REQUESTS[i % len(REQUESTS)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, params=params, headers=headers)
+                    if resp.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+        "errors": errors,
+    }
+
+
+def run_mode(mode: str, url: str, levels, seconds: float):
+    import subprocess
+    import sys
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=url, DB_ASYNC="1" if mode == "async" else "0")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--backlog", "4096"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        _wait_for(f"{base}/healthz", time.perf_counter() + 60)
+        for level in levels:
+            r = asyncio.run(_load(base, level, seconds))
+            print(
+                f"{mode:<6}{level:>6}{r['rps']:>10.0f}{r['p50']:>10.1f}ms{r['p99']:>10.1f}ms{r['errors']:>8}"
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_async.db')}"
+    seed(url)
+    print(f"{'mode':<6}{'conc':>6}{'req/s':>10}{'p50':>12}{'p99':>12}{'errors':>8}")
+    for mode in ("sync", "async"):
+        run_mode(mode, url, args.concurrency, args.seconds)
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure time from process start to the first /healthz (and first DB-backed) response.
+
+Usage (from backend/):
+    python -m benchmarks.bench_cold_start [--runs 5] [--database-url URL]
+
+Each run spawns a fresh ``uvicorn app.main:app`` for both STARTUP_MODE=eager
+and STARTUP_MODE=lazy, polls ``/healthz`` until it answers, then times the
+first ``/categories`` request (which pays for the deferred bootstrap in lazy
+mode). Without ``--database-url`` a throwaway SQLite file is used.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, deadline: float) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def run_once(mode: str, database_url: str, timeout: float = 60.0):
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, STARTUP_MODE=mode)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        _wait_for(f"{base}/healthz", start + timeout)
+        healthz = time.perf_counter() - start
+        first = time.perf_counter()
+        _wait_for(f"{base}/categories", first + timeout)
+        return healthz * 1000, (time.perf_counter() - first) * 1000
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_cold_start.db')}"
+
+    # Prime the schema (and its fingerprint) so runs measure a warm database.
+    run_once("eager", url)
+    print(f"{'mode':<8}{'healthz p50':>14}{'first DB req p50':>19}")
+    for mode in ("eager", "lazy"):
+        results = [run_once(mode, url) for _ in range(args.runs)]
+        print(
+            f"{mode:<8}{statistics.median(r[0] for r in results):>12.0f}ms"
+            f"{statistics.median(r[1] for r in results):>17.0f}ms"
+        )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare per-user completed task ids held as a Python set with ``CompletionBitmap``.
+
+Usage (from backend/):
+    python -m benchmarks.bench_completions [--catalog-tasks 100000]
+        [--completed 10 100 1000 10000 50000] [--lookups 100000]
+
+For each completed-count the ids are drawn uniformly from the catalog id range.
+Prints the memory of each representation (``sys.getsizeof`` of the containers
+and the int objects a set keeps alive) and the mean time of an ``in`` test
+over ids spread across the whole catalog, so misses and hits are both timed.
+No database is needed.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.services.completions import CompletionBitmap
+
+
+def set_nbytes(ids: set) -> int:
+    # Small ints are shared, but task ids above 256 are separate objects.
+    return sys.getsizeof(ids) + sum(sys.getsizeof(i) for i in ids)
+
+
+def time_lookups(container, probes) -> float:
+    start = time.perf_counter()
+    for task_id in probes:
+        task_id in container
+    return (time.perf_counter() - start) / len(probes) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalog-tasks", type=int, default=100_000)
+    parser.add_argument("--completed", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 50_000])
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    probes = [rng.randrange(1, args.catalog_tasks + 1) for _ in range(args.lookups)]
+    print(f"{'completed':>10} {'set bytes':>12} {'bitmap bytes':>13} {'set ns':>8} {'bitmap ns':>10} {'build ms':>9}")
+    for n in args.completed:
+        ids = rng.sample(range(1, args.catalog_tasks + 1), min(n, args.catalog_tasks))
+        as_set = set(ids)
+        start = time.perf_counter()
+        bitmap = CompletionBitmap(ids)
+        build_ms = (time.perf_counter() - start) * 1000
+        assert all((i in bitmap) == (i in as_set) for i in probes[:10_000])
+        print(
+            f"{len(ids):>10} {set_nbytes(as_set):>12} {bitmap.nbytes():>13}"
+            f" {time_lookups(as_set, probes):>8.0f} {time_lookups(bitmap, probes):>10.0f} {build_ms:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Bytes on the wire and CPU per request with and without response compression.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression [--database-url URL] [--users 100]
+        [--achievements 100000] [--catalog-tasks 10000] [--requests 50]
+
+Generates synthetic data (``benchmarks.datagen``) and, through an in-process
+ASGI client, requests each route ``--requests`` times per
+``Accept-Encoding`` (``identity``, ``gzip``, ``br``). For each it prints the
+response size as sent, the share saved against identity, p50 latency and the
+CPU time per request (``time.process_time``; client and server share the
+process, so the difference to the identity row is the compression cost).
+
+``/categories`` is served from the bodies the catalog snapshot compressed
+once per version. Its section compares those with compressing the same
+body per request at the middleware's levels: size and CPU per request.
+With the seed's few categories the body is under ``COMPRESSION_MIN_BYTES``
+and is sent as is; ``--min-bytes 100`` lowers the threshold to show it.
+
+Without ``--database-url`` a throwaway SQLite file is used. A Postgres URL
+must point at a scratch database: its tables are dropped and recreated.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+async def measure(app, routes, requests: int) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/tasks/daily")
+        for label, path, params, headers in routes:
+            for encoding in ENCODINGS:
+                hdrs = {**headers, "Accept-Encoding": encoding}
+                timings = []
+                sizes = set()
+                cpu = time.process_time()
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    r = await client.get(path, params=params, headers=hdrs)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    r.raise_for_status()
+                    sizes.add(r.num_bytes_downloaded)
+                cpu = (time.process_time() - cpu) * 1000 / requests
+                results[label, encoding] = (
+                    max(sizes),
+                    r.headers.get("content-encoding", "-"),
+                    statistics.median(timings),
+                    cpu,
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--achievements", type=int, default=100_000)
+    parser.add_argument("--catalog-tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--min-bytes", type=int)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_compression.db')}"
+
+    # The app reads its config at import time.
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("QUERY_BUDGET_MODE", "off")
+    if args.min_bytes is not None:
+        os.environ["COMPRESSION_MIN_BYTES"] = str(args.min_bytes)
+    from app.core import compression
+    from app.core.config import COMPRESSION_MIN_BYTES
+    from app.core.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.services import catalog
+    from app.startup import bootstrap
+
+    from . import datagen
+
+    gen_engine = create_engine(url)
+    Base.metadata.drop_all(bind=gen_engine)
+    Base.metadata.create_all(bind=gen_engine)
+    datagen.generate(
+        gen_engine,
+        datagen.Scale(users=args.users, achievements=args.achievements, catalog_tasks=args.catalog_tasks),
+    )
+    gen_engine.dispose()
+    bootstrap(engine)
+
+    user = {"X-User-Id": datagen.user_id(0)}
+    month = datagen.END.strftime("%Y-%m")
+    routes = [
+        ("GET /challenges/search (all)", "/challenges/search", {}, user),
+        ("GET /challenges/search?limit=50", "/challenges/search", {"limit": 50}, user),
+        ("GET /logs?limit=100", "/logs", {"limit": 100}, user),
+        (f"GET /logs?month={month}", "/logs", {"month": month}, user),
+        ("GET /stock", "/stock", {}, user),
+        ("GET /tasks/daily", "/tasks/daily", {}, user),
+        ("GET /export (streamed)", "/export", {}, user),
+        ("GET /categories", "/categories", {}, {}),
+    ]
+    results = asyncio.run(measure(app, routes, args.requests))
+
+    print(f"\nencodings: {', '.join(compression.ENCODINGS)}; COMPRESSION_MIN_BYTES {COMPRESSION_MIN_BYTES}")
+    print(f"{'route':<34}{'accept':>9}{'sent':>6}{'bytes':>11}{'saved':>7}{'p50 ms':>9}{'CPU ms':>8}{'+CPU ms':>9}")
+    for label, *_ in routes:
+        plain_size, _, _, plain_cpu = results[label, "identity"]
+        for encoding in ENCODINGS:
+            size, sent, p50, cpu = results[label, encoding]
+            print(
+                f"{label if encoding == 'identity' else '':<34}{encoding:>9}{sent:>6}{size:>11,}"
+                f"{1 - size / plain_size:>7.0%}{p50:>9.2f}{cpu:>8.2f}{cpu - plain_cpu:>+9.2f}"
+            )
+
+    with SessionLocal() as db:
+        snap = catalog.get_snapshot(db)
+    body = snap.categories_body
+    print(f"\n/categories body {len(body):,} bytes, compressed once per catalog version:")
+    if not snap.categories_encoded:
+        print("  under COMPRESSION_MIN_BYTES, sent as is")
+    for encoding, encoded in snap.categories_encoded.items():
+        repeat = 200
+        start = time.process_time()
+        for _ in range(repeat):
+            per_request = compression.compress(body, encoding)
+        cpu = (time.process_time() - start) * 1000 / repeat
+        print(
+            f"  {encoding:<5} precompressed {len(encoded):>9,} bytes, 0 ms/request;"
+            f" per request {len(per_request):>9,} bytes, {cpu:.3f} ms/request"
+        )
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
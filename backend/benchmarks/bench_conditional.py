@@ -0,0 +1,118 @@
+"""Full responses vs 304 revalidation of the per-user lists.
+
+Usage (from backend/):
+    python -m benchmarks.bench_conditional [--database-url URL] [--users 1000]
+        [--achievements 1000000] [--catalog-tasks 10000] [--requests 200]
+
+Generates synthetic data (``benchmarks.datagen``) and, through an in-process
+ASGI client, requests ``/logs?month=``, ``/logs`` (first page), ``/stock`` and
+``/my_tasks`` for ``--requests`` users: once without a validator (200, full
+query) and once with the ETag from that response in ``If-None-Match`` (304,
+watermark lookup only). Prints p50/p95 latency, SQL statements per request
+and bytes sent for both.
+
+Without ``--database-url`` a throwaway SQLite file is used. A Postgres URL
+must point at a scratch database: its tables are dropped and recreated.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+
+
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) statements"')
+
+
+async def measure(app, routes, users) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/tasks/daily")
+        for label, path, params in routes:
+            etags = {}
+            for mode in ("200", "304"):
+                timings, statements, sizes = [], [], []
+                for user_id in users:
+                    headers = {"X-User-Id": user_id, "Accept-Encoding": "identity"}
+                    if mode == "304":
+                        headers["If-None-Match"] = etags[user_id]
+                    start = time.perf_counter()
+                    r = await client.get(path, params=params, headers=headers)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    assert r.status_code == int(mode), (path, r.status_code)
+                    etags[user_id] = r.headers["etag"]
+                    match = _SERVER_TIMING.search(r.headers.get("server-timing", ""))
+                    statements.append(int(match.group(2)) if match else 0)
+                    sizes.append(len(r.content))
+                results[label, mode] = (
+                    statistics.median(timings),
+                    sorted(timings)[int(len(timings) * 0.95) - 1],
+                    statistics.median(statements),
+                    statistics.mean(sizes),
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--achievements", type=int, default=1_000_000)
+    parser.add_argument("--catalog-tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_conditional.db')}"
+
+    # The app reads DATABASE_URL at import time.
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("QUERY_BUDGET_MODE", "off")
+    from app.core.database import Base, engine
+    from app.main import app
+    from app.startup import bootstrap
+
+    from . import datagen
+
+    gen_engine = create_engine(url)
+    Base.metadata.drop_all(bind=gen_engine)
+    Base.metadata.create_all(bind=gen_engine)
+    datagen.generate(
+        gen_engine,
+        datagen.Scale(users=args.users, achievements=args.achievements, catalog_tasks=args.catalog_tasks),
+    )
+    gen_engine.dispose()
+    bootstrap(engine)
+
+    users = [datagen.user_id(i) for i in range(0, args.users, max(1, args.users // args.requests))][: args.requests]
+    month = datagen.END.strftime("%Y-%m")
+    routes = [
+        (f"GET /logs?month={month}", "/logs", {"month": month}),
+        ("GET /logs?limit=50", "/logs", {"limit": 50}),
+        ("GET /stock", "/stock", {}),
+        ("GET /my_tasks", "/my_tasks", {}),
+    ]
+    results = asyncio.run(measure(app, routes, users))
+
+    print(f"\n{len(users)} users{'':<22}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'stmts':>7}{'bytes':>9}")
+    for label, *_ in routes:
+        for mode in ("200", "304"):
+            p50, p95, stmts, size = results[label, mode]
+            print(f"{label if mode == '200' else '':<30}{mode:>7}{p50:>9.2f}{p95:>9.2f}{stmts:>7g}{size:>9.0f}")
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
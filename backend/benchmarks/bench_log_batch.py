@@ -0,0 +1,146 @@
+"""Compare syncing queued logs one ``POST /logs`` at a time with ``POST /logs/batch``.
+
+Usage (from backend/):
+    python -m benchmarks.bench_log_batch [--database-url URL] [--logs 50]
+        [--rounds 20] [--catalog-tasks 10000]
+
+Each round is one client coming back online with ``--logs`` queued logs: the
+single path sends them as that many ``POST /logs`` requests, the batch path
+as one ``POST /logs/batch``, and then the batch is resent as a retry after a
+lost response (every item must come back ``exists``). Every round uses a
+fresh user so the two paths write the same amount of data. Requests go
+through an in-process ASGI client; statement counts come from the
+``Server-Timing`` header.
+
+Prints the median and p95 time per sync and the SQL statements per sync for
+each path. Without ``--database-url`` a throwaway SQLite file is used. A
+Postgres URL must point at a scratch database: its tables are dropped and
+recreated.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, select
+
+
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) statements"')
+
+
+def _statements(response: httpx.Response) -> int:
+    match = _SERVER_TIMING.search(response.headers.get("server-timing", ""))
+    return int(match.group(2)) if match else 0
+
+
+def _queued(rng: random.Random, task_ids, n: int, round_no: int) -> list:
+    return [
+        {
+            "client_id": f"r{round_no}-{i}",
+            "task_id": rng.choice(task_ids),
+            "feeling": "good",
+            "memo": f"offline {i}",
+        }
+        for i in range(n)
+    ]
+
+
+async def run(app, task_ids, logs: int, rounds: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    timings = {"single": [], "batch": [], "batch retry": []}
+    statements = {"single": [], "batch": [], "batch retry": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm-up: catalog snapshot, connection pool, prepared paths.
+        await client.post("/logs", json={"task_id": task_ids[0]}, headers={"X-User-Id": "warm"})
+        await client.post(
+            "/logs/batch",
+            json={"logs": [{"client_id": "w", "task_id": task_ids[0]}]},
+            headers={"X-User-Id": "warm"},
+        )
+        for r in range(rounds):
+            queued = _queued(rng, task_ids, logs, r)
+
+            headers = {"X-User-Id": f"single-{r}"}
+            count = 0
+            start = time.perf_counter()
+            for item in queued:
+                body = {k: v for k, v in item.items() if k != "client_id"}
+                response = await client.post("/logs", json=body, headers=headers)
+                assert response.status_code == 201, response.text
+                count += _statements(response)
+            timings["single"].append((time.perf_counter() - start) * 1000)
+            statements["single"].append(count)
+
+            headers = {"X-User-Id": f"batch-{r}"}
+            for label, expected in (("batch", "created"), ("batch retry", "exists")):
+                start = time.perf_counter()
+                response = await client.post("/logs/batch", json={"logs": queued}, headers=headers)
+                timings[label].append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+                statuses = {item["status"] for item in response.json()["results"]}
+                assert statuses == {expected}, statuses
+                statements[label].append(_statements(response))
+    return {
+        label: {
+            "median_ms": statistics.median(values),
+            "p95_ms": sorted(values)[max(0, int(len(values) * 0.95) - 1)],
+            "statements": statistics.median(statements[label]),
+        }
+        for label, values in timings.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--logs", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--catalog-tasks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_log_batch.db')}"
+
+    # The app reads DATABASE_URL at import time.
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("QUERY_BUDGET_MODE", "off")
+    from app.core.database import Base, engine
+    from app.main import app
+    from app.models import Task
+    from app.startup import bootstrap
+
+    from . import datagen
+
+    gen_engine = create_engine(url)
+    Base.metadata.drop_all(bind=gen_engine)
+    Base.metadata.create_all(bind=gen_engine)
+    datagen.generate(gen_engine, datagen.Scale(users=100, achievements=10_000, catalog_tasks=args.catalog_tasks))
+    gen_engine.dispose()
+    bootstrap(engine)
+    with engine.connect() as conn:
+        task_ids = conn.execute(select(Task.id).where(Task.source == "catalog")).scalars().all()
+
+    results = asyncio.run(run(app, task_ids, args.logs, args.rounds, args.seed))
+    print(f"\n{args.logs} queued logs per sync, {args.rounds} rounds ({engine.dialect.name})")
+    print(f"{'path':<14}{'median ms':>11}{'p95 ms':>9}{'statements':>12}")
+    for label, r in results.items():
+        print(f"{label:<14}{r['median_ms']:>11.2f}{r['p95_ms']:>9.2f}{r['statements']:>12g}")
+    print(f"\nbatch speedup: {results['single']['median_ms'] / results['batch']['median_ms']:.1f}x")
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Page through 100k-row lists and check that per-page latency stays flat.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pagination [--database-url URL] [--rows 100000]
+        [--limit 100] [--max-ratio 2.0]
+
+Generates one user with ``--rows`` catalog tasks, all of them stocked, and
+``--rows`` "my" tasks (``benchmarks.datagen``; the my tasks share one
+``created_at``, so the id tie-break carries the ordering). Then follows
+``X-Next-Cursor`` from the first page to the last for each list endpoint and
+sort, through an in-process ASGI client, and checks that every row is seen
+exactly once.
+
+For each walk it prints the page count and the mean latency of the first and
+last 10% of pages. Keyset pages cost the same at any depth, so the two should
+match; a walk whose last pages are more than ``--max-ratio`` times slower than
+its first (or that skips or repeats a row) is flagged and the process exits
+with status 1.
+
+Without ``--database-url`` a throwaway SQLite file is used. A Postgres URL
+must point at a scratch database: its tables are dropped and recreated.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Tuple
+
+import httpx
+from sqlalchemy import create_engine
+
+
+WALKS: List[Tuple[str, dict]] = [
+    ("/stock", {"sort": "created"}),
+    ("/stock", {"sort": "difficulty"}),
+    ("/stock", {"sort": "category"}),
+    ("/my_tasks", {}),
+    ("/challenges/search", {"sort": "relevance"}),
+    ("/challenges/search", {"sort": "difficulty"}),
+]
+
+
+async def walk(client: httpx.AsyncClient, path: str, params: dict, limit: int, headers: dict):
+    """Latency in ms of every page and the ids seen, in order."""
+    timings, ids = [], []
+    cursor = None
+    while True:
+        query = {**params, "limit": limit}
+        if cursor:
+            query["cursor"] = cursor
+        start = time.perf_counter()
+        r = await client.get(path, params=query, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        r.raise_for_status()
+        ids.extend(item["id"] for item in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return timings, ids
+
+
+async def drive(app, rows: int, limit: int, max_ratio: float, user: str) -> int:
+    flagged = 0
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-User-Id": user}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path, params in WALKS:
+            # One untimed request so the catalog snapshot and search index are warm.
+            await client.get(path, params={**params, "limit": limit}, headers=headers)
+            timings, ids = await walk(client, path, params, limit, headers)
+            tenth = max(1, len(timings) // 10)
+            first = statistics.mean(timings[:tenth])
+            last = statistics.mean(timings[-tenth:])
+            notes = []
+            if len(ids) != rows or len(set(ids)) != rows:
+                notes.append(f"saw {len(ids)} rows ({len(set(ids))} distinct), expected {rows}")
+            if last > first * max_ratio:
+                notes.append(f"last pages {last / first:.1f}x slower than first")
+            flagged += bool(notes)
+            label = f"{path} {' '.join(f'{k}={v}' for k, v in params.items())}"
+            print(
+                f"{label:<34}{len(timings):>7}{first:>10.2f}{last:>10.2f}"
+                f"{statistics.median(timings):>9.2f}{max(timings):>9.2f}  {'; '.join(notes) or 'ok'}"
+            )
+    return flagged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--max-ratio", type=float, default=2.0)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_pagination.db')}"
+
+    # The app reads DATABASE_URL at import time.
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("QUERY_BUDGET_MODE", "off")
+    from app.core.database import Base, engine
+    from app.main import app
+    from app.startup import bootstrap
+
+    from . import datagen
+
+    scale = datagen.Scale(
+        users=1,
+        achievements=0,
+        catalog_tasks=args.rows,
+        stocks_per_user=args.rows,
+        my_tasks_per_user=args.rows,
+    )
+    gen_engine = create_engine(url)
+    Base.metadata.drop_all(bind=gen_engine)
+    Base.metadata.create_all(bind=gen_engine)
+    start = time.perf_counter()
+    datagen.generate(gen_engine, scale)
+    gen_engine.dispose()
+    print(f"generated {args.rows} stocks, my tasks and catalog tasks in {time.perf_counter() - start:.1f}s")
+    bootstrap(engine)
+
+    print(f"\n{'walk (limit ' + str(args.limit) + ')':<34}{'pages':>7}{'first ms':>10}{'last ms':>10}{'p50':>9}{'max':>9}")
+    flagged = asyncio.run(drive(app, args.rows, args.limit, args.max_ratio, datagen.user_id(0)))
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    raise SystemExit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Time the recommender batch job at scale and check the daily pick's request cost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_recommender [--database-url URL] [--users 100000]
+        [--achievements 1000000] [--catalog-tasks 10000] [--requests 300]
+
+Generates ``--users`` users with logs and 10 stocks each (``benchmarks.datagen``)
+and runs ``services.recommender.build``, printing the load / score / write
+phases and peak RSS. Then, through an in-process ASGI client, it times
+``GET /tasks/daily`` for ``--requests`` users on their first read of the day
+(the read that assigns) and on a repeat read: once with the candidates table
+emptied, which is the plain ``pick_for_user`` path, and once with the
+candidates. Both paths must run the same number of SQL statements.
+
+It also reports how often the assigned task is in the user's most-logged
+category, against the share that category has in the catalog.
+
+Without ``--database-url`` a throwaway SQLite file is used. A Postgres URL
+must point at a scratch database: its tables are dropped and recreated.
+"""
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+import os
+import re
+import resource
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, delete, func, select
+
+
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) statements"')
+
+
+async def daily_reads(app, users, day: date) -> dict:
+    timings = {"first read": [], "repeat read": []}
+    statements = {"first read": [], "repeat read": []}
+    picks = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/tasks/daily")
+        for label in timings:
+            for user_id in users:
+                start = time.perf_counter()
+                r = await client.get("/tasks/daily", params={"date": day.isoformat()}, headers={"X-User-Id": user_id})
+                timings[label].append((time.perf_counter() - start) * 1000)
+                r.raise_for_status()
+                match = _SERVER_TIMING.search(r.headers.get("server-timing", ""))
+                statements[label].append(int(match.group(2)) if match else 0)
+                picks[user_id] = int(r.json()["id"])
+    return {
+        "picks": picks,
+        **{
+            label: (statistics.median(values), sorted(values)[int(len(values) * 0.95) - 1], statistics.median(statements[label]))
+            for label, values in timings.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--achievements", type=int, default=1_000_000)
+    parser.add_argument("--catalog-tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--chunk-users", type=int)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_recommender.db')}"
+
+    # The app reads DATABASE_URL at import time.
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("QUERY_BUDGET_MODE", "off")
+    from app.core.database import Base, engine
+    from app.main import app
+    from app.models import Achievement, DailyAssignment, Recommendation, Task
+    from app.services import recommender
+    from app.startup import bootstrap
+
+    from . import datagen
+
+    gen_engine = create_engine(url)
+    Base.metadata.drop_all(bind=gen_engine)
+    Base.metadata.create_all(bind=gen_engine)
+    start = time.perf_counter()
+    datagen.generate(
+        gen_engine,
+        datagen.Scale(users=args.users, achievements=args.achievements, catalog_tasks=args.catalog_tasks),
+    )
+    gen_engine.dispose()
+    print(f"generated {args.users} users, {args.achievements} logs in {time.perf_counter() - start:.1f}s")
+    bootstrap(engine)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    report = recommender.build(engine, chunk_users=args.chunk_users, seed=42)
+    print(
+        f"\nbuild: {report.users} users x {report.tasks} tasks -> {report.rows} candidates in"
+        f" {time.perf_counter() - start:.1f}s (load {report.load_seconds}s, score {report.score_seconds}s,"
+        f" write {report.write_seconds}s); peak RSS {max(rss_before, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) / 1024:.0f} MB"
+    )
+
+    users = [datagen.user_id(i) for i in range(0, args.users, max(1, args.users // args.requests))][: args.requests]
+    with engine.begin() as conn:
+        saved = conn.execute(select(Recommendation.__table__)).all()
+        conn.execute(delete(Recommendation))
+    plain = asyncio.run(daily_reads(app, users, date.today() - timedelta(days=1)))
+    with engine.begin() as conn:
+        conn.execute(delete(DailyAssignment))
+        conn.execute(Recommendation.__table__.insert(), [row._asdict() for row in saved])
+    recommended = asyncio.run(daily_reads(app, users, date.today() - timedelta(days=1)))
+
+    print(f"\nGET /tasks/daily, {len(users)} users{'':<6}{'p50 ms':>8}{'p95 ms':>8}{'stmts':>7}")
+    for name, result in (("pick_for_user", plain), ("recommended", recommended)):
+        for label in ("first read", "repeat read"):
+            p50, p95, stmts = result[label]
+            print(f"  {name + ' ' + label:<36}{p50:>8.2f}{p95:>8.2f}{stmts:>7g}")
+
+    with engine.connect() as conn:
+        category_of = dict(conn.execute(select(Task.id, Task.category_id).where(Task.source == "catalog")).all())
+        favourite = {}
+        counts = defaultdict(Counter)
+        for user_id, category_id, n in conn.execute(
+            select(Achievement.user_id, Task.category_id, func.count())
+            .join(Task, Task.id == Achievement.task_id)
+            .where(Achievement.user_id.in_(users))
+            .group_by(Achievement.user_id, Task.category_id)
+        ):
+            counts[user_id][category_id] = n
+        for user_id, c in counts.items():
+            favourite[user_id] = c.most_common(1)[0][0]
+    share = Counter(category_of.values())
+    baseline = statistics.mean(share[favourite[u]] / len(category_of) for u in favourite)
+    for name, result in (("pick_for_user", plain), ("recommended", recommended)):
+        hits = statistics.mean(category_of.get(result["picks"][u]) == favourite[u] for u in favourite)
+        print(f"{name:<14} pick in the user's most-logged category: {hits:.0%} (catalog share {baseline:.0%})")
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Per-route latency, throughput and SQL statement counts for every API route.
+
+Usage (from backend/):
+    python -m benchmarks.bench_routes [--database-url URL] [--users 1000]
+        [--achievements 100000] [--catalog-tasks 10000] [--requests 200]
+        [--output PATH] [--baseline PATH]
+
+Generates a fresh synthetic dataset (``benchmarks.datagen``), then drives each
+route in ``app/api/routes.py`` through an in-process ASGI client
+(``httpx.ASGITransport``, no sockets) for ``--requests`` requests, rotating
+over users. Write routes run in create/update/delete order so every request
+is valid. Statement counts and DB time come from the ``Server-Timing`` header
+set by ``core.query_stats``.
+
+Results are written as JSON to ``--output`` (default
+``benchmarks/results/routes-<dialect>.json``). When ``--baseline`` (default:
+the previous ``--output`` file) exists, each route is compared with it: a p95
+worse by more than ``--threshold`` percent, or any increase in statements, is
+flagged (p95 changes under ``--min-delta-ms`` are treated as noise). The
+process exits with status 1 when something was flagged.
+
+Without ``--database-url`` a throwaway SQLite file is used. A Postgres URL
+must point at a scratch database: its tables are dropped and recreated.
+For the production-like scale use e.g. ``--users 10000 --achievements 5000000
+--catalog-tasks 100000``.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) statements"')
+
+
+class Case(NamedTuple):
+    route: str
+    # make(i, ctx) -> (method, url, request kwargs)
+    make: Callable[[int, dict], tuple]
+    requests: int = 0  # 0: use --requests
+
+
+def _user(i: int, ctx: dict) -> dict:
+    return {"X-User-Id": f"user-{i % ctx['users']}"}
+
+
+def _pop(ctx: dict, key: str, i: int):
+    items = ctx[key].get(i % ctx["users"])
+    return items.pop() if items else 0
+
+
+def build_cases() -> List[Case]:
+    def post_my_task(i, ctx):
+        return "POST", "/my_tasks", {"headers": _user(i, ctx), "json": {"title": f"bench {i}"}}
+
+    def post_stock(i, ctx):
+        task_id = ctx["rng"].choice(ctx["task_ids"])
+        ctx["stocked"].setdefault(i % ctx["users"], []).append(task_id)
+        return "POST", "/stock", {"headers": _user(i, ctx), "json": {"task_id": task_id}}
+
+    def post_log(i, ctx):
+        return "POST", "/logs", {
+            "headers": _user(i, ctx),
+            "json": {"task_id": ctx["rng"].choice(ctx["task_ids"]), "feeling": "good"},
+        }
+
+    def post_stock_batch(i, ctx):
+        task_ids = ctx["rng"].sample(ctx["task_ids"], 10)
+        ctx["batch_stocked"][i % ctx["users"]] = task_ids
+        return "POST", "/stock/batch", {"headers": _user(i, ctx), "json": {"task_ids": task_ids}}
+
+    def delete_stock_batch(i, ctx):
+        task_ids = ctx["batch_stocked"].pop(i % ctx["users"], [])
+        return "POST", "/stock/batch/delete", {"headers": _user(i, ctx), "json": {"task_ids": task_ids}}
+
+    def post_log_batch(i, ctx):
+        return "POST", "/logs/batch", {
+            "headers": _user(i, ctx),
+            "json": {
+                "logs": [
+                    {"client_id": f"bench-{i}-{j}", "task_id": ctx["rng"].choice(ctx["task_ids"]), "feeling": "good"}
+                    for j in range(10)
+                ]
+            },
+        }
+
+    def post_import(i, ctx):
+        # A small history in the GET /export NDJSON layout: a "my" task, its
+        # log, catalog logs and a stock, with ids unique to the request.
+        rng, at, my_task = ctx["rng"], datetime(2026, 3, 1) + timedelta(minutes=i), 10**9 + i
+        records = [
+            {"type": "my_task", "id": my_task, "title": f"imported {i}", "description": None, "at": at},
+            {"type": "log", "id": f"import-{i}-my", "task_id": my_task, "feeling": "good", "at": at},
+            *(
+                {"type": "log", "id": f"import-{i}-{j}", "task_id": rng.choice(ctx["task_ids"]), "at": at}
+                for j in range(8)
+            ),
+            {"type": "stock", "task_id": rng.choice(ctx["task_ids"]), "at": at},
+        ]
+        body = "".join(json.dumps(record, default=datetime.isoformat) + "\n" for record in records)
+        return "POST", "/import", {"headers": _user(i, ctx), "content": body.encode()}
+
+    return [
+        Case("GET /healthz", lambda i, ctx: ("GET", "/healthz", {})),
+        Case("GET /tasks/daily", lambda i, ctx: ("GET", "/tasks/daily", {"headers": _user(i, ctx)})),
+        Case(
+            "POST /tasks/daily/replace",
+            lambda i, ctx: ("POST", "/tasks/daily/replace", {
+                "headers": _user(i, ctx),
+                "json": {"source": "catalog", "new_task_id": str(ctx["rng"].choice(ctx["task_ids"]))},
+            }),
+        ),
+        Case("GET /categories", lambda i, ctx: ("GET", "/categories", {})),
+        Case(
+            "GET /challenges/search",
+            lambda i, ctx: ("GET", "/challenges/search", {
+                "headers": _user(i, ctx),
+                "params": {"q": ["散歩", "ストレッチ", "深呼吸", "音楽"][i % 4]},
+            }),
+        ),
+        Case("POST /logs", post_log),
+        Case("POST /logs/batch", post_log_batch),
+        Case("GET /logs", lambda i, ctx: ("GET", "/logs", {"headers": _user(i, ctx)})),
+        Case(
+            "GET /logs?month",
+            lambda i, ctx: ("GET", "/logs", {"headers": _user(i, ctx), "params": {"month": "2026-03"}}),
+        ),
+        Case(
+            "GET /logs?limit",
+            lambda i, ctx: ("GET", "/logs", {"headers": _user(i, ctx), "params": {"limit": 20}}),
+        ),
+        Case(
+            "GET /logs/summary month",
+            lambda i, ctx: ("GET", "/logs/summary", {
+                "headers": _user(i, ctx), "params": {"from": "2026-03-01", "to": "2026-03-31"},
+            }),
+        ),
+        Case(
+            "GET /logs/summary year",
+            lambda i, ctx: ("GET", "/logs/summary", {
+                "headers": _user(i, ctx), "params": {"from": "2025-07-01", "to": "2026-06-30"},
+            }),
+        ),
+        # Streamed: statements run after the headers are sent are not in
+        # Server-Timing, so only latency is meaningful here.
+        Case("GET /export", lambda i, ctx: ("GET", "/export", {"headers": _user(i, ctx)})),
+        Case(
+            "GET /export?format=csv",
+            lambda i, ctx: ("GET", "/export", {"headers": _user(i, ctx), "params": {"format": "csv"}}),
+        ),
+        Case("POST /import", post_import),
+        Case("POST /stock", post_stock),
+        Case("GET /stock", lambda i, ctx: ("GET", "/stock", {"headers": _user(i, ctx)})),
+        Case(
+            "DELETE /stock/by-task/{task_id}",
+            lambda i, ctx: ("DELETE", f"/stock/by-task/{_pop(ctx, 'stocked', i)}", {"headers": _user(i, ctx)}),
+        ),
+        Case("POST /stock/batch", post_stock_batch),
+        Case("POST /stock/batch/delete", delete_stock_batch),
+        Case("POST /my_tasks", post_my_task),
+        Case("GET /my_tasks", lambda i, ctx: ("GET", "/my_tasks", {"headers": _user(i, ctx)})),
+        Case(
+            "PUT /my_tasks/{task_id}",
+            lambda i, ctx: ("PUT", f"/my_tasks/{ctx['my_tasks'][i % len(ctx['my_tasks'])][1]}", {
+                "headers": {"X-User-Id": ctx["my_tasks"][i % len(ctx["my_tasks"])][0]},
+                "json": {"title": f"renamed {i}"},
+            }),
+        ),
+        Case(
+            "DELETE /my_tasks/{task_id}",
+            lambda i, ctx: ("DELETE", f"/my_tasks/{ctx['my_tasks'][i][1]}", {
+                "headers": {"X-User-Id": ctx["my_tasks"][i][0]},
+            }),
+        ),
+        Case("GET /metrics/db-pool", lambda i, ctx: ("GET", "/metrics/db-pool", {})),
+        Case("GET /metrics/completion-cache", lambda i, ctx: ("GET", "/metrics/completion-cache", {})),
+        Case("GET /metrics", lambda i, ctx: ("GET", "/metrics", {})),
+        Case("POST /admin/init-data", lambda i, ctx: ("POST", "/admin/init-data", {}), requests=3),
+    ]
+
+
+def _percentile(sorted_ms: List[float], p: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, max(0, int(round(p / 100 * len(sorted_ms))) - 1))]
+
+
+async def run_case(client: httpx.AsyncClient, case: Case, n: int, ctx: dict) -> dict:
+    latencies, statements, db_ms = [], [], []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(n):
+        method, url, kwargs = case.make(i, ctx)
+        start = time.perf_counter()
+        resp = await client.request(method, url, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if resp.status_code >= 400:
+            errors += 1
+        elif case.route == "POST /my_tasks":
+            ctx["my_tasks"].append((kwargs["headers"]["X-User-Id"], resp.json()["id"]))
+        m = _SERVER_TIMING.search(resp.headers.get("server-timing", ""))
+        if m:
+            db_ms.append(float(m.group(1)))
+            statements.append(int(m.group(2)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": n,
+        "errors": errors,
+        "rps": round(n / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "statements_median": statistics.median(statements) if statements else 0,
+        "statements_max": max(statements, default=0),
+        "db_ms_median": round(statistics.median(db_ms), 3) if db_ms else 0.0,
+    }
+
+
+async def drive(app, cases: List[Case], requests: int, ctx: dict) -> Dict[str, dict]:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for case in cases:
+            n = case.requests or requests
+            if case.route == "DELETE /my_tasks/{task_id}":
+                n = min(n, len(ctx["my_tasks"]))
+            # One untimed request so the catalog snapshot and search index are warm.
+            if case.route.startswith("GET"):
+                method, url, kwargs = case.make(0, ctx)
+                await client.request(method, url, **kwargs)
+            results[case.route] = await run_case(client, case, n, ctx)
+            r = results[case.route]
+            print(
+                f"{case.route:<34}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                f"{r['rps']:>9.0f}{r['statements_median']:>6g}/{r['statements_max']:<4}{r['db_ms_median']:>8.2f}{r['errors']:>5}"
+            )
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float, min_delta_ms: float) -> int:
+    flagged = 0
+    print(f"\nvs baseline (p95 threshold {threshold:g}% and {min_delta_ms:g} ms):")
+    for route, r in results.items():
+        old = baseline.get(route)
+        if old is None:
+            continue
+        notes = []
+        if old["p95_ms"] > 0:
+            change = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            if change > threshold and r["p95_ms"] - old["p95_ms"] > min_delta_ms:
+                notes.append(f"p95 +{change:.0f}% ({old['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms)")
+        if r["statements_max"] > old["statements_max"]:
+            notes.append(f"statements {old['statements_max']} -> {r['statements_max']}")
+        if notes:
+            flagged += 1
+            print(f"  REGRESSION {route}: {'; '.join(notes)}")
+    if not flagged:
+        print("  no regressions")
+    return flagged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--achievements", type=int, default=100_000)
+    parser.add_argument("--catalog-tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=20.0)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_routes.db')}"
+    dialect = make_url(url).get_backend_name()
+    output = args.output or os.path.join(BACKEND_DIR, "benchmarks", "results", f"routes-{dialect}.json")
+    baseline_path = args.baseline or output
+
+    # The app reads DATABASE_URL at import time.
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("QUERY_BUDGET_MODE", "off")
+    from app.core.database import Base, engine
+    from app.main import app
+    from app.startup import bootstrap
+
+    from . import datagen
+
+    scale = datagen.Scale(
+        users=args.users, achievements=args.achievements, catalog_tasks=args.catalog_tasks
+    )
+    gen_engine = create_engine(url)
+    Base.metadata.drop_all(bind=gen_engine)
+    Base.metadata.create_all(bind=gen_engine)
+    start = time.perf_counter()
+    data_report = datagen.generate(gen_engine, scale, args.seed)
+    gen_engine.dispose()
+    print(f"generated data in {time.perf_counter() - start:.1f}s: {data_report}")
+    bootstrap(engine)
+
+    from sqlalchemy import select
+    from app.models import Task
+
+    with engine.connect() as conn:
+        task_ids = conn.execute(select(Task.id).where(Task.source == "catalog")).scalars().all()
+    ctx = {
+        "users": scale.users,
+        "task_ids": task_ids,
+        "rng": random.Random(args.seed),
+        "stocked": {},
+        "batch_stocked": {},
+        "my_tasks": [],
+    }
+
+    print(f"\n{'route':<34}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'stmts':>11}{'db ms':>8}{'err':>5}")
+    results = asyncio.run(drive(app, build_cases(), args.requests, ctx))
+
+    flagged = 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            flagged = compare(results, json.load(f)["routes"], args.threshold, args.min_delta_ms)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "dialect": dialect,
+                    "python": platform.python_version(),
+                    "scale": vars(scale),
+                    "requests_per_route": args.requests,
+                    "data": data_report,
+                },
+                "routes": results,
+            },
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+    print(f"\nwrote {output}")
+
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
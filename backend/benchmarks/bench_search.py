@@ -0,0 +1,112 @@
+"""Compare the legacy ILIKE search with the bigram index on a synthetic catalog.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search [--tasks 100000] [--database-url URL]
+
+Without ``--database-url`` a throwaway SQLite file is used. Point it at a
+scratch Postgres database to see the real sequential-scan cost; the tables
+are created there and the synthetic rows are left behind.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.database import Base
+from app.models import Category, Task
+from app.services.search import SearchIndex
+from scripts.load_data import tasks as seed_tasks
+
+
+QUERIES = ["お箸", "コンビニ", "こんびに", "ストレッチ", "ＡＢＣ", "散歩", "深呼吸", "新しい", "音楽を聴く", "手"]
+_SUFFIXES = ["（朝）", "（夜）", "を3分", "を友達と", "in English", "ABC", "を丁寧に", "をゆっくり"]
+
+
+def synthetic_catalog(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    categories = sorted({t["category"] for t in seed_tasks})
+    rows = []
+    for i in range(n):
+        base = seed_tasks[i % len(seed_tasks)]
+        other = rng.choice(seed_tasks)
+        rows.append(
+            {
+                "title": f"{base['title']}{rng.choice(_SUFFIXES)}",
+                "description": f"{base['description']} {other['description'][:40]}",
+                "difficulty": base["difficulty"],
+                "category_id": categories.index(base["category"]) + 1,
+                "source": "catalog",
+            }
+        )
+    return categories, rows
+
+
+def _timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench_search.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+
+    categories, rows = synthetic_catalog(args.tasks)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"id": i + 1, "name": name} for i, name in enumerate(categories)])
+        conn.execute(insert(Task), rows)
+    print(f"seeded {len(rows)} tasks in {time.perf_counter() - start:.1f}s ({engine.dialect.name})")
+
+    with Session(engine) as db:
+        docs = db.execute(
+            select(Task.id, Task.title, Task.description).where(Task.source == "catalog")
+        ).all()
+    start = time.perf_counter()
+    index = SearchIndex.build(docs, version=0)
+    print(f"built index over {len(index)} tasks in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'query':<14}{'ilike hits':>11}{'ilike p50':>11}{'ilike p95':>11}{'index hits':>11}{'index p50':>11}{'index p95':>11}")
+    for q in QUERIES:
+        def ilike():
+            with Session(engine) as db:
+                return (
+                    db.query(Task)
+                    .options(joinedload(Task.category))
+                    .filter(Task.source == "catalog", Task.title.ilike(f"%{q}%"))
+                    .all()
+                )
+
+        legacy, l50, l95 = _timed(ilike, max(1, args.repeat // 4))
+        hits, i50, i95 = _timed(lambda: index.search(q), args.repeat)
+        print(f"{q:<14}{len(legacy):>11}{l50:>9.1f}ms{l95:>9.1f}ms{len(hits):>11}{i50:>9.1f}ms{i95:>9.1f}ms")
+
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
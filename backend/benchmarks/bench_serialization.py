@@ -0,0 +1,144 @@
+"""CPU per 1,000-item response: FastAPI's response_model path vs ``FastJSONResponse``.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--items 1000] [--repeat 200]
+
+Builds synthetic SQL result tuples in the shape each list statement returns
+and times, with ``time.process_time``, the work done per response:
+
+* before: what FastAPI does with plain returned data. Routes with a
+  ``response_model`` (``/stock``, ``/my_tasks``) validate every item into a
+  Pydantic model and dump it (``TypeAdapter.validate_python`` +
+  ``dump_json``, FastAPI's fast path); ``/my_tasks`` also built a
+  ``MyTaskResponse`` per row first. ``/logs`` had no model, so it went
+  through ``jsonable_encoder`` and stdlib ``json`` (``JSONResponse``).
+  Search bodies used stdlib ``json``.
+* after: the shaping in ``app.api.queries`` plus ``core.json_response``
+  (orjson), and the same with orjson disabled for the stdlib fallback.
+
+No database or app instance is needed.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import time
+from typing import Callable, Dict, List
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api import queries
+from app.core import json_response
+from app.schemas.my_task import MyTaskResponse
+from app.schemas.task_list import TaskListItem
+
+
+TITLE = "利き手ではない方の手でお箸を使って食事する"
+DESCRIPTION = "普段とは違う手でお箸を使うことで、脳の新しい部分が刺激され、いつもの食事が新鮮な体験に変わります。"
+
+
+def stdlib_dumps(content) -> bytes:
+    # starlette.responses.JSONResponse.render
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def stock_rows(n: int) -> list:
+    return [(i, f"{TITLE} {i}", "食事", DESCRIPTION, i % 3 + 1, "catalog") for i in range(n)]
+
+
+def my_task_rows(n: int) -> list:
+    start = datetime(2026, 6, 30, 12, 0, 0, 123456)
+    return [(i, f"{TITLE} {i}", DESCRIPTION, start - timedelta(minutes=i)) for i in range(n)]
+
+
+def log_rows(n: int) -> list:
+    start = datetime(2026, 6, 30, 12, 0, 0, 123456)
+    return [
+        (
+            f"0b9e4c1a-5f7d-4c3e-9a21-{i:012d}", "user-1", "メモ", "good", start - timedelta(hours=i),
+            i, f"{TITLE} {i}", DESCRIPTION, 2, "catalog", 3, "食事",
+        )
+        for i in range(n)
+    ]
+
+
+def search_items(n: int) -> list:
+    return [
+        {"id": i, "title": f"{TITLE} {i}", "tags": ["食事"], "description": DESCRIPTION, "difficulty": 2, "is_completed": i % 5 == 0}
+        for i in range(n)
+    ]
+
+
+def cases(n: int) -> Dict[str, Dict[str, Callable[[], bytes]]]:
+    stock, my_tasks, logs, search = stock_rows(n), my_task_rows(n), log_rows(n), search_items(n)
+    stock_adapter = TypeAdapter(List[TaskListItem])
+    my_task_adapter = TypeAdapter(List[MyTaskResponse])
+
+    def my_tasks_before() -> bytes:
+        models = [
+            MyTaskResponse(id=task_id, title=title, description=description, created_at=created_at)
+            for task_id, title, description, created_at in my_tasks
+        ]
+        return my_task_adapter.dump_json(my_task_adapter.validate_python(models))
+
+    def logs_before() -> bytes:
+        grouped = queries.group_logs(logs, None, Response())
+        # The old shaping pre-formatted achieved_at; jsonable_encoder does the same.
+        return stdlib_dumps(jsonable_encoder(grouped))
+
+    return {
+        "GET /stock": {
+            "before": lambda: stock_adapter.dump_json(
+                stock_adapter.validate_python(queries.stocked_task_items(stock))
+            ),
+            "after": lambda: json_response.dump_json(queries.stocked_task_items(stock)),
+        },
+        "GET /my_tasks": {
+            "before": my_tasks_before,
+            "after": lambda: json_response.dump_json(queries.my_task_items(my_tasks)),
+        },
+        "GET /logs": {
+            "before": logs_before,
+            "after": lambda: json_response.dump_json(queries.group_logs(logs, None, Response())),
+        },
+        "search body": {
+            "before": lambda: stdlib_dumps(search),
+            "after": lambda: json_response.dump_json(search),
+        },
+    }
+
+
+def cpu_us(fn: Callable[[], bytes], repeat: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    orjson = json_response.orjson
+    print(f"CPU microseconds per {args.items}-item response (orjson {'on' if orjson else 'not installed'})")
+    print(f"{'response':<16}{'before':>10}{'after':>10}{'stdlib':>10}{'speedup':>9}")
+    for label, fns in cases(args.items).items():
+        before = cpu_us(fns["before"], args.repeat)
+        after = cpu_us(fns["after"], args.repeat)
+        json_response.orjson = None
+        try:
+            fallback = cpu_us(fns["after"], args.repeat)
+        finally:
+            json_response.orjson = orjson
+        print(f"{label:<16}{before:>10.0f}{after:>10.0f}{fallback:>10.0f}{before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Stream one large user history out of and back into a running server, tracking its peak RSS.
+
+Usage (from backend/):
+    python -m benchmarks.bench_transfer [--database-url URL] [--logs 1000000]
+        [--skip-get-logs]
+
+Generates one user (``user-0``) with ``--logs`` logs, 10 stocks and 2 "my"
+tasks (``benchmarks.datagen``) and starts ``uvicorn app.main:app`` on it.
+Then, one request at a time:
+
+- ``GET /export`` as NDJSON and as CSV, streamed to temporary files;
+- ``POST /import`` of each file for a new user, streamed from disk, and the
+  NDJSON file once more for that user (every record ``exists``);
+- ``GET /logs`` without ``limit``, which builds the whole history in memory,
+  for comparison (skip with ``--skip-get-logs``).
+
+For each request it prints the wall time, the body size and the server
+process's peak RSS over that request (``VmHWM``, reset through
+``/proc/<pid>/clear_refs`` first; Linux only), next to its RSS before it.
+
+Without ``--database-url`` a throwaway SQLite file is used. A Postgres URL
+must point at a scratch database: its tables are dropped and recreated.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+
+from . import datagen
+from .bench_cold_start import BACKEND_DIR, _free_port, _wait_for
+
+
+def _status_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def _reset_peak(pid: int) -> None:
+    with open(f"/proc/{pid}/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _file_chunks(path: str, size: int = 1 << 16):
+    with open(path, "rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    parser.add_argument("--skip-get-logs", action="store_true")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'bench_transfer.db')}"
+
+    from app.core.database import Base
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    datagen.generate(engine, datagen.Scale(users=1, achievements=args.logs, catalog_tasks=1_000))
+    engine.dispose()
+    print(f"generated {args.logs} logs for {datagen.user_id(0)} in {time.perf_counter() - start:.1f}s")
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=url, QUERY_BUDGET_MODE="off")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    files = {fmt: os.path.join(tmpdir.name, f"export.{fmt}") for fmt in ("ndjson", "csv")}
+    print(f"\n{'request':<34}{'seconds':>9}{'MB':>9}{'RSS before MB':>15}{'peak RSS MB':>13}")
+    try:
+        _wait_for(f"{base}/healthz", time.perf_counter() + 120)
+        client = httpx.Client(base_url=base, timeout=None)
+
+        def measure(label: str, send) -> None:
+            _reset_peak(proc.pid)
+            before = _status_kb(proc.pid, "VmRSS")
+            start = time.perf_counter()
+            size = send()
+            seconds = time.perf_counter() - start
+            print(
+                f"{label:<34}{seconds:>9.1f}{size / 1e6:>9.1f}{before / 1024:>15.0f}"
+                f"{_status_kb(proc.pid, 'VmHWM') / 1024:>13.0f}"
+            )
+
+        owner = {"X-User-Id": datagen.user_id(0)}
+
+        def get_logs() -> int:
+            r = client.get("/logs", headers=owner)
+            r.raise_for_status()
+            return len(r.content)
+
+        def export(fmt: str):
+            def send() -> int:
+                size = 0
+                with client.stream("GET", "/export", params={"format": fmt}, headers=owner) as r, open(
+                    files[fmt], "wb"
+                ) as out:
+                    r.raise_for_status()
+                    for chunk in r.iter_bytes():
+                        out.write(chunk)
+                        size += len(chunk)
+                return size
+            return send
+
+        def upload(fmt: str, user: str):
+            def send() -> int:
+                r = client.post(
+                    "/import", params={"format": fmt}, content=_file_chunks(files[fmt]), headers={"X-User-Id": user}
+                )
+                r.raise_for_status()
+                print(f"  {r.json()}")
+                return os.path.getsize(files[fmt])
+            return send
+
+        measure("GET /export ndjson", export("ndjson"))
+        measure("GET /export csv", export("csv"))
+        measure("POST /import ndjson (new user)", upload("ndjson", "imported-ndjson"))
+        measure("POST /import csv (new user)", upload("csv", "imported-csv"))
+        measure("POST /import ndjson (again)", upload("ndjson", "imported-ndjson"))
+        # Last: the memory it grabs stays with the process.
+        if not args.skip_get_logs:
+            measure("GET /logs (materialized)", get_logs)
+    finally:
+        proc.terminate()
+        proc.wait()
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
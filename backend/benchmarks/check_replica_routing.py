@@ -0,0 +1,173 @@
+"""Check read-replica routing against two independent databases.
+
+Usage (from backend/):
+    python -m benchmarks.check_replica_routing
+    python -m benchmarks.check_replica_routing --database-url URL --read-url URL
+
+Without URLs the primary and the replica are two throwaway SQLite files.
+Two Postgres URLs must point at scratch databases on the same server, as a
+user allowed to rename the replica database. Both get their tables dropped
+and recreated. Set ``DB_ASYNC=1`` to check the async routes.
+
+Nothing replicates between the two, so a row written to only one of them
+shows which database served a read. The script checks that:
+
+- a GET reads from the replica;
+- a user's write goes to the primary, and their reads are pinned there for
+  ``DB_READ_YOUR_WRITES_SECONDS`` and go back to the replica after that;
+- a GET that writes (``/tasks/daily``) stores its row on the primary;
+- reads fall back to the primary while the replica cannot be reached (the
+  SQLite file is swapped for a directory; the Postgres database is renamed),
+  and return to it once it is reachable again after
+  ``DB_REPLICA_RETRY_SECONDS``.
+
+Prints one line per check and exits with status 1 if any fails.
+``tests/test_replicas.py`` runs the same checks on SQLite under pytest.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.engine import make_url
+
+
+PIN_SECONDS = 1.0
+RETRY_SECONDS = 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--read-url")
+    args = parser.parse_args()
+    if bool(args.database_url) != bool(args.read_url):
+        parser.error("give both --database-url and --read-url, or neither")
+
+    tmpdir = None
+    primary_url, read_url = args.database_url, args.read_url
+    if primary_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        primary_url = f"sqlite:///{os.path.join(tmpdir.name, 'primary.db')}"
+        read_url = f"sqlite:///{os.path.join(tmpdir.name, 'replica.db')}"
+
+    # The app reads its config at import time.
+    os.environ.update(
+        DATABASE_URL=primary_url,
+        DATABASE_READ_URLS=read_url,
+        DB_READ_YOUR_WRITES_SECONDS=str(PIN_SECONDS),
+        DB_REPLICA_RETRY_SECONDS=str(RETRY_SECONDS),
+    )
+    os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+    from fastapi.testclient import TestClient
+
+    from app.core.database import Base, engine
+    from app.main import app
+    from app.models import DailyAssignment, Stock, Task
+    from app.services.seeding import seed_catalog
+    from app.startup import bootstrap
+    from scripts.load_data import tasks as seed_tasks
+
+    replica_engine = create_engine(read_url)
+    for target, title in ((engine, "on the primary"), (replica_engine, "on the replica")):
+        Base.metadata.drop_all(bind=target)
+        Base.metadata.create_all(bind=target)
+        with target.begin() as conn:
+            seed_catalog(conn, seed_tasks)
+            conn.execute(insert(Task).values(title=title, source="my", owner_user_id="reader"))
+        # Only the replica has a stock of task 1.
+        if target is replica_engine:
+            with target.begin() as conn:
+                conn.execute(insert(Stock).values(user_id="reader", task_id=1))
+    bootstrap(engine)
+
+    failures = 0
+
+    def check(label: str, ok: bool) -> None:
+        nonlocal failures
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label}")
+
+    def my_titles(client: TestClient, user: str) -> set:
+        r = client.get("/my_tasks", headers={"X-User-Id": user})
+        r.raise_for_status()
+        return {item["title"] for item in r.json()}
+
+    def stocks(client: TestClient, user: str) -> int:
+        r = client.get("/stock", headers={"X-User-Id": user})
+        r.raise_for_status()
+        return len(r.json())
+
+    def set_replica_reachable(reachable: bool) -> None:
+        from app.core.database import async_replica_set, replica_set
+
+        for replica in replica_set.replicas:
+            replica.engine.dispose()
+        if async_replica_set is not None:
+            # Its connections belong to the client's event loop; just drop them.
+            for replica in async_replica_set.replicas:
+                replica.engine.dispose(close=False)
+        replica_engine.dispose()
+        url = make_url(read_url)
+        if url.get_backend_name() == "sqlite":
+            if reachable:
+                os.rmdir(url.database)
+                shutil.move(url.database + ".off", url.database)
+            else:
+                shutil.move(url.database, url.database + ".off")
+                os.mkdir(url.database)
+            return
+        names = (url.database + "_off", url.database) if reachable else (url.database, url.database + "_off")
+        with create_engine(primary_url, isolation_level="AUTOCOMMIT").connect() as conn:
+            conn.execute(
+                text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = :name"),
+                {"name": names[0]},
+            )
+            conn.execute(text(f'ALTER DATABASE "{names[0]}" RENAME TO "{names[1]}"'))
+
+    with TestClient(app) as client:
+        check("GET reads from the replica", my_titles(client, "reader") == {"on the replica"})
+        check("GET /stock reads from the replica", stocks(client, "reader") == 1)
+
+        r = client.post("/my_tasks", json={"title": "new"}, headers={"X-User-Id": "writer"})
+        check("POST writes to the primary", r.status_code == 201)
+        check("the writer's next GET is pinned to the primary", my_titles(client, "writer") == {"new"})
+        check("other users still read from the replica", my_titles(client, "reader") == {"on the replica"})
+        time.sleep(PIN_SECONDS + 0.1)
+        check("after the pin window the writer reads from the replica", my_titles(client, "writer") == set())
+
+        r = client.get("/tasks/daily", headers={"X-User-Id": "reader"})
+        r.raise_for_status()
+        counts = []
+        for target in (engine, replica_engine):
+            with target.connect() as conn:
+                counts.append(conn.execute(select(func.count()).select_from(DailyAssignment)).scalar_one())
+        check("GET /tasks/daily stores its assignment on the primary", counts == [1, 0])
+        time.sleep(PIN_SECONDS + 0.1)
+
+        set_replica_reachable(False)
+        try:
+            r = client.get("/my_tasks", headers={"X-User-Id": "reader"})
+            check("reads fall back to the primary while the replica is down", r.status_code == 200
+                  and {item["title"] for item in r.json()} == {"on the primary"})
+            check("GET /stock falls back too", stocks(client, "reader") == 0)
+        finally:
+            set_replica_reachable(True)
+        check("...until the retry window passes", my_titles(client, "reader") == {"on the primary"})
+        time.sleep(RETRY_SECONDS + 0.1)
+        check("then reads go back to the replica", my_titles(client, "reader") == {"on the replica"})
+        check("GET /stock too", stocks(client, "reader") == 1)
+
+    engine.dispose()
+    replica_engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
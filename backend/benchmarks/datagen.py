@@ -0,0 +1,126 @@
+"""Synthetic data at configurable scale for the route benchmarks.
+
+Populates categories, challenges, catalog tasks (mirroring the challenges),
+per-user "my" tasks, achievements and stocks on an empty schema, then builds
+the daily log rollups and task completion counters (``services.rollups`` and
+``services.task_stats``). Rows are
+generated lazily and inserted in chunks of ``CHUNK_SIZE`` through Core
+executemany (psycopg2 batches these into multi-row VALUES), so memory stays
+flat at millions of achievements. The output only depends on ``seed``.
+
+Users are named ``user-0`` .. ``user-{users-1}``; achievements fall in the
+``DAYS`` days before ``END``.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+import random
+import time
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+
+from app.models import Achievement, Category, Challenge, Stock, Task
+from app.services import rollups, task_stats
+
+from .bench_search import synthetic_catalog
+
+
+CHUNK_SIZE = 10_000
+END = datetime(2026, 6, 30)
+DAYS = 365
+FEELINGS = ["great", "good", "normal", "tired", None]
+
+
+@dataclass
+class Scale:
+    users: int = 1_000
+    achievements: int = 100_000
+    catalog_tasks: int = 10_000
+    stocks_per_user: int = 10
+    my_tasks_per_user: int = 2
+
+
+def user_id(n: int) -> str:
+    return f"user-{n}"
+
+
+def _chunks(rows: Iterable[dict]) -> Iterator[List[dict]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(engine: Engine, model, rows: Iterable[dict]) -> int:
+    count = 0
+    with engine.begin() as conn:
+        for chunk in _chunks(rows):
+            conn.execute(insert(model), chunk)
+            count += len(chunk)
+    return count
+
+
+def generate(engine: Engine, scale: Scale, seed: int = 42) -> Dict[str, float]:
+    """Fill an empty schema; returns rows per table and seconds per phase."""
+    rng = random.Random(seed)
+    report: Dict[str, float] = {}
+
+    def phase(name: str, model, rows: Iterable[dict]) -> None:
+        start = time.perf_counter()
+        report[f"{name}_rows"] = _insert(engine, model, rows)
+        report[f"{name}_seconds"] = round(time.perf_counter() - start, 2)
+
+    categories, catalog_rows = synthetic_catalog(scale.catalog_tasks, seed)
+    # Inserted in order into an empty table, so ids match synthetic_catalog's category_id.
+    phase("categories", Category, ({"name": name} for name in categories))
+    phase(
+        "challenges",
+        Challenge,
+        ({k: r[k] for k in ("title", "description", "difficulty", "category_id")} for r in catalog_rows),
+    )
+    phase("catalog_tasks", Task, catalog_rows)
+    phase(
+        "my_tasks",
+        Task,
+        (
+            {"title": f"my task {i}", "description": None, "difficulty": 1, "source": "my", "owner_user_id": user_id(u)}
+            for u in range(scale.users)
+            for i in range(scale.my_tasks_per_user)
+        ),
+    )
+    with engine.connect() as conn:
+        task_ids = conn.execute(select(Task.id).where(Task.source == "catalog").order_by(Task.id)).scalars().all()
+
+    def achievements() -> Iterator[dict]:
+        for i in range(scale.achievements):
+            yield {
+                "id": f"a-{i}",
+                "user_id": user_id(rng.randrange(scale.users)),
+                "task_id": rng.choice(task_ids),
+                "feeling": rng.choice(FEELINGS),
+                "achieved_at": END - timedelta(seconds=rng.randrange(DAYS * 86400)),
+            }
+
+    def stocks() -> Iterator[dict]:
+        per_user = min(scale.stocks_per_user, len(task_ids))
+        for u in range(scale.users):
+            for j, task_id in enumerate(rng.sample(task_ids, per_user)):
+                yield {
+                    "id": f"s-{u}-{j}",
+                    "user_id": user_id(u),
+                    "task_id": task_id,
+                    "created_at": END - timedelta(minutes=j),
+                }
+
+    phase("achievements", Achievement, achievements())
+    phase("stocks", Stock, stocks())
+    start = time.perf_counter()
+    report["daily_activity_rows"] = rollups.backfill(engine).rows
+    report["daily_activity_seconds"] = round(time.perf_counter() - start, 2)
+    report["task_stats_seconds"] = task_stats.reconcile(engine).seconds
+    return report
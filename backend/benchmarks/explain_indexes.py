@@ -0,0 +1,168 @@
+"""Check with EXPLAIN that the hot query shapes use their indexes at scale.
+
+Usage (from backend/):
+    python -m benchmarks.explain_indexes [--database-url URL] [--generate]
+        [--users 10000] [--achievements 1000000] [--catalog-tasks 100000]
+
+Compiles the statements the routes run, from the builders in
+``app.api.queries`` (first pages and keyset pages after a cursor), plus a
+catalog category filter. Runs ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on SQLite)
+on each and checks that the plan names the expected index; on Postgres the
+GET /logs shapes must also read it in order, without a sort. Prints
+the plans and exits with status 1 if any check fails. ``tests/test_indexes.py``
+runs the same checks (``check``) at a smaller scale.
+
+Without ``--database-url`` a throwaway SQLite file is filled with
+``benchmarks.datagen``. With a URL the existing data is used unless
+``--generate`` is given, which drops and recreates the tables. Either way the
+schema is brought up to date with ``create_all`` plus migrations first, so
+this also exercises the migration on an existing database.
+"""
+
+import argparse
+from datetime import datetime
+import os
+import tempfile
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Connection
+
+from app import migrations
+from app.api import queries
+from app.api.pagination import encode_cursor
+from app.core.database import Base
+from app.models import Task
+from app.services import completions
+
+from . import datagen
+
+
+def shapes(dialect: str) -> List[Tuple[str, object, Tuple[str, ...], bool]]:
+    """(label, statement, acceptable index names, whether the index must also
+    give the ``ORDER BY``) on ``dialect``."""
+    user = datagen.user_id(1)
+    # SQLite sorts keyset DateTime keys by julianday() (``pagination._comparable``),
+    # which no index provides, so it may scan either user-leading index and
+    # sort. Postgres must be able to walk (user_id, achieved_at, id) in order.
+    if dialect == "sqlite":
+        user_logs, in_order = ("ix_achievements_user_achieved", "ix_achievements_user_task"), False
+    else:
+        user_logs, in_order = ("ix_achievements_user_achieved",), True
+    logs_cursor = encode_cursor(datetime(2026, 3, 15), "a-0")
+    return [
+        ("GET /logs", queries.logs_statement(user, None, None, None), user_logs, in_order),
+        (
+            "GET /logs?month",
+            queries.logs_statement(user, "2026-03", None, None),
+            ("ix_achievements_user_achieved",),
+            in_order,
+        ),
+        ("GET /logs?limit", queries.logs_statement(user, None, None, 50), user_logs, in_order),
+        ("GET /logs?cursor", queries.logs_statement(user, None, logs_cursor, 50), user_logs, in_order),
+        (
+            "search: completed ids",
+            completions.completed_task_ids_statement(user),
+            # Covering (user_id, task_id) on SQLite; Postgres reads task_id from the INCLUDE.
+            ("ix_achievements_user_achieved", "ix_achievements_user_task"),
+            False,
+        ),
+        (
+            "GET /stock",
+            queries.stocked_tasks_statement(user),
+            ("ix_stocks_user_created", "uq_stocks_user_task"),
+            False,
+        ),
+        (
+            "GET /stock?cursor",
+            queries.stocked_tasks_statement(user, "created", encode_cursor("created", datetime(2026, 3, 15), 1), 20),
+            ("ix_stocks_user_created", "uq_stocks_user_task"),
+            False,
+        ),
+        (
+            "DELETE /stock/by-task/{task_id}",
+            queries.stock_delete_statement(user, [1]),
+            ("uq_stocks_user_task",),
+            False,
+        ),
+        ("GET /my_tasks", queries.my_tasks_statement(user), ("ix_tasks_source_owner_created",), False),
+        (
+            "GET /my_tasks?cursor",
+            queries.my_tasks_statement(user, "created", encode_cursor("created", datetime(2026, 3, 15), 10**9), 20),
+            ("ix_tasks_source_owner_created",),
+            False,
+        ),
+        (
+            "catalog tasks in a category",
+            select(Task.id).where(Task.source == "catalog", Task.category_id == 3),
+            ("ix_tasks_source_category",),
+            False,
+        ),
+    ]
+
+
+def explain(conn: Connection, stmt, in_order: bool = False) -> str:
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if conn.dialect.name == "sqlite":
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return "\n".join(row[-1] for row in rows)
+    if in_order:
+        # A sort is cheaper than an index walk for users with few rows; price
+        # it out to see whether the index can give the order at all.
+        conn.exec_driver_sql("SET LOCAL enable_sort = off")
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).all()
+    conn.rollback()
+    return "\n".join(row[0] for row in rows)
+
+
+def check(conn: Connection) -> List[Tuple[str, Tuple[str, ...], str, bool]]:
+    """(label, acceptable index names, plan, whether the plan uses one, and
+    without a sort where the index must give the order) per shape."""
+    results = []
+    for label, stmt, expected, in_order in shapes(conn.dialect.name):
+        plan = explain(conn, stmt, in_order)
+        ok = any(name in plan for name in expected) and not (in_order and "Sort" in plan)
+        results.append((label, expected, plan, ok))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--generate", action="store_true")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--achievements", type=int, default=1_000_000)
+    parser.add_argument("--catalog-tasks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'explain.db')}"
+        args.generate = True
+    engine = create_engine(url)
+    if args.generate:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        print(datagen.generate(engine, datagen.Scale(args.users, args.achievements, args.catalog_tasks)))
+    Base.metadata.create_all(bind=engine)
+    applied = migrations.migrate(engine)
+    print(f"migrations applied: {', '.join(applied) or 'none'}\n")
+
+    with engine.connect() as conn:
+        results = check(conn)
+    for label, expected, plan, ok in results:
+        print(f"[{'ok' if ok else 'FAIL'}] {label} (expects {' or '.join(expected)})")
+        print("    " + plan.replace("\n", "\n    "))
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    failed = sum(not ok for *_, ok in results)
+    print(f"\n{len(results) - failed}/{len(results)} query shapes use their index")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
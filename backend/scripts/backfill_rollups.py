@@ -0,0 +1,36 @@
+"""Build the daily log rollups (``daily_activity``) from existing achievements.
+
+Run once after deploying the rollup table on a database that already has
+logs; new logs are counted by the API as they are written. Users are rebuilt
+``--chunk-users`` at a time, each chunk in its own short transaction, so the
+job can run alongside the app and be interrupted and rerun (rebuilding is
+idempotent). Usage (from backend/):
+    python -m scripts.backfill_rollups [--chunk-users 500]
+"""
+import argparse
+import time
+
+from app.core.database import Base, engine
+from app.services import rollups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-users", type=int, default=500)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+
+    def progress(report: rollups.BackfillReport) -> None:
+        print(
+            f"chunk {report.chunks}: {report.users} users, {report.rows} rollup rows"
+            f" ({time.perf_counter() - start:.1f}s)"
+        )
+
+    report = rollups.backfill(engine, args.chunk_users, progress)
+    print(f"Done: {report.users} users, {report.rows} rollup rows in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Recompute every user's top-k daily task candidates (``recommendations``).
+
+Scores all catalog tasks per user from their logs and stocks with NumPy
+(``app/services/recommender.py``) and replaces each chunk of users'
+candidates in its own transaction, so the app keeps serving while it runs.
+A chunk holds at most ``recommender.CELL_BUDGET`` (user, task) scores, about
+160 MB; ``--chunk-users`` can only make chunks smaller.
+Run it periodically (e.g. nightly, before ``scripts.pregenerate_daily``).
+Usage (from backend/):
+    python -m scripts.build_recommendations [--top-k 20] [--chunk-users N]
+"""
+import argparse
+
+from app.core.config import RECOMMENDATION_TOP_K
+from app.core.database import Base, engine
+from app.services import recommender
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top-k", type=int, default=RECOMMENDATION_TOP_K)
+    parser.add_argument("--chunk-users", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    def progress(report: recommender.BuildReport) -> None:
+        if report.chunks % 10 == 0:
+            print(f"{report.chunks} chunks: {report.rows} candidates")
+
+    report = recommender.build(engine, args.top_k, args.chunk_users, args.seed, progress)
+    print(
+        f"Done: {report.users} users x {report.tasks} tasks, {report.rows} candidates"
+        f" (load {report.load_seconds}s, score {report.score_seconds}s, write {report.write_seconds}s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
-"""Seed script to load tasks into DB."""
-import psycopg2
+"""Seed script to load tasks into DB.
+
+Run from backend/ as ``python scripts/load_data.py`` (or ``python -m scripts.load_data``).
+"""
 import os
+import sys
 
 # --- 1. 投入するデータを用意する ---
 # あなたが作成した100件のテストタスクをこの形式で記述します。
@@ -618,83 +621,52 @@ DB_HOST = os.getenv("DB_HOST", "db")  # docker-compose ではサービス名 "db
 DB_PORT = os.getenv("DB_PORT", "5432")
 
 # --- 3. データを投入するスクリプト本体 ---
-def load_data():
-    conn = None
-    try:
-        # データベースに接続（DATABASE_URL があれば優先）
-        if DB_URL:
-            conn = psycopg2.connect(DB_URL)
-        else:
-            conn = psycopg2.connect(
-                dbname=DB_NAME,
-                user=DB_USER,
-                password=DB_PASS,
-                host=DB_HOST,
-                port=DB_PORT,
-            )
-        cur = conn.cursor()
-        print("データベース接続成功。")
-
-        # 既存件数を出力（以降は不足分のみを追加）
-        try:
-            cur.execute("SELECT COUNT(*) FROM challenges")
-            existing = cur.fetchone()[0]
-            print(f"現在の challenges 件数: {existing}")
-        except Exception:
-            # テーブル未作成時でも後続で作成される想定のため、そのまま続行
-            pass
+def _database_url():
+    from sqlalchemy.engine import URL
 
-        # まず、カテゴリを挿入し、IDを記録する
-        category_ids = {}
-        for task in tasks:
-            category_name = task['category']
-            if category_name not in category_ids:
-                # カテゴリが既に存在するか確認
-                cur.execute("SELECT id FROM categories WHERE name = %s", (category_name,))
-                result = cur.fetchone()
-                if result:
-                    category_ids[category_name] = result[0]
-                else:
-                    # 新しいカテゴリを挿入し、そのIDを取得
-                    cur.execute("INSERT INTO categories (name) VALUES (%s) RETURNING id", (category_name,))
-                    category_id = cur.fetchone()[0]
-                    category_ids[category_name] = category_id
-                    print(f"カテゴリ '{category_name}' をID: {category_id} で挿入しました。")
+    if DB_URL:
+        return DB_URL
+    return URL.create(
+        "postgresql+psycopg2",
+        username=DB_USER,
+        password=DB_PASS,
+        host=DB_HOST,
+        port=int(DB_PORT),
+        database=DB_NAME,
+    )
 
-        # 次に、挑戦（チャレンジ）を挿入する（未登録のみ）
-        inserted, skipped = 0, 0
-        for task in tasks:
-            category_id = category_ids[task['category']]
-            # 既存チェック（カテゴリ + タイトルで判定）
-            cur.execute(
-                "SELECT id FROM challenges WHERE category_id = %s AND title = %s",
-                (category_id, task['title']),
-            )
-            found = cur.fetchone()
-            if found:
-                skipped += 1
-                continue
 
-            cur.execute(
-                "INSERT INTO challenges (category_id, title, description, difficulty) VALUES (%s, %s, %s, %s)",
-                (category_id, task['title'], task['description'], task['difficulty'])
-            )
-            inserted += 1
-
-        # 変更をデータベースにコミット（保存）
-        conn.commit()
-        print(f"\n成功: {inserted}件を新規挿入、{skipped}件をスキップしました。")
+def load_data():
+    # 直接実行された場合でも app パッケージを import できるようにする
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import SQLAlchemyError
+    from app.services.seeding import seed_catalog
 
-    except psycopg2.Error as e:
+    engine = create_engine(_database_url())
+    try:
+        # 差分を一括で計算し、まとめて INSERT/UPDATE する（1トランザクション）
+        with engine.begin() as conn:
+            print("データベース接続成功。")
+            report = seed_catalog(conn, tasks)
+        print(
+            f"\n成功: カテゴリ {report['categories_inserted']}件、"
+            f"チャレンジ {report['challenges_inserted']}件を新規挿入、"
+            f"{report['challenges_updated']}件を更新しました。"
+        )
+        print(
+            f"カタログタスク: {report['tasks_inserted']}件を新規挿入、"
+            f"{report['tasks_updated']}件を更新しました。"
+        )
+        print("所要時間 (ms): " + ", ".join(f"{k}={v}" for k, v in report["timings_ms"].items()))
+    except SQLAlchemyError as e:
+        # engine.begin() がエラー時にロールバックする
         print(f"データベースエラー: {e}")
-        if conn:
-            conn.rollback() # エラーの場合は変更をロールバック
     finally:
-        # 接続を閉じる
-        if conn:
-            cur.close()
-            conn.close()
-            print("データベース接続を閉じました。")
+        engine.dispose()
+        print("データベース接続を閉じました。")
 
 if __name__ == '__main__':
     load_data()
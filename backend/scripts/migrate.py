@@ -0,0 +1,22 @@
+"""Create missing tables and apply pending schema migrations.
+
+Safe to run on every deploy (e.g. as the Render pre-deploy command) and
+alongside running app workers: migrations are serialized with an advisory
+lock on Postgres and skipped once applied. Usage (from backend/):
+    python -m scripts.migrate
+"""
+from app.core.database import Base, engine
+from app import migrations
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    applied = migrations.migrate(engine)
+    if applied:
+        print("Applied: " + ", ".join(applied))
+    else:
+        print(f"Up to date (schema_version {migrations.head()}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Assign the next day's daily task to every recently active user in bulk.
+
+Users with a log in the last ``--active-days`` days (read from the daily
+rollups) get their task for ``--date`` (default: tomorrow) in chunks of
+``--chunk-users`` users, one multi-row insert per chunk; tasks already
+assigned or replaced for that date are kept, so the job can be rerun. Their
+first ``GET /tasks/daily`` that day is then a primary-key lookup. Assignments
+older than ``--keep-days`` days are deleted. Run it daily (a cron job) ahead
+of midnight in the users' time zone. Usage (from backend/):
+    python -m scripts.pregenerate_daily [--date YYYY-MM-DD] [--active-days 30]
+        [--chunk-users 1000] [--keep-days 90]
+"""
+import argparse
+from datetime import date, timedelta
+import time
+
+from app.core.database import Base, SessionLocal, engine
+from app.services import catalog, daily_assignments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today() + timedelta(days=1))
+    parser.add_argument("--active-days", type=int, default=30)
+    parser.add_argument("--chunk-users", type=int, default=1000)
+    parser.add_argument("--keep-days", type=int, default=90)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        snap = catalog.get_snapshot(db)
+    report = daily_assignments.pregenerate(
+        engine, snap, args.date, args.date - timedelta(days=args.active_days), args.chunk_users
+    )
+    pruned = daily_assignments.prune(engine, args.date - timedelta(days=args.keep_days))
+    print(
+        f"{args.date}: {report.assigned} of {report.users} active users assigned"
+        f" ({report.chunks} chunks), {pruned} old assignments pruned"
+        f" in {time.perf_counter() - start:.1f}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
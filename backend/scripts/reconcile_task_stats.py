@@ -0,0 +1,26 @@
+"""Recompute the daily task completion counters from ``achievements``.
+
+The API keeps ``task_stats`` and ``stats_counters`` up to date incrementally;
+this job recomputes the exact values in one pass and rewrites the rows that
+drifted (e.g. two simultaneous first logs of a task by one user, or logs
+loaded outside the API). Run it periodically (a nightly cron job) and once
+after deploying the counters on a database that already has logs. On
+Postgres it holds back log writes for the duration of the pass. Usage (from
+backend/):
+    python -m scripts.reconcile_task_stats
+"""
+from app.core.database import Base, engine
+from app.services import task_stats
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    report = task_stats.reconcile(engine)
+    print(
+        f"{report.tasks} tasks with completions, {report.corrected} counters corrected;"
+        f" active users {report.active_users_before} -> {report.active_users} ({report.seconds}s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
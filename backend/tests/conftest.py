@@ -0,0 +1,61 @@
+"""Test setup: the app against a throwaway database, with query budgets raising.
+
+The app reads its config at import time, so the environment is set here
+before anything from ``app`` is imported. By default the database is a SQLite
+file in a temporary directory; ``TEST_DATABASE_URL`` points the run at a
+scratch Postgres database instead (its tables are dropped and recreated).
+``DB_ASYNC=1`` runs the same tests against the async routes.
+
+The app and its in-process caches live for the whole session, so tests do
+not share users: each takes a fresh ``user`` id.
+"""
+
+import os
+import tempfile
+import uuid
+
+import pytest
+
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir.name, 'test.db')}"
+)
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app import models  # noqa: F401  # register the tables
+    from app.core.database import Base, engine
+
+    Base.metadata.drop_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/admin/init-data").raise_for_status()
+        yield client
+
+
+@pytest.fixture
+def user() -> str:
+    return f"test-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def catalog_ids(client) -> list:
+    r = client.get("/challenges/search", headers={"X-User-Id": "catalog-reader"})
+    r.raise_for_status()
+    return [item["id"] for item in r.json()]
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    _tmpdir.cleanup()
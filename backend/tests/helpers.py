@@ -0,0 +1,54 @@
+"""Request helpers shared by the tests."""
+
+from datetime import datetime, timedelta
+import re
+from typing import List, Tuple
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+
+
+_STATEMENTS = re.compile(r'desc="(\d+) statements"')
+
+
+def statements(response) -> int:
+    """SQL statements the request ran, from its ``Server-Timing`` header."""
+    return int(_STATEMENTS.search(response.headers["server-timing"]).group(1))
+
+
+def walk(client, path: str, params: dict, user: str, max_pages: int = 1000) -> Tuple[List, int]:
+    """GET every page of a keyset-paged list: the responses' bodies, in
+    order, and the number of pages. Fails if the cursor does not advance."""
+    bodies, cursor, seen = [], None, set()
+    for _ in range(max_pages):
+        r = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers={"X-User-Id": user})
+        assert r.status_code == 200, r.text
+        bodies.append(r.json())
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return bodies, len(bodies)
+        assert cursor not in seen, f"{path} returned the cursor {cursor} twice"
+        seen.add(cursor)
+    raise AssertionError(f"{path} did not finish paging in {max_pages} pages")
+
+
+def add_logs(client, user: str, task_ids: list, count: int) -> None:
+    """``count`` logs for ``user``: one in five through ``POST /logs`` (the
+    server's timestamp, without fractional seconds on SQLite), the rest in
+    batches with client timestamps, several sharing the same instant."""
+    start = datetime(2026, 3, 1, 12, 0, 0, 250_000)
+    batch = []
+    for i in range(count):
+        task_id = task_ids[i % len(task_ids)]
+        if i % 5 == 0:
+            r = client.post("/logs", json={"task_id": task_id}, headers={"X-User-Id": user})
+            assert r.status_code == 201, r.text
+            continue
+        achieved_at = start + timedelta(minutes=i // 3)
+        batch.append({"client_id": f"c{i}", "task_id": task_id, "achieved_at": achieved_at.isoformat()})
+    for i in range(0, len(batch), 100):
+        r = client.post("/logs/batch", json={"logs": batch[i:i + 100]}, headers={"X-User-Id": user})
+        assert r.status_code == 200, r.text
+
+
+def log_ids(body: dict) -> list:
+    return [log["id"] for day in body.values() for log in day]
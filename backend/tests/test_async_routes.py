@@ -0,0 +1,37 @@
+"""The async routes (``DB_ASYNC=1``) keep CPU-bound work off the event loop."""
+
+import asyncio
+
+import pytest
+
+from app.api import queries
+from app.core.config import DB_ASYNC
+from app.services import catalog
+
+
+pytestmark = pytest.mark.skipif(not DB_ASYNC, reason="the async routes are mounted with DB_ASYNC=1")
+
+
+def on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_search_runs_in_a_worker_thread(client, user, monkeypatch):
+    calls = []
+    search_body = queries.search_body
+
+    def spy(*args):
+        calls.append(on_event_loop())
+        return search_body(*args)
+
+    monkeypatch.setattr(queries, "search_body", spy)
+    catalog.bump_catalog_version()
+    for params in ({}, {"q": "る"}, {"limit": 3}):
+        r = client.get("/challenges/search", params=params, headers={"X-User-Id": user})
+        assert r.status_code == 200, r.text
+        assert r.json()
+    assert calls == [False, False, False]
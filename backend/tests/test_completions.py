@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.services import completions
+
+
+class FailingSession:
+    def scalars(self, statement):
+        raise OperationalError(str(statement), {}, Exception("connection lost"))
+
+
+class FailingAsyncSession:
+    async def scalars(self, statement):
+        raise OperationalError(str(statement), {}, Exception("connection lost"))
+
+
+def test_failed_load_stops_collecting_completions(user):
+    with pytest.raises(OperationalError):
+        completions.completed_ids(FailingSession(), user)
+    with pytest.raises(OperationalError):
+        asyncio.run(completions.completed_ids_async(FailingAsyncSession(), f"{user}-async"))
+
+    completions.record_completion(user, 1)
+    completions.record_completion(f"{user}-async", 1)
+    assert user not in completions.cache._loading
+    assert f"{user}-async" not in completions.cache._loading
+
+
+def test_completion_recorded_during_a_load_is_kept(user):
+    assert completions.cache.lookup(user) is None
+    completions.record_completion(user, 7)
+    bitmap = completions.cache.install(user, [3])
+    assert sorted(bitmap) == [3, 7]
+    assert user not in completions.cache._loading
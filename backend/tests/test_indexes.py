@@ -0,0 +1,44 @@
+"""The hot query shapes use their indexes (``benchmarks/explain_indexes.py``).
+
+Runs against its own database, filled by ``benchmarks.datagen`` at
+``SCALE``: a SQLite file by default, or the scratch database in
+``TEST_EXPLAIN_DATABASE_URL`` (its tables are dropped and recreated).
+``TEST_EXPLAIN_ACHIEVEMENTS`` raises the achievement count.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import migrations
+from app.core.database import Base
+from benchmarks import datagen, explain_indexes
+
+
+SCALE = datagen.Scale(
+    users=1_000,
+    achievements=int(os.getenv("TEST_EXPLAIN_ACHIEVEMENTS", "50000")),
+    catalog_tasks=10_000,
+)
+
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory) -> dict:
+    url = os.getenv("TEST_EXPLAIN_DATABASE_URL") or f"sqlite:///{tmp_path_factory.mktemp('explain') / 'explain.db'}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    datagen.generate(engine, SCALE)
+    migrations.migrate(engine)
+    with engine.connect() as conn:
+        results = explain_indexes.check(conn)
+    engine.dispose()
+    return {label: (expected, plan, ok) for label, expected, plan, ok in results}
+
+
+# The labels are the same on every dialect; only the accepted indexes differ.
+@pytest.mark.parametrize("label", [label for label, *_ in explain_indexes.shapes("sqlite")])
+def test_shape_uses_its_index(plans, label):
+    expected, plan, ok = plans[label]
+    assert ok, f"{label}: expected {' or '.join(expected)} in\n{plan}"
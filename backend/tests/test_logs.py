@@ -0,0 +1,80 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app.models import Achievement
+
+from .helpers import add_logs, log_ids, statements, walk
+
+
+def test_statements_do_not_grow_with_the_log_count(client, catalog_ids, user):
+    few, many = f"{user}-few", f"{user}-many"
+    add_logs(client, few, catalog_ids, 5)
+    add_logs(client, many, catalog_ids, 250)
+    client.get("/logs", headers={"X-User-Id": few}).raise_for_status()
+
+    counts = {}
+    for who, expected in ((few, 5), (many, 250)):
+        r = client.get("/logs", headers={"X-User-Id": who, "Accept-Encoding": "identity"})
+        assert r.status_code == 200
+        assert len(log_ids(r.json())) == expected
+        counts[who] = statements(r)
+    assert counts[few] == counts[many]
+
+
+def test_paging_reaches_the_end_without_duplicates_or_gaps(client, catalog_ids, user):
+    add_logs(client, user, catalog_ids, 53)
+    everything = log_ids(client.get("/logs", headers={"X-User-Id": user}).json())
+    assert len(everything) == 53
+
+    for limit in (1, 2, 7, 53, 100):
+        bodies, pages = walk(client, "/logs", {"limit": limit}, user)
+        paged = [log_id for body in bodies for log_id in log_ids(body)]
+        assert paged == everything
+        assert pages == max(1, -(-53 // limit))
+
+
+def test_month_paging(client, catalog_ids, user):
+    add_logs(client, user, catalog_ids, 30)
+    params = {"month": "2026-03"}
+    everything = log_ids(client.get("/logs", params=params, headers={"X-User-Id": user}).json())
+    assert len(everything) == 24
+    bodies, _ = walk(client, "/logs", {**params, "limit": 5}, user)
+    assert [log_id for body in bodies for log_id in log_ids(body)] == everything
+
+
+def test_batch_resubmission_is_idempotent(client, engine, catalog_ids, user):
+    headers = {"X-User-Id": user}
+    r = client.post("/my_tasks", json={"title": "not yours"}, headers={"X-User-Id": f"{user}-other"})
+    others_task = r.json()["id"]
+    batch = [
+        {"client_id": "a", "task_id": catalog_ids[0]},
+        {"client_id": "b", "task_id": catalog_ids[1], "achieved_at": "2026-03-05T08:00:00"},
+        {"client_id": "b", "task_id": catalog_ids[1], "achieved_at": "2026-03-05T08:00:00"},
+        {"client_id": "c", "task_id": -1},
+        {"client_id": "d", "task_id": others_task},
+    ]
+
+    def send(logs) -> list:
+        r = client.post("/logs/batch", json={"logs": logs}, headers=headers)
+        assert r.status_code == 200, r.text
+        return [(item["client_id"], item["status"], item["log_id"]) for item in r.json()["results"]]
+
+    first = send(batch)
+    assert [status for _, status, _ in first] == ["created", "created", "exists", "not_found", "forbidden"]
+    log_a, log_b = first[0][2], first[1][2]
+    assert first[2][2] == log_b and first[3][2] is None and first[4][2] is None
+
+    again = send(batch)
+    assert [status for _, status, _ in again] == ["exists", "exists", "exists", "not_found", "forbidden"]
+    assert [log_id for *_, log_id in again] == [log_id for *_, log_id in first]
+
+    partial = send([batch[0], {"client_id": "e", "task_id": catalog_ids[2]}])
+    assert [status for _, status, _ in partial] == ["exists", "created"]
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(Achievement.id).where(Achievement.user_id == user)).scalars().all()
+    assert sorted(rows) == sorted([log_a, log_b, partial[1][2]])
+    assert sorted(log_ids(client.get("/logs", headers=headers).json())) == sorted(rows)
+    r = client.get("/logs/summary", params={"from": "2026-01-01", "to": date.today().isoformat()}, headers=headers)
+    assert r.json()["total"] == 3
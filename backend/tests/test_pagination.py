@@ -0,0 +1,96 @@
+"""Walk every keyset-paged list to its end and compare with the unpaged list:
+same rows, same order, no duplicates, no gaps.
+
+The large walks insert ``LARGE_ROWS`` logs and "my" tasks for one user
+straight into the database, most of them sharing a timestamp, half of the
+logs with the server's ``CURRENT_TIMESTAMP`` (no fractional seconds on
+SQLite) and half with client timestamps, so ties are broken by id and both
+stored formats meet at page boundaries. They take about a minute; ``-m "not
+slow"`` skips them.
+"""
+
+from datetime import datetime, timedelta
+import uuid
+
+import pytest
+from sqlalchemy import func, insert
+
+from app.models import Achievement, Task
+
+from .helpers import add_logs, log_ids, walk
+
+
+LARGE_ROWS = 100_000
+LARGE_PAGE = 500
+
+
+def ids(body) -> list:
+    return [item["id"] for item in body]
+
+
+def assert_same_walk(client, path: str, params: dict, user: str, limit: int, key=ids) -> int:
+    everything = key(client.get(path, params=params, headers={"X-User-Id": user}).json())
+    bodies, pages = walk(client, path, {**params, "limit": limit}, user)
+    paged = [item for body in bodies for item in key(body)]
+    assert len(set(paged)) == len(paged), f"{path} {params}: duplicates"
+    assert paged == everything, f"{path} {params}: pages differ from the full list"
+    return len(everything)
+
+
+@pytest.mark.parametrize("sort", ["created", "difficulty", "category"])
+def test_stock(client, catalog_ids, user, sort):
+    headers = {"X-User-Id": user}
+    # One batch gives most stocks the same created_at.
+    client.post("/stock/batch", json={"task_ids": catalog_ids[:60]}, headers=headers).raise_for_status()
+    for task_id in catalog_ids[60:80]:
+        client.post("/stock", json={"task_id": task_id}, headers=headers).raise_for_status()
+    for limit in (1, 7, 80, 100):
+        assert assert_same_walk(client, "/stock", {"sort": sort}, user, limit) == 80
+
+
+def test_my_tasks(client, user):
+    for i in range(45):
+        r = client.post("/my_tasks", json={"title": f"task {i}"}, headers={"X-User-Id": user})
+        r.raise_for_status()
+    for limit in (1, 4, 45, 50):
+        assert assert_same_walk(client, "/my_tasks", {}, user, limit) == 45
+
+
+@pytest.mark.parametrize("sort", ["relevance", "difficulty", "category"])
+@pytest.mark.parametrize("filters", [{}, {"q": "る"}, {"category_id": 1}], ids=["all", "q", "category"])
+def test_search(client, user, sort, filters):
+    for limit in (1, 7, 200):
+        assert assert_same_walk(client, "/challenges/search", {**filters, "sort": sort}, user, limit) > 0
+
+
+def test_logs(client, catalog_ids, user):
+    add_logs(client, user, catalog_ids, 40)
+    for params in ({}, {"month": "2026-03"}):
+        for limit in (1, 3, 40):
+            assert assert_same_walk(client, "/logs", params, user, limit, key=log_ids) > 0
+
+
+@pytest.mark.slow
+def test_large_logs(client, engine, catalog_ids, user):
+    start = datetime(2026, 3, 1, 12, 0, 0, 500_000)
+    rows = [
+        {"id": str(uuid.uuid4()), "user_id": user, "task_id": catalog_ids[i % len(catalog_ids)]}
+        for i in range(LARGE_ROWS)
+    ]
+    with engine.begin() as conn:
+        # Client timestamps, 50 logs each, and the server's for the other half.
+        conn.execute(
+            insert(Achievement),
+            [{**row, "achieved_at": start - timedelta(seconds=i // 50)} for i, row in enumerate(rows[::2])],
+        )
+        conn.execute(insert(Achievement).values(achieved_at=func.now()), rows[1::2])
+    assert assert_same_walk(client, "/logs", {}, user, LARGE_PAGE, key=log_ids) == LARGE_ROWS
+
+
+@pytest.mark.slow
+def test_large_my_tasks(client, engine, user):
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Task), [{"title": f"task {i}", "source": "my", "owner_user_id": user} for i in range(LARGE_ROWS)]
+        )
+    assert assert_same_walk(client, "/my_tasks", {}, user, LARGE_PAGE) == LARGE_ROWS
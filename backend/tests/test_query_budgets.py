@@ -0,0 +1,299 @@
+"""Every ``@query_budget`` route, in its cold and warm paths, under
+``QUERY_BUDGET_MODE=raise``: a request over budget raises
+``QueryBudgetExceeded`` out of the test client. Each scenario also checks
+the response bodies, so a route that keeps to its budget by returning the
+wrong data fails too."""
+
+import csv
+from datetime import date
+import io
+import json
+
+import pytest
+
+from app.api import routes
+from app.core.config import DB_ASYNC
+from app.core.query_stats import _BUDGET_ATTR
+from app.services import catalog, transfer
+
+from .helpers import log_ids
+
+
+def budgeted_routes() -> set:
+    route_list = list(routes.router.routes)
+    if DB_ASYNC:
+        from app.api import async_routes
+
+        route_list += async_routes.router.routes
+    return {
+        (method, route.path)
+        for route in route_list
+        if getattr(route.endpoint, _BUDGET_ATTR, None) is not None
+        for method in route.methods
+    }
+
+
+def ok(r):
+    assert r.status_code < 400, (r.request.method, r.request.url, r.status_code, r.text)
+    return r
+
+
+def new_my_task(client, headers) -> int:
+    return ok(client.post("/my_tasks", json={"title": "own", "description": "d"}, headers=headers)).json()["id"]
+
+
+def catalog_items(client, headers) -> dict:
+    return {item["id"]: item for item in ok(client.get("/challenges/search", headers=headers)).json()}
+
+
+def stocked_ids(client, headers) -> list:
+    return [item["id"] for item in ok(client.get("/stock", headers=headers)).json()]
+
+
+def daily(client, headers, task_ids):
+    items = catalog_items(client, headers)
+    catalog.bump_catalog_version()
+    first = ok(client.get("/tasks/daily", headers=headers)).json()
+    assert first["source"] == "catalog" and first["title"] == items[int(first["id"])]["title"]
+    assert ok(client.get("/tasks/daily", headers=headers)).json() == first
+    refreshed = ok(client.get("/tasks/daily", params={"force_refresh": True}, headers=headers)).json()
+    assert int(refreshed["id"]) in items
+    assert ok(client.get("/tasks/daily", headers=headers)).json()["id"] == refreshed["id"]
+    anonymous = ok(client.get("/tasks/daily", params={"date": date.today().isoformat()})).json()
+    assert int(anonymous["id"]) in items
+
+
+def daily_replace(client, headers, task_ids):
+    r = ok(client.post("/tasks/daily/replace", json={"source": "catalog", "new_task_id": str(task_ids[0])}, headers=headers))
+    assert (r.json()["id"], r.json()["source"]) == (str(task_ids[0]), "catalog")
+    my_task = new_my_task(client, headers)
+    r = ok(client.post("/tasks/daily/replace", json={"source": "my", "my_task_id": my_task}, headers=headers))
+    assert (r.json()["id"], r.json()["source"], r.json()["title"]) == (str(my_task), "my", "own")
+    assert ok(client.get("/tasks/daily", headers=headers)).json()["id"] == str(my_task)
+
+
+def create_log(client, headers, task_ids):
+    my_task = new_my_task(client, headers)
+    created = []
+    for task_id in (task_ids[0], task_ids[0], my_task):
+        r = ok(client.post("/logs", json={"task_id": task_id, "memo": "m", "feeling": "good"}, headers=headers))
+        assert r.json()["message"] == "Successfully created."
+        created.append(r.json()["log_id"])
+    logs = [log for day in ok(client.get("/logs", headers=headers)).json().values() for log in day]
+    assert sorted(log["id"] for log in logs) == sorted(created)
+    assert sorted(log["challenge"]["id"] for log in logs) == sorted([task_ids[0], task_ids[0], my_task])
+    assert {(log["memo"], log["feeling"]) for log in logs} == {("m", "good")}
+
+
+def create_logs_batch(client, headers, task_ids):
+    batch = {
+        "logs": [
+            {"client_id": "a", "task_id": task_ids[0]},
+            {"client_id": "b", "task_id": task_ids[1], "feeling": "good"},
+            {"client_id": "b", "task_id": task_ids[1]},
+            {"client_id": "c", "task_id": -1},
+        ]
+    }
+    first = ok(client.post("/logs/batch", json=batch, headers=headers)).json()["results"]
+    assert [item["status"] for item in first] == ["created", "created", "exists", "not_found"]
+    again = ok(client.post("/logs/batch", json=batch, headers=headers)).json()["results"]
+    assert [item["status"] for item in again] == ["exists", "exists", "exists", "not_found"]
+    assert [item["log_id"] for item in again] == [item["log_id"] for item in first]
+    assert sorted(log_ids(ok(client.get("/logs", headers=headers)).json())) == sorted(
+        item["log_id"] for item in first[:2]
+    )
+
+
+def get_logs(client, headers, task_ids):
+    catalog.bump_catalog_version()
+    assert ok(client.get("/logs", headers=headers)).json() == {}
+    batch = [{"client_id": str(i), "task_id": t} for i, t in enumerate(task_ids[:5])]
+    results = ok(client.post("/logs/batch", json={"logs": batch}, headers=headers)).json()["results"]
+    created = sorted(item["log_id"] for item in results)
+    for params in ({}, {"month": date.today().strftime("%Y-%m")}, {"limit": 2}):
+        r = ok(client.get("/logs", params=params, headers=headers))
+        assert len(log_ids(r.json())) == (2 if "limit" in params else 5)
+        assert set(log_ids(r.json())) <= set(created)
+        r = client.get("/logs", params=params, headers={**headers, "If-None-Match": r.headers["etag"]})
+        assert ok(r).status_code == 304
+    r = ok(client.get("/logs", params={"limit": 2}, headers=headers))
+    r2 = ok(client.get("/logs", params={"limit": 2, "cursor": r.headers["x-next-cursor"]}, headers=headers))
+    first, second = log_ids(r.json()), log_ids(r2.json())
+    assert len(second) == 2 and not set(first) & set(second)
+    whole = ok(client.get("/logs", headers=headers)).json()
+    assert sorted(log_ids(whole)) == created
+    assert {log["challenge"]["id"] for log in whole[next(iter(whole))]} <= set(task_ids[:5])
+
+
+def log_summary(client, headers, task_ids):
+    ok(client.post("/logs", json={"task_id": task_ids[0]}, headers=headers))
+    today = date.today().isoformat()
+    body = ok(client.get("/logs/summary", params={"from": "2026-01-01", "to": today}, headers=headers)).json()
+    assert body["total"] == 1 and len(body["days"]) == 1
+    day = body["days"][0]
+    assert day["total"] == 1
+    assert [c["count"] for c in day["categories"]] == [1]
+    assert day["feelings"] == [{"feeling": None, "count": 1}]
+
+
+def export(client, headers, task_ids):
+    my_task = new_my_task(client, headers)
+    ok(client.post("/logs", json={"task_id": task_ids[0]}, headers=headers))
+    ok(client.post("/stock", json={"task_id": task_ids[0]}, headers=headers))
+    expected = [("my_task", my_task), ("log", task_ids[0]), ("stock", task_ids[0])]
+    r = ok(client.get("/export", params={"format": "ndjson"}, headers=headers))
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert [(rec["type"], rec["id"] if rec["type"] == "my_task" else rec["task_id"]) for rec in records] == expected
+    rows = list(csv.reader(io.StringIO(ok(client.get("/export", params={"format": "csv"}, headers=headers)).text)))
+    assert tuple(rows[0]) == transfer.COLUMNS
+    type_col, id_col, task_col = (transfer.COLUMNS.index(c) for c in ("type", "id", "task_id"))
+    assert [
+        (row[type_col], int(row[id_col] if row[type_col] == "my_task" else row[task_col])) for row in rows[1:]
+    ] == expected
+
+
+def get_stock(client, headers, task_ids):
+    items = catalog_items(client, headers)
+    catalog.bump_catalog_version()
+    assert ok(client.get("/stock", headers=headers)).json() == []
+    ok(client.post("/stock/batch", json={"task_ids": task_ids[:5]}, headers=headers))
+    for sort in ("created", "difficulty", "category"):
+        r = ok(client.get("/stock", params={"sort": sort, "limit": 2}, headers=headers))
+        r2 = ok(client.get("/stock", params={"sort": sort, "limit": 2, "cursor": r.headers["x-next-cursor"]}, headers=headers))
+        page = r.json() + r2.json()
+        assert len(page) == 4 and len({item["id"] for item in page}) == 4
+        assert {item["id"] for item in page} <= set(task_ids[:5])
+        for item in page:
+            assert (item["title"], item["source"]) == (items[item["id"]]["title"], "catalog")
+        if sort == "difficulty":
+            assert [item["difficulty"] or 0 for item in page] == sorted(item["difficulty"] or 0 for item in page)
+        r3 = client.get("/stock", params={"sort": sort, "limit": 2}, headers={**headers, "If-None-Match": r.headers["etag"]})
+        assert ok(r3).status_code == 304
+    assert sorted(stocked_ids(client, headers)) == sorted(task_ids[:5])
+
+
+def create_stock(client, headers, task_ids):
+    my_task = new_my_task(client, headers)
+    statuses = [
+        ok(client.post("/stock", json={"task_id": task_id}, headers=headers)).json()["status"]
+        for task_id in (task_ids[0], task_ids[0], my_task)
+    ]
+    assert statuses == ["created", "exists", "created"]
+    assert sorted(stocked_ids(client, headers)) == sorted([task_ids[0], my_task])
+
+
+def stock_batch(client, headers, task_ids):
+    r = ok(client.post("/stock/batch", json={"task_ids": [*task_ids[:3], -1]}, headers=headers))
+    assert r.json() == {"created": task_ids[:3], "skipped": [-1]}
+    r = ok(client.post("/stock/batch", json={"task_ids": task_ids[:4]}, headers=headers))
+    assert r.json() == {"created": [task_ids[3]], "skipped": task_ids[:3]}
+    assert sorted(stocked_ids(client, headers)) == sorted(task_ids[:4])
+
+
+def stock_batch_delete(client, headers, task_ids):
+    ok(client.post("/stock/batch", json={"task_ids": task_ids[:3]}, headers=headers))
+    r = ok(client.post("/stock/batch/delete", json={"task_ids": [*task_ids[:2], -1]}, headers=headers))
+    assert r.json() == {"deleted": task_ids[:2], "skipped": [-1]}
+    r = ok(client.post("/stock/batch/delete", json={"task_ids": task_ids[:2]}, headers=headers))
+    assert r.json() == {"deleted": [], "skipped": task_ids[:2]}
+    assert stocked_ids(client, headers) == [task_ids[2]]
+
+
+def delete_stock(client, headers, task_ids):
+    ok(client.post("/stock", json={"task_id": task_ids[0]}, headers=headers))
+    assert ok(client.delete(f"/stock/by-task/{task_ids[0]}", headers=headers)).status_code == 204
+    assert stocked_ids(client, headers) == []
+    assert ok(client.delete(f"/stock/by-task/{task_ids[0]}", headers=headers)).status_code == 204
+
+
+def search(client, headers, task_ids):
+    catalog.bump_catalog_version()
+    body = ok(client.get("/challenges/search", headers=headers)).json()
+    assert [item["id"] for item in body] == task_ids
+    assert not any(item["is_completed"] for item in body)
+    ok(client.post("/logs", json={"task_id": task_ids[0]}, headers=headers))
+    for params in ({"q": "タスク"}, {"category_id": 1}, {"sort": "difficulty"}):
+        body = ok(client.get("/challenges/search", params=params, headers=headers)).json()
+        assert {item["id"] for item in body} <= set(task_ids)
+        assert all(item["is_completed"] == (item["id"] == task_ids[0]) for item in body)
+        if "sort" in params:
+            assert len(body) == len(task_ids)
+            assert [item["difficulty"] or 0 for item in body] == sorted(item["difficulty"] or 0 for item in body)
+    r = ok(client.get("/challenges/search", params={"limit": 3}, headers=headers))
+    assert [item["id"] for item in r.json()] == task_ids[:3]
+    assert [item["is_completed"] for item in r.json()] == [True, False, False]
+    r = ok(client.get("/challenges/search", params={"limit": 3, "cursor": r.headers["x-next-cursor"]}, headers=headers))
+    assert [item["id"] for item in r.json()] == task_ids[3:6]
+
+
+def categories(client, headers, task_ids):
+    catalog.bump_catalog_version()
+    r = ok(client.get("/categories"))
+    assert r.json() and all(set(c) == {"id", "name"} and c["name"] for c in r.json())
+    assert len({c["id"] for c in r.json()}) == len(r.json())
+    assert ok(client.get("/categories", headers={"If-None-Match": r.headers["etag"]})).status_code == 304
+
+
+def get_my_tasks(client, headers, task_ids):
+    assert ok(client.get("/my_tasks", headers=headers)).json() == []
+    my_task = new_my_task(client, headers)
+    r = ok(client.get("/my_tasks", params={"limit": 1}, headers=headers))
+    assert [(t["id"], t["title"], t["description"]) for t in r.json()] == [(my_task, "own", "d")]
+    r = client.get("/my_tasks", params={"limit": 1}, headers={**headers, "If-None-Match": r.headers["etag"]})
+    assert ok(r).status_code == 304
+
+
+def create_my_task(client, headers, task_ids):
+    first = new_my_task(client, headers)
+    r = ok(client.post("/my_tasks", json={"title": "no description"}, headers=headers))
+    assert (r.json()["title"], r.json()["description"]) == ("no description", None)
+    listed = ok(client.get("/my_tasks", headers=headers)).json()
+    assert [(t["id"], t["title"]) for t in listed] == [(r.json()["id"], "no description"), (first, "own")]
+
+
+def update_my_task(client, headers, task_ids):
+    my_task = new_my_task(client, headers)
+    r = ok(client.put(f"/my_tasks/{my_task}", json={"title": "renamed"}, headers=headers))
+    assert (r.json()["id"], r.json()["title"], r.json()["description"]) == (my_task, "renamed", "d")
+    r = ok(client.put(f"/my_tasks/{my_task}", json={"description": "new"}, headers=headers))
+    assert (r.json()["title"], r.json()["description"]) == ("renamed", "new")
+    listed = ok(client.get("/my_tasks", headers=headers)).json()
+    assert [(t["title"], t["description"]) for t in listed] == [("renamed", "new")]
+
+
+def delete_my_task(client, headers, task_ids):
+    my_task = new_my_task(client, headers)
+    assert ok(client.delete(f"/my_tasks/{my_task}", headers=headers)).status_code == 204
+    assert ok(client.get("/my_tasks", headers=headers)).json() == []
+    assert ok(client.delete(f"/my_tasks/{my_task}", headers=headers)).status_code == 204
+
+
+SCENARIOS = {
+    ("GET", "/tasks/daily"): daily,
+    ("POST", "/tasks/daily/replace"): daily_replace,
+    ("POST", "/logs"): create_log,
+    ("POST", "/logs/batch"): create_logs_batch,
+    ("GET", "/logs"): get_logs,
+    ("GET", "/logs/summary"): log_summary,
+    ("GET", "/export"): export,
+    ("GET", "/stock"): get_stock,
+    ("POST", "/stock"): create_stock,
+    ("POST", "/stock/batch"): stock_batch,
+    ("POST", "/stock/batch/delete"): stock_batch_delete,
+    ("DELETE", "/stock/by-task/{task_id}"): delete_stock,
+    ("GET", "/challenges/search"): search,
+    ("GET", "/categories"): categories,
+    ("GET", "/my_tasks"): get_my_tasks,
+    ("POST", "/my_tasks"): create_my_task,
+    ("PUT", "/my_tasks/{task_id}"): update_my_task,
+    ("DELETE", "/my_tasks/{task_id}"): delete_my_task,
+}
+
+
+def test_every_budgeted_route_has_a_scenario():
+    assert budgeted_routes() == set(SCENARIOS)
+
+
+@pytest.mark.parametrize("route", sorted(SCENARIOS), ids=" ".join)
+def test_route_stays_within_its_budget(client, catalog_ids, user, route):
+    SCENARIOS[route](client, {"X-User-Id": user}, catalog_ids)
@@ -0,0 +1,34 @@
+"""The recommender's chunking: a smaller ``CELL_BUDGET`` only changes how
+many users are scored at once, never the candidates."""
+
+from sqlalchemy import delete, select
+
+from app.models import Recommendation
+from app.services import recommender
+
+
+def candidates(engine) -> list:
+    with engine.connect() as conn:
+        return sorted(
+            conn.execute(
+                select(Recommendation.user_id, Recommendation.rank, Recommendation.task_id, Recommendation.score)
+            ).all()
+        )
+
+
+def test_chunk_size_does_not_change_candidates(client, engine, catalog_ids, user, monkeypatch):
+    for i in range(5):
+        for task_id in catalog_ids[i : i + 3]:
+            client.post("/logs", json={"task_id": task_id}, headers={"X-User-Id": f"{user}-{i}"}).raise_for_status()
+    try:
+        whole = recommender.build(engine, top_k=5, seed=7)
+        expected = candidates(engine)
+        monkeypatch.setattr(recommender, "CELL_BUDGET", 2 * whole.tasks)
+        chunked = recommender.build(engine, top_k=5, seed=7)
+        assert chunked.chunks == -(-chunked.users // 2) > whole.chunks
+        assert candidates(engine) == expected
+        logged = {(f"{user}-{i}", task_id) for i in range(5) for task_id in catalog_ids[i : i + 3]}
+        assert not logged & {(user_id, task_id) for user_id, _, task_id, _ in expected}
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(Recommendation))
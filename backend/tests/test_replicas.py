@@ -0,0 +1,139 @@
+"""Read-replica routing (``core/replicas.py``), with a copy of the SQLite test
+database as the replica; ``benchmarks/check_replica_routing.py`` runs the same
+checks against two Postgres databases.
+
+Nothing replicates between the two files, so a row written to only one of
+them shows which database served a read.
+"""
+
+import os
+import shutil
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+
+from app.core import database, query_stats, replicas
+from app.models import DailyAssignment, Stock, Task
+
+
+PIN_SECONDS = 0.5
+RETRY_SECONDS = 0.5
+
+
+class Replica:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.engine = create_engine(f"sqlite:///{path}")
+        query_stats.instrument(self.engine)
+        self.set = replicas.ReplicaSet([self.engine])
+        self.async_engine = None
+        self.async_set = None
+        if database.AsyncSessionLocal is not None:
+            self.async_engine = database._async_engine(f"sqlite:///{path}")
+            query_stats.instrument(self.async_engine.sync_engine)
+            self.async_set = replicas.ReplicaSet([self.async_engine.sync_engine])
+
+    def set_reachable(self, reachable: bool) -> None:
+        """Swap the file for a directory of the same name, or back."""
+        self.engine.dispose()
+        if self.async_engine is not None:
+            # Its connections belong to the test client's event loop; just drop them.
+            self.async_engine.sync_engine.dispose(close=False)
+        if reachable:
+            os.rmdir(self.path)
+            shutil.move(self.path + ".off", self.path)
+        else:
+            shutil.move(self.path, self.path + ".off")
+            os.mkdir(self.path)
+
+
+@pytest.fixture
+def replica(client, engine, tmp_path, monkeypatch):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("the replica is a copy of the SQLite test database")
+    path = str(tmp_path / "replica.db")
+    source = engine.raw_connection()
+    try:
+        with sqlite3.connect(path) as target:
+            source.driver_connection.backup(target)
+    finally:
+        source.close()
+    replica = Replica(path)
+    monkeypatch.setitem(database.SessionLocal.kw, "replica_set", replica.set)
+    if replica.async_set is not None:
+        monkeypatch.setitem(database.AsyncSessionLocal.kw, "replica_set", replica.async_set)
+    monkeypatch.setattr(replicas, "DB_READ_YOUR_WRITES_SECONDS", PIN_SECONDS)
+    monkeypatch.setattr(replicas, "DB_REPLICA_RETRY_SECONDS", RETRY_SECONDS)
+    yield replica
+    replica.engine.dispose()
+    if replica.async_engine is not None:
+        replica.async_engine.sync_engine.dispose(close=False)
+
+
+@pytest.fixture
+def reader(engine, replica, catalog_ids, user) -> str:
+    """A user with an own task on each database and a stock only on the replica."""
+    for target, title in ((engine, "on the primary"), (replica.engine, "on the replica")):
+        with target.begin() as conn:
+            conn.execute(insert(Task).values(title=title, source="my", owner_user_id=user))
+    with replica.engine.begin() as conn:
+        conn.execute(insert(Stock).values(id=f"{user}-stock", user_id=user, task_id=catalog_ids[0]))
+    return user
+
+
+def my_titles(client, user: str) -> set:
+    r = client.get("/my_tasks", headers={"X-User-Id": user})
+    assert r.status_code == 200, r.text
+    return {item["title"] for item in r.json()}
+
+
+def stocks(client, user: str) -> int:
+    r = client.get("/stock", headers={"X-User-Id": user})
+    assert r.status_code == 200, r.text
+    return len(r.json())
+
+
+def test_gets_read_from_the_replica(client, replica, reader):
+    assert my_titles(client, reader) == {"on the replica"}
+    assert stocks(client, reader) == 1
+    assert replica.set.status()[0]["healthy"]
+
+
+def test_a_write_pins_its_user_to_the_primary(client, engine, replica, reader, user):
+    other = f"{user}-other"
+    r = client.post("/my_tasks", json={"title": "new"}, headers={"X-User-Id": other})
+    assert r.status_code == 201, r.text
+    assert my_titles(client, other) == {"new"}
+    assert my_titles(client, reader) == {"on the replica"}
+    time.sleep(PIN_SECONDS + 0.1)
+    assert my_titles(client, other) == set()
+
+    # A GET that writes stores its row on the primary.
+    client.get("/tasks/daily", headers={"X-User-Id": reader}).raise_for_status()
+    counts = []
+    for target in (engine, replica.engine):
+        with target.connect() as conn:
+            counts.append(
+                conn.execute(
+                    select(func.count()).select_from(DailyAssignment).where(DailyAssignment.user_id == reader)
+                ).scalar_one()
+            )
+    assert counts == [1, 0]
+
+
+def test_reads_fall_back_to_the_primary_while_the_replica_is_down(client, replica, reader):
+    assert my_titles(client, reader) == {"on the replica"}
+    replica.set_reachable(False)
+    try:
+        assert my_titles(client, reader) == {"on the primary"}
+        assert stocks(client, reader) == 0
+        assert not replica.set.status()[0]["healthy"]
+    finally:
+        replica.set_reachable(True)
+    # Still on the primary until the retry window has passed.
+    assert my_titles(client, reader) == {"on the primary"}
+    time.sleep(RETRY_SECONDS + 0.1)
+    assert my_titles(client, reader) == {"on the replica"}
+    assert stocks(client, reader) == 1
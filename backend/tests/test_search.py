@@ -0,0 +1,38 @@
+"""A catalog reseed patches the search index in place instead of rebuilding it."""
+
+import uuid
+
+from app.services import catalog, search, seeding
+from scripts.load_data import tasks as seed_tasks
+
+
+def search_ids(client, user: str, q: str) -> list:
+    r = client.get("/challenges/search", params={"q": q}, headers={"X-User-Id": user})
+    assert r.status_code == 200, r.text
+    return [item["id"] for item in r.json()]
+
+
+def reseed(engine, rows: list) -> dict:
+    with engine.begin() as conn:
+        report = seeding.seed_catalog(conn, rows)
+    catalog.publish_catalog_change(*report.pop("task_changes"))
+    return report
+
+
+def test_reseed_patches_the_index(client, engine, user):
+    title = f"索引パッチ {uuid.uuid4().hex[:8]}"
+    row = {"category": seed_tasks[0]["category"], "title": title, "description": "ゆっくり歩く", "difficulty": 1}
+    search_ids(client, user, "散歩")
+    index = search._index
+
+    report = reseed(engine, [row])
+    assert report["tasks_inserted"] == 1
+    assert search._index is index and index.version == catalog.catalog_version()
+    [task_id] = search_ids(client, user, title)
+    assert task_id in search_ids(client, user, "ゆっくり歩く")
+
+    report = reseed(engine, [dict(row, description="深く眠る")])
+    assert report["tasks_updated"] == 1
+    assert task_id not in search_ids(client, user, "ゆっくり歩く")
+    assert task_id in search_ids(client, user, "深く眠る")
+    assert search._index is index and index.version == catalog.catalog_version()
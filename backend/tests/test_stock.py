@@ -0,0 +1,69 @@
+"""Stocking with one ``INSERT ... ON CONFLICT DO NOTHING`` and unstocking with
+one ``DELETE ... RETURNING``."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.models import Stock
+
+
+def stocked(engine, user: str) -> list:
+    with engine.connect() as conn:
+        return sorted(conn.execute(select(Stock.task_id).where(Stock.user_id == user)).scalars())
+
+
+def test_repeated_stock_returns_exists(client, engine, catalog_ids, user):
+    headers = {"X-User-Id": user}
+    first = client.post("/stock", json={"task_id": catalog_ids[0]}, headers=headers)
+    assert first.status_code == 201, first.text
+    assert first.json()["status"] == "created"
+    with engine.connect() as conn:
+        assert conn.execute(select(Stock.id).where(Stock.user_id == user)).scalar_one() == first.json()["id"]
+
+    again = client.post("/stock", json={"task_id": catalog_ids[0]}, headers=headers)
+    assert again.status_code == 201, again.text
+    assert again.json() == {"status": "exists"}
+    assert stocked(engine, user) == [catalog_ids[0]]
+
+    assert client.post("/stock", json={"task_id": -1}, headers=headers).status_code == 404
+    others_task = client.post("/my_tasks", json={"title": "not yours"}, headers={"X-User-Id": f"{user}-other"})
+    r = client.post("/stock", json={"task_id": others_task.json()["id"]}, headers=headers)
+    assert r.status_code == 403
+    assert stocked(engine, user) == [catalog_ids[0]]
+
+
+def test_concurrent_stocks_of_one_task_create_one_row(client, engine, catalog_ids, user):
+    def post(_):
+        return client.post("/stock", json={"task_id": catalog_ids[0]}, headers={"X-User-Id": user})
+
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(post, range(8)))
+    assert [r.status_code for r in responses] == [201] * 8
+    assert sorted(r.json()["status"] for r in responses) == ["created"] + ["exists"] * 7
+    assert stocked(engine, user) == [catalog_ids[0]]
+
+
+def test_batch_stock_and_unstock(client, engine, catalog_ids, user):
+    headers = {"X-User-Id": user}
+    own = client.post("/my_tasks", json={"title": "mine"}, headers=headers).json()["id"]
+    others = client.post("/my_tasks", json={"title": "not yours"}, headers={"X-User-Id": f"{user}-other"}).json()["id"]
+    client.post("/stock", json={"task_id": catalog_ids[0]}, headers=headers).raise_for_status()
+
+    r = client.post(
+        "/stock/batch",
+        json={"task_ids": [catalog_ids[0], catalog_ids[1], -1, own, others, catalog_ids[1], catalog_ids[2]]},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    # Repeated ids are reported once, in request order.
+    assert r.json() == {"created": [catalog_ids[1], own, catalog_ids[2]], "skipped": [catalog_ids[0], -1, others]}
+    assert stocked(engine, user) == sorted([*catalog_ids[:3], own])
+
+    r = client.post("/stock/batch/delete", json={"task_ids": [catalog_ids[1], -1, catalog_ids[3], own]}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {"deleted": [catalog_ids[1], own], "skipped": [-1, catalog_ids[3]]}
+    assert stocked(engine, user) == sorted([catalog_ids[0], catalog_ids[2]])
+
+    r = client.post("/stock/batch/delete", json={"task_ids": [catalog_ids[1], own]}, headers=headers)
+    assert r.json() == {"deleted": [], "skipped": [catalog_ids[1], own]}
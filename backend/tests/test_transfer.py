@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+
+def ndjson(*records) -> bytes:
+    return "".join(json.dumps(r) + "\n" for r in records).encode()
+
+
+def test_my_task_without_description(client, user):
+    body = ndjson({"type": "my_task", "id": 1, "title": "t", "at": "2026-03-01T12:00:00"})
+    r = client.post("/import", content=body, headers={"X-User-Id": user})
+    assert r.status_code == 200, r.text
+    assert r.json()["my_tasks"]["created"] == 1
+    assert [t["description"] for t in client.get("/my_tasks", headers={"X-User-Id": user}).json()] == [None]
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"type": "my_task", "id": 1, "title": ["x"], "at": "2026-03-01T12:00:00"},
+        {"type": "my_task", "id": 1, "title": "t", "description": {"a": 1}, "at": "2026-03-01T12:00:00"},
+        {"type": "my_task", "id": [1], "title": "t", "at": "2026-03-01T12:00:00"},
+        {"type": "my_task", "id": True, "title": "t", "at": "2026-03-01T12:00:00"},
+        {"type": "log", "id": "a", "task_id": 1, "memo": 5, "at": "2026-03-01T12:00:00"},
+        {"type": "log", "id": "a", "task_id": 1, "photo_url": [], "at": "2026-03-01T12:00:00"},
+        {"type": "log", "id": "a", "task_id": 1, "feeling": 1.5, "at": "2026-03-01T12:00:00"},
+        {"type": "log", "id": {"x": 1}, "task_id": 1, "at": "2026-03-01T12:00:00"},
+    ],
+)
+def test_malformed_values_are_rejected(client, user, record):
+    r = client.post("/import", content=ndjson(record), headers={"X-User-Id": user})
+    assert r.status_code == 400, r.text
+    assert r.json()["detail"].startswith("line 1: ")
+
+
+def test_export_round_trip(client, catalog_ids, user):
+    source = {"X-User-Id": f"{user}-source"}
+    my_task = client.post("/my_tasks", json={"title": "own", "description": "d"}, headers=source).json()["id"]
+    for task_id in (catalog_ids[0], my_task):
+        client.post("/logs", json={"task_id": task_id, "memo": "m", "feeling": "good"}, headers=source)
+    client.post("/stock", json={"task_id": catalog_ids[1]}, headers=source)
+    for fmt in ("ndjson", "csv"):
+        body = client.get("/export", params={"format": fmt}, headers=source).content
+        r = client.post("/import", params={"format": fmt}, content=body, headers={"X-User-Id": f"{user}-{fmt}"})
+        assert r.status_code == 200, r.text
+        assert r.json()["my_tasks"]["created"] == 1
+        assert r.json()["logs"]["created"] == 2
+        assert r.json()["stocks"]["created"] == 1
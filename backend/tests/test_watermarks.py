@@ -0,0 +1,128 @@
+"""Every write bumps the watermarks of the lists it changes: an
+``If-None-Match`` that got a 304 before the write gets a 200 after it."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+
+def etag(client, user: str, path: str, params: dict) -> str:
+    r = client.get(path, params=params, headers={"X-User-Id": user})
+    assert r.status_code == 200, r.text
+    return r.headers["etag"]
+
+
+def revalidate(client, user: str, path: str, params: dict, tag: str) -> int:
+    return client.get(path, params=params, headers={"X-User-Id": user, "If-None-Match": tag}).status_code
+
+
+def ok(r):
+    assert r.status_code < 400, (r.request.method, r.request.url, r.status_code, r.text)
+    return r
+
+
+def new_my_task(client, headers) -> int:
+    return ok(client.post("/my_tasks", json={"title": "own"}, headers=headers)).json()["id"]
+
+
+# Each setup prepares the user's data and returns the write under test.
+
+
+def create_log(client, headers, task_ids):
+    return lambda: client.post("/logs", json={"task_id": task_ids[0]}, headers=headers)
+
+
+def create_logs_batch(client, headers, task_ids):
+    batch = {"logs": [{"client_id": "a", "task_id": task_ids[0], "achieved_at": "2026-03-05T08:00:00"}]}
+    return lambda: client.post("/logs/batch", json=batch, headers=headers)
+
+
+def create_stock(client, headers, task_ids):
+    return lambda: client.post("/stock", json={"task_id": task_ids[0]}, headers=headers)
+
+
+def stock_batch(client, headers, task_ids):
+    return lambda: client.post("/stock/batch", json={"task_ids": task_ids[:3]}, headers=headers)
+
+
+def stock_batch_delete(client, headers, task_ids):
+    ok(client.post("/stock/batch", json={"task_ids": task_ids[:3]}, headers=headers))
+    return lambda: client.post("/stock/batch/delete", json={"task_ids": task_ids[:2]}, headers=headers)
+
+
+def delete_stock(client, headers, task_ids):
+    ok(client.post("/stock", json={"task_id": task_ids[0]}, headers=headers))
+    return lambda: client.delete(f"/stock/by-task/{task_ids[0]}", headers=headers)
+
+
+def create_my_task(client, headers, task_ids):
+    return lambda: client.post("/my_tasks", json={"title": "new"}, headers=headers)
+
+
+def update_my_task(client, headers, task_ids):
+    # A logged and stocked own task: renaming it changes all three lists.
+    task_id = new_my_task(client, headers)
+    ok(client.post("/logs", json={"task_id": task_id}, headers=headers))
+    ok(client.post("/stock", json={"task_id": task_id}, headers=headers))
+    return lambda: client.put(f"/my_tasks/{task_id}", json={"title": "renamed"}, headers=headers)
+
+
+def delete_my_task(client, headers, task_ids):
+    task_id = new_my_task(client, headers)
+    return lambda: client.delete(f"/my_tasks/{task_id}", headers=headers)
+
+
+# route -> (setup, the lists it changes as (path, params))
+WRITES = {
+    ("POST", "/logs"): (create_log, [("/logs", {}), ("/logs", {"month": f"{datetime.now(timezone.utc):%Y-%m}"})]),
+    ("POST", "/logs/batch"): (create_logs_batch, [("/logs", {}), ("/logs", {"month": "2026-03"})]),
+    ("POST", "/stock"): (create_stock, [("/stock", {})]),
+    ("POST", "/stock/batch"): (stock_batch, [("/stock", {}), ("/stock", {"sort": "difficulty"})]),
+    ("POST", "/stock/batch/delete"): (stock_batch_delete, [("/stock", {})]),
+    ("DELETE", "/stock/by-task/{task_id}"): (delete_stock, [("/stock", {})]),
+    ("POST", "/my_tasks"): (create_my_task, [("/my_tasks", {}), ("/my_tasks", {"limit": 1})]),
+    ("PUT", "/my_tasks/{task_id}"): (update_my_task, [("/my_tasks", {}), ("/logs", {}), ("/stock", {})]),
+    ("DELETE", "/my_tasks/{task_id}"): (delete_my_task, [("/my_tasks", {})]),
+}
+
+
+@pytest.mark.parametrize("route", sorted(WRITES), ids=" ".join)
+def test_write_invalidates_etags(client, catalog_ids, user, route):
+    headers = {"X-User-Id": user}
+    setup, lists = WRITES[route]
+    # Something in each list first, so no list starts out empty.
+    ok(client.post("/logs", json={"task_id": catalog_ids[5]}, headers=headers))
+    ok(client.post("/stock", json={"task_id": catalog_ids[5]}, headers=headers))
+    new_my_task(client, headers)
+    do_write = setup(client, headers, catalog_ids)
+    tags = [(path, params, etag(client, user, path, params)) for path, params in lists]
+    for path, params, tag in tags:
+        assert revalidate(client, user, path, params, tag) == 304, (path, params)
+    ok(do_write())
+    for path, params, tag in tags:
+        assert revalidate(client, user, path, params, tag) == 200, (path, params)
+
+
+def test_no_op_writes_keep_etags(client, catalog_ids, user):
+    headers = {"X-User-Id": user}
+    ok(client.post("/stock", json={"task_id": catalog_ids[0]}, headers=headers))
+    tag = etag(client, user, "/stock", {})
+    ok(client.post("/stock", json={"task_id": catalog_ids[0]}, headers=headers))
+    ok(client.post("/stock/batch/delete", json={"task_ids": [catalog_ids[1]]}, headers=headers))
+    assert revalidate(client, user, "/stock", {}, tag) == 304
+
+
+def test_log_writes_only_invalidate_their_month(client, catalog_ids, user):
+    headers = {"X-User-Id": user}
+
+    def log_at(client_id: str, achieved_at: str) -> None:
+        batch = {"logs": [{"client_id": client_id, "task_id": catalog_ids[0], "achieved_at": achieved_at}]}
+        ok(client.post("/logs/batch", json=batch, headers=headers))
+
+    log_at("march", "2026-03-10T09:00:00")
+    log_at("april", "2026-04-10T09:00:00")
+    march, april = {"month": "2026-03"}, {"month": "2026-04"}
+    march_tag, april_tag = etag(client, user, "/logs", march), etag(client, user, "/logs", april)
+    log_at("march-2", "2026-03-20T09:00:00")
+    assert revalidate(client, user, "/logs", march, march_tag) == 200
+    assert revalidate(client, user, "/logs", april, april_tag) == 304
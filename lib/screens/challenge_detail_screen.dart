@@ -124,7 +124,8 @@ class ChallengeDetailScreen extends StatelessWidget {
       return;
     }
 
-    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily/replace');
+    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily/replace')
+        .replace(queryParameters: {'date': ApiHeaders.localDate()});
     final headers = await ApiHeaders.jsonHeaders();
     final bool isMy = task.source == 'my';
     final int? idInt = int.tryParse(task.id);
@@ -77,10 +77,14 @@ class _HomeScreenState extends State<HomeScreen> {
       _errorMessage = null;
     });
 
-    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily?force_refresh=$forceRefresh');
+    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily').replace(queryParameters: {
+      'force_refresh': '$forceRefresh',
+      'date': ApiHeaders.localDate(),
+    });
 
     try {
-      final response = await http.get(url).timeout(const Duration(seconds: 10));
+      final headers = await ApiHeaders.baseHeaders();
+      final response = await http.get(url, headers: headers).timeout(const Duration(seconds: 10));
       if (response.statusCode == 200) {
         final data = json.decode(utf8.decode(response.bodyBytes));
         appState.setDailyTask(Task.fromJson(data));
@@ -143,7 +143,8 @@ class _MyTasksScreenState extends State<MyTasksScreen> {
   }
 
   Future<void> _setMyTaskAsDaily(int taskId, String title) async {
-    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily/replace');
+    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily/replace')
+        .replace(queryParameters: {'date': ApiHeaders.localDate()});
     final headers = await ApiHeaders.jsonHeaders();
     final bodyMy = json.encode({'my_task_id': taskId, 'source': 'my'});
     try {
@@ -113,7 +113,8 @@ class _StockScreenState extends State<StockScreen> {
       return;
     }
 
-    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily/replace');
+    final url = Uri.parse('${Environment.apiBaseUrl}/tasks/daily/replace')
+        .replace(queryParameters: {'date': ApiHeaders.localDate()});
     final headers = await ApiHeaders.jsonHeaders();
     final Task t = _stockedTasks.firstWhere((e) => e.id == taskId, orElse: () => Task(id: taskId, title: taskTitle, tags: []));
     final bool isMy = (t.source == 'my');
@@ -1,3 +1,4 @@
+import 'package:intl/intl.dart';
 import 'package:little_challenge_app/services/user_id_service.dart';
 
 class ApiHeaders {
@@ -15,5 +16,9 @@ class ApiHeaders {
       'X-User-Id': userId,
     };
   }
-}
 
+  /// The device's local date as `YYYY-MM-DD`, sent as the `date` query
+  /// parameter of `/tasks/daily` and `/tasks/daily/replace` so the daily
+  /// task follows the user's day rather than the server's.
+  static String localDate() => DateFormat('yyyy-MM-dd').format(DateTime.now());
+}